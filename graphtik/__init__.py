@@ -26,8 +26,9 @@ from .modifier import (
     varargs,
     vcat,
 )
-from .fnop import NO_RESULT, NO_RESULT_BUT_SFX, operation
+from .fnop import NO_RESULT, NO_RESULT_BUT_SFX, map_operation, operation
 from .pipeline import compose
+from .sources import lazy
 
 ## SEE ALSO: `.plot.active_plotter_plugged()`, `.plot.set_active_plotter()` &
 #  `.plot.get_active_plotter()` configs, not imported, unless plot is needed..
@@ -0,0 +1,97 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Command-line entry point: ``python -m graphtik <command> ...``.
+
+- ``serve``: serve a pipeline in :term:`service mode` (see :mod:`.serve`).
+- ``worker``: compute tasks of a :term:`distributed execution` (see :mod:`.distributed`).
+"""
+import argparse
+import logging
+import sys
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m graphtik", description="Graphtik command-line tools."
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="count", default=0, help="more logging (repeat)"
+    )
+    commands = parser.add_subparsers(dest="command")
+
+    serve = commands.add_parser(
+        "serve",
+        help="serve a pipeline over a local socket, with warm plans"
+        " (accepting pickled requests over HTTP only with $GRAPHTIK_AUTHKEY)",
+    )
+    serve.add_argument("pipeline", help="a `<module>:<pipeline>` import path")
+    serve.add_argument(
+        "--address",
+        default="127.0.0.1:8765",
+        help="`unix:<path>` or `[<host>]:<port>` (default: %(default)s)",
+    )
+    serve.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="computing threads (default: %(default)s)",
+    )
+    serve.add_argument(
+        "--max-queued",
+        type=int,
+        default=64,
+        help="requests waiting for a worker before rejecting more (default: %(default)s)",
+    )
+    serve.add_argument(
+        "--plan",
+        action="append",
+        default=[],
+        dest="plans",
+        metavar='"IN,...->OUT,..."',
+        help="precompile a plan for these inputs & outputs (repeatable)",
+    )
+
+    worker = commands.add_parser(
+        "worker",
+        help="compute tasks sent by a cluster coordinator"
+        " (authenticating with $GRAPHTIK_AUTHKEY)",
+    )
+    worker.add_argument("coordinator", help="the `[<host>]:<port>` of the coordinator")
+    worker.add_argument(
+        "--host",
+        help="the interface to serve values to peers"
+        " (default: the one reaching the coordinator)",
+    )
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.error("a command is required")
+    logging.basicConfig(
+        level=max(logging.DEBUG, logging.WARNING - 10 * args.verbose),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    if args.command == "serve":
+        from .serve import serve
+
+        serve(
+            args.pipeline,
+            args.address,
+            workers=args.workers,
+            max_queued=args.max_queued,
+            plans=args.plans,
+        )
+    elif args.command == "worker":
+        from .distributed import run_worker
+
+        run_worker(args.coordinator, host=args.host)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Coalesce concurrent computations into batches, for :term:`micro-batching`.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.batching import *
+    >>> __name__ = "graphtik.batching"
+"""
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable, List, Mapping, Tuple
+
+from .base import UNSET, Items, aslist
+
+log = logging.getLogger(__name__)
+
+
+class PerItem:
+    """
+    Call a function once per item of its list args, collecting results into lists.
+
+    Wraps the non-:term:`vectorized` operations of a batched pipeline;
+    results of functions returning tuples (for many `provides`) or dictionaries
+    (:term:`returns dictionary`) are transposed into tuples or dictionaries of lists.
+
+    **Example:**
+
+        >>> PerItem(divmod, 2)([7, 9], [2, 4])
+        ([3, 2], [1, 1])
+    """
+
+    def __init__(self, fn: Callable, nresults: int = 1, returns_dict=False):
+        self.fn = fn
+        self.nresults = nresults
+        self.returns_dict = returns_dict
+
+    def __repr__(self):
+        return f"PerItem({self.fn!r})"
+
+    def __call__(self, *args, **kwargs):
+        nargs = len(args)
+        rows = [
+            self.fn(*items[:nargs], **dict(zip(kwargs, items[nargs:])))
+            for items in zip(*args, *kwargs.values())
+        ]
+
+        if self.returns_dict:
+            keys = rows[0].keys() if rows else ()
+            return {k: [r[k] for r in rows] for k in keys}
+        if self.nresults > 1:
+            return tuple(map(list, zip(*rows))) if rows else ((),) * self.nresults
+        return rows
+
+
+def batched_pipeline(pipeline: "Pipeline") -> "Pipeline":
+    """
+    Clone `pipeline` to compute lists of values, with non-:term:`vectorized` ops wrapped in :class:`PerItem`.
+
+    :raises ValueError:
+        if non-vectorized operations have no needs to batch by
+    """
+    from .fnop import FnOp
+    from .pipeline import Pipeline
+
+    def batched(op):
+        if not isinstance(op, FnOp) or op.vectorized:
+            return op
+        if not op._fn_needs:
+            raise ValueError(
+                f"Cannot batch non-vectorized operation without needs: {op}"
+            )
+        return op.withset(fn=PerItem(op.fn, len(op._fn_provides), op.returns_dict))
+
+    return Pipeline(
+        [batched(op) for op in pipeline.ops],
+        pipeline.name,
+        outputs=pipeline.outputs,
+        predicate=pipeline.predicate,
+    )
+
+
+class Batcher:
+    """
+    A front-end coalescing concurrent computations of a pipeline into batches.
+
+    Requests with the same *signature* (input names & `outputs`) arriving within
+    a `window` of seconds from the 1st one (or until `max_batch_size` of them
+    have arrived) are computed together, once, by the :func:`batched_pipeline()`:
+    their inputs are stacked into lists, :term:`vectorized` operations compute
+    the whole lists at once, the rest are called per item, and the results
+    are scattered back to each request's future.
+
+    If a batch fails, its requests are re-computed one by one,
+    to deliver the error only to the offending ones.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+
+        >>> calls = []
+        >>> def scale(xs):
+        ...     calls.append(len(xs))
+        ...     return [x * 10 for x in xs]
+
+        >>> pipe = compose(
+        ...     "scoring",
+        ...     operation(scale, "scale", needs="x", provides="y", vectorized=True),
+        ...     operation(lambda y: y + 1, "inc", needs="y", provides="z"),
+        ... )
+        >>> with Batcher(pipe, window=0.05) as batcher:
+        ...     futures = [batcher.submit({"x": i}, "z") for i in range(3)]
+        ...     [f.result() for f in futures]
+        [{'z': 1}, {'z': 11}, {'z': 21}]
+        >>> calls
+        [3]
+    """
+
+    def __init__(self, pipeline: "Pipeline", *, window=0.005, max_batch_size=64):
+        """
+        :param window:
+            seconds to wait for more requests, after the 1st request of a batch
+        :param max_batch_size:
+            the batch is computed right away (in the thread of the last request),
+            once that many requests have arrived
+        """
+        if not window >= 0:
+            raise ValueError(f"`window` must be non-negative, got: {window!r}")
+        if not isinstance(max_batch_size, int) or max_batch_size < 1:
+            raise ValueError(
+                f"`max_batch_size` must be a positive integer, got: {max_batch_size!r}"
+            )
+        self.pipeline = pipeline
+        self.window = window
+        self.max_batch_size = max_batch_size
+        #: The clone of the :attr:`pipeline` computing batches.
+        self.batched = batched_pipeline(pipeline)
+        self._lock = threading.Lock()
+        #: signature --> (list of (inputs, future), timer)
+        self._pending = {}
+
+    def __repr__(self):
+        return (
+            f"Batcher({self.pipeline.name!r}, window={self.window}, "
+            f"max_batch_size={self.max_batch_size})"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exinfo):
+        self.flush()
+
+    def submit(self, named_inputs: Mapping, outputs: Items = UNSET) -> Future:
+        """
+        Enqueue a computation to be batched with others of the same signature.
+
+        :param outputs:
+            like in :meth:`.Pipeline.compute()`, defaults to the pipeline's
+        :return:
+            a future delivering a dict with the `outputs`
+            (or all values, if `outputs` is ``None``)
+        """
+        if outputs == UNSET:
+            outputs = self.pipeline.outputs
+        if outputs is not None:
+            outputs = tuple(aslist(outputs, "outputs"))
+        sig = (frozenset(named_inputs), outputs)
+
+        fut = Future()
+        full = None
+        with self._lock:
+            if sig in self._pending:
+                batch, timer = self._pending[sig]
+            else:
+                batch = []
+                timer = threading.Timer(self.window, self._flush_batch, (sig, batch))
+                timer.daemon = True
+                self._pending[sig] = batch, timer
+                timer.start()
+            batch.append((named_inputs, fut))
+            if len(batch) >= self.max_batch_size:
+                timer.cancel()
+                full = self._pending.pop(sig)[0]
+
+        if full:
+            self._compute_batch(sig, full)
+        return fut
+
+    def compute(self, named_inputs: Mapping, outputs: Items = UNSET) -> dict:
+        """Submit a computation & wait for its results (see :meth:`submit()`)."""
+        return self.submit(named_inputs, outputs).result()
+
+    def flush(self):
+        """Compute all pending batches now."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for sig, (batch, timer) in pending.items():
+            timer.cancel()
+            self._compute_batch(sig, batch)
+
+    def _flush_batch(self, sig: Tuple[Hashable, ...], batch: list):
+        with self._lock:
+            if self._pending.get(sig, (None,))[0] is not batch:
+                return  # Already computed, when filled up or flushed.
+            del self._pending[sig]
+        self._compute_batch(sig, batch)
+
+    def _compute_stacked(self, sig, batch: list) -> List[dict]:
+        inputs, outputs = sig
+        n = len(batch)
+        stacked = {k: [named_inputs[k] for named_inputs, _ in batch] for k in inputs}
+        sol = self.batched.compute(stacked, outputs)
+        sol.scream_if_incomplete()
+
+        bad = {k: len(v) for k, v in sol.items() if len(v) != n}
+        if bad:
+            raise ValueError(
+                f"Batched outputs{list(bad)} of {self} not of length {n}: {bad}"
+            )
+        return [{k: v[i] for k, v in sol.items()} for i in range(n)]
+
+    def _compute_batch(self, sig, batch: list):
+        log.debug("%s: computing batch of x%i requests.", self, len(batch))
+        try:
+            results = self._compute_stacked(sig, batch)
+        except Exception as ex:
+            if len(batch) == 1:
+                batch[0][1].set_exception(ex)
+                return
+            log.warning(
+                "%s: batch of x%i requests failed due to: %s(%s)"
+                "\n  +--re-computing them one by one...",
+                self,
+                len(batch),
+                type(ex).__name__,
+                ex,
+            )
+            for request in batch:
+                self._compute_batch(sig, [request])
+        else:
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
@@ -0,0 +1,117 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Split inputs into chunks and reduce outputs, for :term:`chunked execution`.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.chunking import *
+    >>> __name__ = "graphtik.chunking"
+"""
+import logging
+import operator
+import os
+from functools import reduce
+from typing import Any, Callable, Iterator, List, Mapping, Union
+
+from .streams import concat_chunks
+
+log = logging.getLogger(__name__)
+
+#: A reducer combines the list of per-chunk values of an output into one.
+Reducer = Callable[[List[Any]], Any]
+
+#: The reducers recognized by name, for :meth:`.Pipeline.compute_chunked()`.
+reducers = {
+    "concat": concat_chunks,
+    "sum": lambda values: reduce(operator.add, values),
+    "list": list,
+    "first": operator.itemgetter(0),
+}
+
+#: Binary functions folding the values of the named :data:`reducers` as each chunk
+#: completes, not to keep the values of all chunks in memory.
+folds = {
+    "sum": operator.add,
+    "first": lambda acc, value: acc,
+}
+
+
+def as_reducer(reducer: Union[str, Reducer]) -> Reducer:
+    """
+    Return a callable `reducer` as is, or one from :data:`reducers` by name.
+
+    :raises ValueError:
+        if a name not in :data:`reducers`
+    :raises TypeError:
+        if neither a name nor callable
+    """
+    if isinstance(reducer, str):
+        try:
+            return reducers[reducer]
+        except KeyError:
+            raise ValueError(
+                f"Unknown reducer {reducer!r}, not one of: {list(reducers)}"
+            ) from None
+    if not callable(reducer):
+        raise TypeError(f"Expected a callable or a reducer name, got: {reducer!r}")
+    return reducer
+
+
+def _open_chunked(value):
+    """Memory-map ``.npy`` file paths, not to load them whole."""
+    if isinstance(value, (str, os.PathLike)) and str(value).lower().endswith(".npy"):
+        import numpy as np
+
+        return np.load(value, mmap_mode="r")
+    return value
+
+
+def _slice(value, start: int, stop: int):
+    iloc = getattr(value, "iloc", None)  # pandas
+    return value[start:stop] if iloc is None else iloc[start:stop]
+
+
+def iter_chunks(
+    values: Mapping[str, Any], chunk_by: Mapping[str, int]
+) -> Iterator[dict]:
+    """
+    Yield copies of `values` with the inputs in `chunk_by` sliced into chunks of rows.
+
+    :param values:
+        the inputs, some of them sliceable (e.g. arrays, dataframes, lists)
+        or paths to ``.npy`` files, memory-mapped
+    :param chunk_by:
+        a mapping of input names --> number of rows per chunk
+    :raises ValueError:
+        if `chunk_by` names inputs missing from `values`,
+        non-positive sizes, or if chunked inputs yield different number of chunks
+
+    **Example:**
+
+        >>> [c["a"] for c in iter_chunks({"a": [1, 2, 3], "b": 0}, {"a": 2})]
+        [[1, 2], [3]]
+    """
+    missing = [k for k in chunk_by if k not in values]
+    if missing:
+        raise ValueError(f"Chunked inputs{missing} missing from inputs{list(values)}!")
+    bad = {k: n for k, n in chunk_by.items() if not isinstance(n, int) or n < 1}
+    if bad:
+        raise ValueError(f"Chunk sizes must be positive integers, got: {bad}")
+
+    chunked = {k: _open_chunked(values[k]) for k in chunk_by}
+    nchunks = {k: -(-len(v) // chunk_by[k]) for k, v in chunked.items()}
+    if len(set(nchunks.values())) > 1:
+        raise ValueError(
+            f"Chunked inputs split in different number of chunks: {nchunks}"
+        )
+
+    for i in range(next(iter(nchunks.values()), 0)):
+        chunk = dict(values)
+        for k, v in chunked.items():
+            n = chunk_by[k]
+            chunk[k] = _slice(v, i * n, (i + 1) * n)
+        yield chunk
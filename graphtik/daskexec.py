@@ -0,0 +1,365 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Translate plans into :term:`dask graph`\\s, and execute them on dask's schedulers.
+
+Requires :mod:`dask` only for :func:`execute_dask()`.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.daskexec import *
+    >>> __name__ = "graphtik.daskexec"
+"""
+import logging
+import time
+from collections import ChainMap
+from typing import Any, Callable, Dict, List, Mapping, Union
+
+from .base import Items, Token, first_solid
+from .config import is_endure_operations, is_skip_evictions
+from .execution import Solution, _OpTask, _root_key, _update_outputs_grouped_by_accessor
+from .modifier import (
+    acc_contains,
+    acc_getitem,
+    dep_stripped,
+    is_implicit,
+    is_optional,
+    is_pure_sfx,
+    is_sfx,
+)
+from .planning import yield_ops
+
+log = logging.getLogger(__name__)
+
+#: The key of the plan inputs in the :term:`dask graph`\\s (ops are keyed by their names).
+INPUTS_KEY = "graphtik-inputs"
+#: The prefix of the keys of the outcome tasks, added by :func:`execute_dask()`.
+OUTCOME_KEY = "graphtik-outcome"
+#: The value of outputs not returned from dask, to be evicted when replayed.
+RELEASED = Token("RELEASED")
+
+
+def _dep_root(dep) -> str:
+    """The value (or pure sideffect) name that a `dep` reads or writes."""
+    return _root_key(is_sfx(dep) or dep)
+
+
+class _Inputs(ChainMap):
+    """The values given to an operation, resolving :term:`jsonp` needs like a :class:`.Solution`."""
+
+    def __contains__(self, key):
+        return acc_contains(key)(self.maps[0], key)
+
+    def __getitem__(self, key):
+        try:
+            return acc_getitem(key)(self.maps[0], key)
+        except KeyError:
+            return self.__missing__(key)
+
+
+class _Done:
+    """The outcome of a dask task, mimicking a future to replay it in a :class:`.Solution`."""
+
+    __slots__ = ("outputs", "error", "elapsed")
+
+    def __init__(self, outputs=None, error=None, elapsed=0.0):
+        #: the operation results, or None if it failed or was canceled
+        self.outputs = outputs
+        self.error = error
+        #: secs computing the operation
+        self.elapsed = elapsed
+
+    @property
+    def canceled(self) -> bool:
+        return self.outputs is None and self.error is None
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.outputs
+
+    def __repr__(self):
+        state = "canceled" if self.canceled else "failed" if self.error else "done"
+        return f"Done({state}, {self.elapsed:0.3f}s)"
+
+
+class _FailFast:
+    """
+    Set by the 1st failed operation not :term:`endured`, to cancel the rest tasks.
+
+    Shared only by the tasks in this process (threaded & sync schedulers):
+    pickled, it arrives unset into other processes.
+    """
+
+    __slots__ = ("endurance", "failed")
+
+    def __init__(self, endurance=None):
+        self.endurance = endurance
+        self.failed = False
+
+    def __reduce__(self):
+        return (_FailFast, (self.endurance,))
+
+    def __repr__(self):
+        return f"FailFast(failed={self.failed})"
+
+
+def _compute_op(
+    op, solid, callbacks, sfx_providers, fail_fast, inputs, *upstream
+) -> _Done:
+    """
+    The dask task of an `op`, merging the `inputs` with the `upstream` outputs (in step order).
+
+    Canceled if any compulsory need is missing, or no `upstream` (by index)
+    produced one of its sideffects, in `sfx_providers`,
+    or if some other operation has already failed the `fail_fast` flag (if given).
+    """
+    if fail_fast and fail_fast.failed:
+        log.debug("... (%s) canceled %s, due to a failure.", solid, op)
+        return _Done()
+
+    values = dict(inputs)
+    for done in upstream:
+        if done.outputs:
+            _update_outputs_grouped_by_accessor(values, done.outputs)
+    values = _Inputs(values)
+
+    missing = [
+        n
+        for n in op.needs
+        if not (is_optional(n) or is_pure_sfx(n) or is_implicit(n))
+        and (is_sfx(n) or n) not in values
+    ]
+    if missing or any(
+        not any(upstream[i].outputs is not None for i in providers)
+        for providers in sfx_providers
+    ):
+        log.debug("... (%s) canceled %s, missing needs%s.", solid, op, missing)
+        return _Done()
+
+    t0 = time.time()
+    try:
+        outputs = _OpTask(op, values, solid, callbacks)()
+        return _Done(outputs, elapsed=time.time() - t0)
+    except Exception as ex:
+        if fail_fast and not first_solid(
+            fail_fast.endurance, getattr(op, "endured", None)
+        ):
+            fail_fast.failed = True
+        # Maybe unpicklable, re-collected when replayed.
+        vars(ex).pop("jetsam", None)
+        return _Done(error=ex, elapsed=time.time() - t0)
+
+
+def _outcome(done: _Done, kept) -> _Done:
+    """
+    The `done` of an operation, with the values of the outputs not `kept` replaced by :data:`RELEASED`.
+
+    :param kept:
+        the root names of the outputs to return, or None for all
+    """
+    outputs = done.outputs
+    if kept is None or not outputs:
+        return done
+    outputs = {
+        k: v if is_pure_sfx(k) or _root_key(k) in kept else RELEASED
+        for k, v in outputs.items()
+    }
+    return _Done(outputs, done.error, done.elapsed)
+
+
+def plan_to_dask(
+    plan,
+    named_inputs: Mapping,
+    *,
+    solid: str = "dask",
+    callbacks=None,
+    fail_fast: bool = False,
+) -> Dict[str, Any]:
+    """
+    Translate the operations of a `plan` into a :term:`dask graph`.
+
+    :param plan:
+        the :class:`.ExecutionPlan` to translate (evictions are left to dask)
+    :param named_inputs:
+        the input values, stored under :data:`INPUTS_KEY`
+    :param solid:
+        the :attr:`.Solution.solid` for logs & :term:`callbacks`
+    :param callbacks:
+        the :term:`callbacks` of the operations (called in the dask workers)
+    :param fail_fast:
+        if true, the 1st operation failing (unless :term:`endured`) cancels
+        the tasks not started yet (only those in the same process)
+    :return:
+        a dask graph (a plain dict), with a task for each operation (keyed by its name)
+        returning its outputs, wrapped in a future-like object
+        (see :func:`execute_dask()`)
+
+    **Example:**
+
+        >>> from graphtik import compose, operation, sfx
+        >>> pipe = compose(
+        ...     "dasking",
+        ...     operation(len, "counting", needs="a", provides=["n", sfx("counted")]),
+        ...     operation(str, "printing", needs=["n", sfx("counted")], provides="s"),
+        ... )
+        >>> graph = plan_to_dask(pipe.compile("a"), {"a": "abc"})
+        >>> sorted(graph)
+        ['counting', 'graphtik-inputs', 'printing']
+        >>> graph["printing"][-2:]
+        ('graphtik-inputs', 'counting')
+    """
+    graph: Dict[str, Any] = {INPUTS_KEY: dict(named_inputs)}
+    fail_fast = _FailFast(is_endure_operations()) if fail_fast else None
+    ## The ops providing each value or sideffect, in step order.
+    producers: Dict[str, List] = {}
+    for op in yield_ops(plan.steps):
+        providers = {up for n in op.needs for up in producers.get(_dep_root(n), ())}
+        upstream = [up.name for up in yield_ops(plan.steps) if up in providers]
+        sfx_providers = tuple(
+            tuple(upstream.index(up.name) for up in producers[_dep_root(n)])
+            for n in op.needs
+            if is_pure_sfx(n) and not is_optional(n) and _dep_root(n) in producers
+        )
+        graph[op.name] = (
+            _compute_op,
+            op,
+            solid,
+            callbacks,
+            sfx_providers,
+            fail_fast,
+            INPUTS_KEY,
+            *upstream,
+        )
+        for n in op.provides:
+            producers.setdefault(_dep_root(n), []).append(op)
+
+    return graph
+
+
+def _get_scheduler(scheduler) -> Callable:
+    import dask.base
+    import dask.threaded
+
+    return dask.base.get_scheduler(scheduler=scheduler) or dask.threaded.get
+
+
+def execute_dask(
+    plan,
+    named_inputs: Mapping,
+    outputs: Items = None,
+    *,
+    scheduler: Union[str, Any] = None,
+    name: str = "",
+    callbacks=None,
+    solution_class=None,
+    layered_solution=None,
+    **get_kw,
+) -> Solution:
+    """
+    Run a `plan` on a dask scheduler, and replay the results into a regular :class:`.Solution`.
+
+    Operations are translated with :func:`plan_to_dask()`, so that
+    :term:`optional <optionals>` needs, :term:`sideffects`, :term:`alias`\\es
+    and :term:`jsonp` dependencies behave as in :meth:`.ExecutionPlan.execute()`
+    (failed ops cancel their dependents, raising unless :term:`endured`),
+    but all ops run in dask, regardless of their :term:`parallel` flags.
+
+    Dask is asked just for a small "outcome" task per operation, carrying
+    its status and only the outputs asked, so that dask releases the rest
+    values as soon as their consumers complete, as :term:`eviction`\\s would.
+
+    .. Note::
+        Unlike :meth:`.ExecutionPlan.execute()`, the outcomes are replayed
+        into the solution after dask has finished, and an operation failing
+        (unless endured) cancels only the tasks not yet started in the same process
+        (with the threaded & sync schedulers), while other processes
+        (e.g. ``"processes"`` or distributed schedulers) run the rest branches
+        to completion before the error is raised.
+
+    :param scheduler:
+        ``"threads"``, ``"processes"``, ``"sync"``, or a ``distributed.Client``
+        (e.g. on a ``LocalCluster``), as accepted by ``dask.compute()``;
+        if None, the one configured in dask (default: ``"threads"``)
+    :param get_kw:
+        passed to the scheduler's ``get()``
+    :return:
+        the solution, like :meth:`.ExecutionPlan.execute()` (any other kwargs
+        are those of that method)
+
+    :raises ValueError:
+        for an unknown `scheduler` (from dask), or the errors of :meth:`.ExecutionPlan.execute()`
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+        >>> pipe = compose(
+        ...     "dasking",
+        ...     operation(max, "maxing", needs=["a", "b"], provides="c"),
+        ...     operation(str, "printing", needs="c", provides="s"),
+        ... )
+        >>> sol = execute_dask(pipe.compile(["a", "b"]), {"a": 1, "b": 2})  # doctest: +SKIP
+        >>> sol                                                            # doctest: +SKIP
+        {'a': 1, 'b': 2, 'c': 2, 's': '2'}
+    """
+    get = _get_scheduler(scheduler)
+    plan.validate(named_inputs, outputs)
+    dag = plan.dag
+    evict = plan.asked_outs and not is_skip_evictions()
+    if solution_class is None:
+        solution_class = Solution
+    solution = solution_class(
+        plan,
+        (
+            {k: v for k, v in named_inputs.items() if k in dag.nodes}
+            if evict
+            else named_inputs
+        ),
+        callbacks,
+        is_layered=layered_solution,
+    )
+    if solution._unresolved:
+        for op in yield_ops(plan.steps):
+            solution._resolve_inputs(op)
+    log.info(
+        "=== (%s) Executing pipeline(%s) on dask, on inputs%s, according to %s...",
+        solution.solid,
+        name,
+        list(solution),
+        plan,
+    )
+
+    graph = plan_to_dask(
+        plan,
+        dict(solution),
+        solid=solution.solid,
+        callbacks=solution.callbacks,
+        fail_fast=True,
+    )
+    ## Outputs not asked are evicted anyway, when replayed.
+    kept = (
+        {_root_key(dep_stripped(o)) for o in plan.provides} if evict else None
+    )
+    names = [op.name for op in yield_ops(plan.steps)]
+    keys = [(OUTCOME_KEY, n) for n in names]
+    graph.update((k, (_outcome, n, kept)) for k, n in zip(keys, names))
+    results = dict(zip(names, get(graph, keys, **get_kw)))
+
+    ## Replay in step order, to cancel, reschedule & evict
+    #  as the sequential executor does.
+    for step in plan.steps:
+        if isinstance(step, str):
+            if step in solution:
+                del solution[step]
+            continue
+
+        done = results[step.name]
+        if step in solution.canceled or done.canceled:
+            continue
+        solution.elapsed_ms[step] = time.time() - done.elapsed
+        plan._handle_task(done, step, solution)
+
+    return solution
@@ -0,0 +1,543 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+A :term:`distributed execution` pool, sending tasks to worker processes over TCP.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.distributed import *
+    >>> __name__ = "graphtik.distributed"
+"""
+import itertools as itt
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from contextvars import copy_context
+from multiprocessing.connection import AuthenticationError, Client, Listener
+from typing import Dict, List, Tuple, Union
+
+from .workers import (
+    ValueHandle,
+    _add_callbacks,
+    _dumps,
+    _FutureResult,
+    _is_storable,
+    _loads,
+    pull_handles,
+)
+
+log = logging.getLogger(__name__)
+
+#: The environment variable with the secret shared by the coordinator & its workers
+#: (arbitrary bytes given hex-encoded, prefixed with ``hex:``).
+AUTHKEY_ENVVAR = "GRAPHTIK_AUTHKEY"
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """
+    Split a ``[<host>]:<port>`` `address` (host defaults to ``127.0.0.1``).
+
+    :raises ValueError:
+        if no port
+    """
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"Expected a `[<host>]:<port>` address, got: {address!r}")
+    return host or "127.0.0.1", int(port)
+
+
+def _authkey(authkey: Union[str, bytes, None]) -> bytes:
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENVVAR)
+        if not authkey:
+            raise ValueError(f"No `authkey` given, nor in ${AUTHKEY_ENVVAR}!")
+    if isinstance(authkey, str):
+        if authkey.startswith("hex:"):
+            return bytes.fromhex(authkey[4:])
+        return authkey.encode()
+    return authkey
+
+
+def _local_host(remote: Tuple[str, int]) -> str:
+    """The IP of the interface reaching the `remote` address (no packets sent)."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.connect(remote)
+        return sock.getsockname()[0]
+
+
+class _Peers:
+    """Fetch values from the data-servers of the workers owning them."""
+
+    def __init__(self, authkey: bytes):
+        self.authkey = authkey
+        self._conns = {}
+        #: A lock per peer, so fetches from different peers overlap.
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, handle: ValueHandle):
+        owner = handle.owner
+        with self._lock:
+            lock = self._locks.get(owner)
+            if lock is None:
+                lock = self._locks[owner] = threading.Lock()
+        with lock:
+            conn = self._conns.get(owner)
+            if conn is None:
+                conn = self._conns[owner] = Client(
+                    parse_address(owner), authkey=self.authkey
+                )
+            try:
+                conn.send(handle.name)
+                ok, value = conn.recv()
+            except (EOFError, OSError):
+                # Reconnect on the next fetch.
+                del self._conns[owner]
+                conn.close()
+                raise
+        if not ok:
+            raise KeyError(f"Value of {handle} gone from its worker!")
+        return value
+
+    def close(self):
+        with self._lock:
+            conns = list(self._conns.values())
+            self._conns.clear()
+        for conn in conns:
+            conn.close()
+
+
+class Worker:
+    """
+    A process computing the tasks sent by a :class:`Cluster`, keeping their outputs.
+
+    Outputs are kept in :attr:`store`, returning just :class:`.ValueHandle`\\s,
+    and served to the other workers (or the coordinator) fetching them
+    peer-to-peer, from a data-server listening on :attr:`address`.
+
+    Launch it with ``python -m graphtik worker <coordinator-address>``
+    (see :func:`run_worker()`).
+    """
+
+    def __init__(self, coordinator: str, authkey=None, *, host: str = None):
+        """
+        :param coordinator:
+            the ``<host>:<port>`` of the :class:`Cluster`
+        :param authkey:
+            the secret shared with the cluster (default: ``$GRAPHTIK_AUTHKEY``)
+        :param host:
+            the interface for the data-server (default: the one reaching the coordinator)
+        """
+        self.authkey = _authkey(authkey)
+        coordinator = parse_address(coordinator)
+        if host is None:
+            host = _local_host(coordinator)
+        #: The values produced here, by name.
+        self.store: Dict[str, object] = {}
+        self._ids = itt.count()
+        self.data_server = Listener((host, 0), authkey=self.authkey)
+        #: The ``<host>:<port>`` of the data-server.
+        self.address = "%s:%s" % self.data_server.address
+        self.peers = _Peers(self.authkey)
+        self.conn = Client(coordinator, authkey=self.authkey)
+
+    def __repr__(self):
+        return f"Worker({self.address!r}, stored={len(self.store)})"
+
+    def _serve_data(self):
+        while True:
+            try:
+                conn = self.data_server.accept()
+            except AuthenticationError as ex:
+                log.warning("%s: rejected peer due to: %s", self, ex)
+                continue
+            except OSError:
+                return  # closed
+            threading.Thread(target=self._serve_peer, args=(conn,), daemon=True).start()
+
+    def _serve_peer(self, conn):
+        try:
+            while True:
+                name = conn.recv()
+                if name in self.store:
+                    conn.send((True, self.store[name]))
+                else:
+                    conn.send((False, None))
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _fetch(self, handle: ValueHandle):
+        if handle.owner == self.address:
+            return self.store[handle.name]
+        return self.peers.fetch(handle)
+
+    def _store(self, value, solid: str) -> ValueHandle:
+        from .partition import estimate_size
+
+        name = f"{os.getpid()}-{next(self._ids)}"
+        self.store[name] = value
+        return ValueHandle(name, self.address, estimate_size(value), solid)
+
+    def compute(self, task: Union["_OpTask", bytes]) -> dict:
+        """Compute an operation `task`, fetching its input handles, and storing its outputs."""
+        from .execution import _OpTask, _root_key
+
+        if isinstance(task, bytes):
+            import dill
+
+            task = dill.loads(task)
+        needed = {_root_key(n) for n in task.op.needs}
+        inputs = {
+            k: self._fetch(v) if k in needed and isinstance(v, ValueHandle) else v
+            for k, v in task.sol.items()
+        }
+        # A new task, not to compare its `result` with the `UNSET` of another process.
+        task = _OpTask(task.op, inputs, task.solid, task.callbacks)
+        outputs = copy_context().run(task)
+
+        if not isinstance(outputs, dict):
+            return outputs
+        return {
+            k: self._store(v, task.solid) if _is_storable(k) else v
+            for k, v in outputs.items()
+        }
+
+    def _reply(self, task_id, call):
+        try:
+            reply = ("done", task_id, call())
+        except Exception as ex:
+            vars(ex).pop("jetsam", None)  # big & maybe unpicklable
+            reply = ("error", task_id, ex)
+        try:
+            self.conn.send(reply)
+        except Exception as ex:
+            self.conn.send(
+                ("error", task_id, RuntimeError(f"Cannot return {reply[2]!r}: {ex}"))
+            )
+
+    def run(self):
+        """Serve the coordinator until it stops this worker, or disconnects."""
+        threading.Thread(target=self._serve_data, daemon=True).start()
+        self.conn.send((self.address, os.getpid()))
+        log.info("%s: connected.", self)
+        try:
+            while True:
+                msg = self.conn.recv()
+                kind = msg[0]
+                if kind == "op":
+                    _, task_id, payload = msg
+                    self._reply(task_id, lambda: self.compute(_loads(payload)))
+                elif kind == "call":
+                    _, task_id, payload = msg
+                    self._reply(task_id, lambda: _call(*_loads(payload)))
+                elif kind == "release":
+                    for name in msg[1]:
+                        self.store.pop(name, None)
+                elif kind == "stop":
+                    break
+        except (EOFError, OSError) as ex:
+            log.warning("%s: coordinator disconnected due to: %r", self, ex)
+        finally:
+            self.conn.close()
+            self.data_server.close()
+            self.peers.close()
+
+
+def _call(fn, args, kwds):
+    return fn(*args, **kwds)
+
+
+def run_worker(coordinator: str, *, host: str = None):
+    """Connect a :class:`Worker` to the `coordinator` and serve it (authkey from ``$GRAPHTIK_AUTHKEY``)."""
+    Worker(coordinator, host=host).run()
+
+
+class _RemoteWorker:
+    """The coordinator's end of a :class:`Worker`."""
+
+    def __init__(self, conn, address: str, pid: int):
+        self.conn = conn
+        self.address = address
+        self.pid = pid
+        #: The futures of the tasks sent, by task-id.
+        self.pending: Dict[int, Future] = {}
+        self.send_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"RemoteWorker({self.address!r}, pid={self.pid}, pending={len(self.pending)})"
+
+
+class Cluster:
+    """
+    An :term:`execution pool` coordinating :class:`Worker` processes connected over TCP.
+
+    Operation tasks are sent to the least busy worker along with the
+    :class:`.ValueHandle`\\s of their inputs, which the workers fetch
+    peer-to-peer, so values never pass through the coordinator,
+    unless asked (see :term:`object store`).
+
+    Workers may run on other hosts (``python -m graphtik worker <address>``,
+    with the same ``$GRAPHTIK_AUTHKEY``), or be spawned on localhost
+    with :meth:`spawn_local()`.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+        >>> from graphtik.config import execution_pool_plugged
+
+        >>> pipe = compose(
+        ...     "distributed",
+        ...     operation(max, "maxing", needs=["a", "b"], provides="c", parallel=True),
+        ... )
+        >>> with Cluster() as cluster, execution_pool_plugged(cluster):  # doctest: +SKIP
+        ...     cluster.spawn_local(2)
+        ...     pipe.compute({"a": 1, "b": 2}, "c")
+        {'c': 2}
+    """
+
+    def __init__(self, address: str = "127.0.0.1:0", *, authkey=None):
+        """
+        :param address:
+            the ``[<host>]:<port>`` to listen for workers (port 0 picks a free one)
+        :param authkey:
+            the secret shared with the workers (default: ``$GRAPHTIK_AUTHKEY``,
+            or a random one, for :meth:`spawn_local()` workers)
+        """
+        import secrets
+
+        if authkey is None:
+            authkey = os.environ.get(AUTHKEY_ENVVAR) or secrets.token_hex(16)
+        self.authkey = _authkey(authkey)
+        self.listener = Listener(parse_address(address), authkey=self.authkey)
+        #: The ``<host>:<port>`` for the workers to connect.
+        self.address = "%s:%s" % self.listener.address
+        self._cond = threading.Condition()
+        self._workers: List[_RemoteWorker] = []
+        self._task_ids = itt.count()
+        #: The handles of values kept in the workers, by :attr:`.Solution.solid`.
+        self._owned: Dict[str, List[ValueHandle]] = {}
+        self._peers = _Peers(self.authkey)
+        self._procs: List[subprocess.Popen] = []
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def __repr__(self):
+        return f"Cluster({self.address!r}, workers={len(self._workers)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exinfo):
+        self.terminate()
+
+    @property
+    def _processes(self) -> int:
+        """The number of workers, read by :class:`.Runtime`."""
+        return len(self._workers) or 1
+
+    @property
+    def workers(self) -> List[str]:
+        """The data-server addresses of the connected workers."""
+        return [w.address for w in self._workers]
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError as ex:
+                log.warning("%s: rejected worker due to: %s", self, ex)
+                continue
+            except OSError:
+                return  # closed
+            if self._closed:
+                conn.close()
+                return
+            # Handshake in the worker's thread, not to block other workers.
+            threading.Thread(target=self._receive, args=(conn,), daemon=True).start()
+
+    def _receive(self, conn):
+        try:
+            address, pid = conn.recv()
+        except (EOFError, OSError) as ex:
+            log.warning("%s: worker disconnected before handshake due to: %r", self, ex)
+            conn.close()
+            return
+        worker = _RemoteWorker(conn, address, pid)
+        with self._cond:
+            self._workers.append(worker)
+            self._cond.notify_all()
+        log.info("%s: %s connected.", self, worker)
+
+        try:
+            while True:
+                kind, task_id, value = conn.recv()
+                with self._cond:
+                    # Missing if failed already, e.g. while sending it.
+                    future = worker.pending.pop(task_id, None)
+                if future is None:
+                    log.debug("%s: dropped late reply of task %s.", self, task_id)
+                elif kind == "done":
+                    self._record(value)
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        except (EOFError, OSError) as ex:
+            with self._cond:
+                if worker in self._workers:
+                    self._workers.remove(worker)
+                lost = list(worker.pending.values())
+                worker.pending.clear()
+            if not self._closed:
+                log.warning("%s: lost %s due to: %r", self, worker, ex)
+            for future in lost:
+                future.set_exception(ConnectionError(f"Lost {worker}: {ex!r}"))
+
+    def _record(self, outputs):
+        if isinstance(outputs, dict):
+            handles = [v for v in outputs.values() if isinstance(v, ValueHandle)]
+            if handles:
+                with self._cond:
+                    for h in handles:
+                        self._owned.setdefault(h.solid, []).append(h)
+
+    def wait_workers(self, n: int, timeout: float = None):
+        """
+        Block until at least `n` workers have connected.
+
+        :raises TimeoutError:
+            if not connected in `timeout` secs
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._workers) >= n, timeout):
+                raise TimeoutError(
+                    f"Only x{len(self._workers)} of x{n} workers connected to {self}!"
+                )
+
+    def spawn_local(self, n: int, timeout: float = 30) -> List[subprocess.Popen]:
+        """Launch `n` :class:`Worker` processes on localhost, and wait them to connect."""
+        env = {
+            **os.environ,
+            AUTHKEY_ENVVAR: f"hex:{self.authkey.hex()}",
+            # Import the same modules as here (e.g. for the operation functions).
+            "PYTHONPATH": os.pathsep.join(p for p in sys.path if p),
+        }
+        nworkers = len(self._workers)
+        procs = [
+            subprocess.Popen(
+                [sys.executable, "-m", "graphtik", "worker", self.address], env=env
+            )
+            for _ in range(n)
+        ]
+        self._procs.extend(procs)
+        self.wait_workers(nworkers + n, timeout)
+
+        return procs
+
+    def apply_async(self, fn, args=(), kwds=None, callback=None, error_callback=None):
+        """Send the task to the least busy worker."""
+        from .execution import _do_task
+
+        ## Pickle here (with :mod:`dill`, if installed), to scream early,
+        #  and for workers to report unpickling errors per task.
+        task_id = next(self._task_ids)
+        if fn is _do_task and len(args) == 1:
+            msg = ("op", task_id, _dumps(args[0]))
+        else:
+            msg = ("call", task_id, _dumps((fn, args, kwds or {})))
+        future = Future()
+        _add_callbacks(future, callback, error_callback)
+        with self._cond:
+            if not self._workers:
+                raise RuntimeError(f"No workers connected to {self}!")
+            worker = min(self._workers, key=lambda w: len(w.pending))
+            worker.pending[task_id] = future
+        try:
+            with worker.send_lock:
+                worker.conn.send(msg)
+        except Exception:
+            with self._cond:
+                worker.pending.pop(task_id, None)
+            raise
+
+        return _FutureResult(future)
+
+    def pull(self, values, keys=None) -> dict:
+        """
+        Copy `values` with the handles (of `keys`, if given) fetched from their workers.
+
+        Called by the executor for tasks running in this process.
+        """
+        return {
+            k: (
+                self._peers.fetch(v)
+                if isinstance(v, ValueHandle) and (keys is None or k in keys)
+                else v
+            )
+            for k, v in values.items()
+        }
+
+    def collect(self, solution):
+        """
+        Fetch the handles left in the `solution`, and release its values from the workers.
+
+        Called by the executor when the solution completes (or fails).
+        """
+        pull_handles(solution, self._peers.fetch)
+        with self._cond:
+            handles = self._owned.pop(solution.solid, ())
+            workers = {w.address: w for w in self._workers}
+        by_owner = {}
+        for h in handles:
+            by_owner.setdefault(h.owner, []).append(h.name)
+        for owner, names in by_owner.items():
+            worker = workers.get(owner)
+            if worker:
+                ## Called in the executor's `finally`: a lost worker (its values gone)
+                #  must not mask the error of the solution, nor fail a successful one.
+                try:
+                    with worker.send_lock:
+                        worker.conn.send(("release", names))
+                except (EOFError, OSError) as ex:
+                    log.warning("%s: cannot release values in %s: %r", self, worker, ex)
+
+    def close(self):
+        """Stop the workers, and stop listening."""
+        self._closed = True
+        with self._cond:
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(("stop",))
+            except OSError:
+                pass
+        try:
+            # Wake up the blocked `accept()`.
+            Client(self.listener.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self.listener.close()
+        self._peers.close()
+
+    def terminate(self):
+        self.close()
+        self.join()
+
+    def join(self, timeout: float = 10):
+        """Wait the :meth:`spawn_local()`\\ed workers to exit (killing them after `timeout`)."""
+        for proc in self._procs:
+            try:
+                proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        self._procs.clear()
@@ -1,15 +1,27 @@
 # Copyright 2016, Yahoo Inc.
 # Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
 """:term:`execute` the :term:`plan` to derrive the :term:`solution`."""
+import copy
 import logging
 import random
 import sys
 import time
+import weakref
 from collections import ChainMap, abc, defaultdict, namedtuple
 from contextvars import ContextVar, copy_context
 from functools import partial
-from itertools import chain
-from typing import Any, Callable, Collection, List, Mapping, Optional, Tuple, Union
+from itertools import chain, count
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import networkx as nx
 from boltons.setutils import IndexedSet as iset
@@ -47,6 +59,7 @@ from .modifier import (
     get_accessor,
     get_jsonp,
     is_sfx,
+    jsonp_ize,
 )
 from .planning import (
     OpMap,
@@ -55,6 +68,8 @@ from .planning import (
     yield_node_names,
     yield_ops,
 )
+from .sources import lazy
+from .streams import Stream, stream_producer
 
 #: If this logger is *eventually* DEBUG-enabled,
 #: the string-representation of network-objects (network, plan, solution)
@@ -62,10 +77,33 @@ from .planning import (
 log = logging.getLogger(__name__)
 
 
+#: Unique :attr:`.Solution.solid`\\s (in this process), starting randomly,
+#: to tell apart the logs of separate runs, and to key the state of pools per solution.
+_solids = count(random.randint(0, 2 ** 16))
+
+
 def _isDebugLogging():
     return log.isEnabledFor(logging.DEBUG)
 
 
+def _root_key(dep) -> str:
+    """The 1st step of a :term:`jsonp` `dep`, or the `dep` itself."""
+    parts = get_jsonp(dep)
+    if parts:
+        parts = [p for p in parts if p]
+        if parts:
+            return parts[0]
+    return dep
+
+
+def _op_kind(op) -> Optional[str]:
+    """The :term:`execution kind` of `op`, from its attribute or its ``node_props``."""
+    kind = getattr(op, "kind", None)
+    if kind is None:
+        kind = (getattr(op, "node_props", None) or {}).get("kind")
+    return kind
+
+
 def _update_outputs_grouped_by_accessor(op_layer, outputs: Mapping):
     """
     Mass update values on the :term:`solution layer` for the given `op`
@@ -126,19 +164,48 @@ class Solution(ChainMap, Plottable):
     #: due to upstream failures.
     canceled: OpMap = {}
     elapsed_ms = {}
-    #: A unique identifier to distinguish separate flows in execution logs.
+    #: A unique identifier to distinguish separate flows in execution logs,
+    #: and to key the state kept per solution by the :term:`execution pool`\\s.
     solid: str
-    # FIXME: SPURIOUS dag reversals on multi-threaded runs (see below next assertion)!
-    #: Cloned from `plan` will be modified, by removing the downstream edges of:
+    #: Shared with `plan` (or :meth:`fork`\ed solutions) until cloned, to be modified
+    #: by removing the downstream edges of:
     #:
     #: - any partial outputs not provided, or
     #: - all `provides` of failed operations.
     dag: nx.DiGraph
+    #: true while :attr:`dag` is shared, and must be cloned before modified
+    _dag_shared = False
     #: the plan that produced this solution
     plan = "ExecutionPlan"
     # optimization for the expensive :attr:`.overwrites` dictionary
     _overwrites_cache = None
 
+    #: Memoized :term:`fingerprint`\\s, as ``{id(value): (ref-to-value, digest)}``.
+    _fingerprints: dict
+    #: When true, values are computed on demand, when first read
+    #: (see :meth:`.ExecutionPlan.execute()` & :meth:`get_many()`).
+    is_lazy = False
+    #: Set while executing the operations of a :attr:`is_lazy` solution,
+    #: not to compute any more on missing keys.
+    _lazy_computing = False
+    #: The maps shared with :meth:`fork`\\ed solutions, as ``{id(map): map}``,
+    #: never to be modified again.
+    _frozen: dict
+    #: The "tombstones" of (root) keys evicted from :attr:`_frozen` maps,
+    #: as ``{key: frozenset(id(map), ...)}`` (later maps are not affected).
+    _evicted: dict
+    #: The :term:`sink`\\s of outputs, as ``{dep: callable}``
+    #: (see :meth:`.ExecutionPlan.execute()`).
+    sinks: Mapping[str, Callable]
+    #: The references returned by :attr:`sinks` for the values they received,
+    #: as ``{dep: ref}``; they replace the values, once no more needed downstream.
+    sunk: dict
+    #: The ``{dep: producing-op}`` of values sunk, but still needed downstream.
+    _sunk_pending: dict
+    #: true if any values are :class:`.lazy` inputs or :class:`.Stream`\\s,
+    #: to be resolved before operations consume them (see :meth:`_resolve_inputs()`)
+    _unresolved = False
+
     def __init__(
         self,
         plan,
@@ -164,7 +231,14 @@ class Solution(ChainMap, Plottable):
         self.canceled = {}
         self.broken = {}
         self.elapsed_ms = {}
-        self.solid = "%X" % random.randint(0, 2 ** 16)
+        self.solid = "%X" % next(_solids)
+        self._fingerprints = {}
+        self._frozen = {}
+        self._evicted = {}
+        self.sinks = {}
+        self.sunk = {}
+        self._sunk_pending = {}
+        self._unresolved = any(isinstance(v, lazy) for v in input_values.values())
 
         ## Cache context-var flags.
         #
@@ -173,16 +247,28 @@ class Solution(ChainMap, Plottable):
         self.is_parallel = is_parallel_tasks()
         self.is_marshal = is_marshal_tasks()
 
-        # FIXME: SPURIOUS dag reversals on multi-threaded runs (see below next assertion)!
-        self.dag = plan.dag.copy()
-        # assert next(iter(dag.edges))[0] == next(iter(plan.dag.edges))[0]:
+        ## The plan's dag is frozen, and shared by all solutions (and threads)
+        #  until cloned by :meth:`_own_dag()`, before modifying it.
+        self.dag = plan.dag
+        self._dag_shared = True
 
     def copy(self):
-        """Deep-copy user's `input_data` and pass the rest into a new Solution. """
-        named_inputs = dict(self.maps[-1])
+        """
+        A new Solution with copies of all the maps & execution-status of this one.
+
+        Each map is copied without the keys evicted from it (see :meth:`fork`),
+        so the clone starts with the same effective values, sharing nothing
+        mutable with this solution.
+        """
+        evicted = self._evicted
+        copies = {
+            id(m): {k: v for k, v in m.items() if id(m) not in evicted.get(k, ())}
+            for m in self.maps
+        }
+        maps = [copies[id(m)] for m in self.maps]
         clone = type(self)(
             self.plan,
-            named_inputs,
+            maps[-1],
             self.callbacks,
             # Specially handled below bc user's `layered_solution` arg is lost.
             is_layered=self.is_layered,
@@ -192,7 +278,8 @@ class Solution(ChainMap, Plottable):
         #
         props = (
             "is_layered is_endurance is_reschedule is_parallel is_marshal dag"
-            " _initial_inputs executed canceled broken elapsed_ms"
+            " is_lazy _unresolved _initial_inputs canceled broken elapsed_ms"
+            " sinks sunk _sunk_pending"
         ).split()
 
         for p in props:
@@ -200,16 +287,149 @@ class Solution(ChainMap, Plottable):
             if isinstance(val, dict):
                 val = dict(val)
             setattr(clone, p, val)
+        self._dag_shared = clone._dag_shared = True
 
-        ## Replicate layer setup in constructor, here
+        ## Point executed ops to the copied layers (or outputs, if non-layered).
         #
-        executed_ok = reversed(self.layers) if self.is_layered else ()
-        clone.maps = [*executed_ok, named_inputs]
+        clone.executed = {
+            op: (copies[id(v)] if id(v) in copies else dict(v))
+            if isinstance(v, dict)
+            else v
+            for op, v in self.executed.items()
+        }
+        clone.maps = maps
+        if self.is_layered:
+            clone._initial_inputs = maps[-1]
 
         return clone
 
     __copy__ = copy
 
+    def fork(self) -> "Solution":
+        """
+        A new solution sharing all current values & layers with this one, copy-on-write.
+
+        The maps of values existing so far are shared (structural sharing)
+        and become immutable for both solutions: any new values are written into
+        new maps, evictions are recorded as "tombstones", and :term:`jsonp`
+        documents get their containers copied along the path before modified.
+        Only the (small) execution-status dictionaries are copied.
+
+        Use it to continue execution from a common (expensive) prefix
+        in separate "what-if" branches, e.g. with :meth:`recompute()`.
+
+        **Example:**
+
+            >>> from graphtik import compose, operation
+            >>> from operator import add, mul
+
+            >>> pipe = compose(
+            ...     "pipe",
+            ...     operation(mul, "mul", needs=["a", "b"], provides="ab"),
+            ...     operation(add, "add", needs=["ab", "c"], provides="abc"),
+            ... )
+            >>> sol = pipe.compute({"a": 1, "b": 2, "c": 3})
+            >>> branch = sol.fork().recompute({"c": 10})
+            >>> branch
+            {'a': 1, 'b': 2, 'ab': 2, 'c': 10, 'abc': 12}
+            >>> sol
+            {'a': 1, 'b': 2, 'c': 3, 'ab': 2, 'abc': 5}
+        """
+        frozen = self._frozen
+        frozen.update((id(m), m) for m in self.maps)
+        if not self.is_layered:
+            # Just the keys of the outputs, but popped on evictions.
+            frozen.update((id(m), m) for m in self.layers)
+        self._dag_shared = True
+
+        child = type(self).__new__(type(self))
+        child.__dict__.update(self.__dict__)
+        child.maps = list(self.maps)
+        for p in (
+            "executed canceled broken elapsed_ms _fingerprints _frozen sunk _sunk_pending"
+        ).split():
+            setattr(child, p, dict(getattr(self, p)))
+        child._evicted = dict(self._evicted)
+        if not self.is_layered:
+            child._initial_inputs = dict(self._initial_inputs)
+        child._overwrites_cache = None
+        child.solid = "%X" % next(_solids)
+        log.info("... (%s) forked solution(%s).", child.solid, self.solid)
+
+        return child
+
+    def _own_dag(self) -> nx.DiGraph:
+        """Clone the :attr:`dag` if it is still shared, before modifying it."""
+        if self._dag_shared:
+            self.dag = self.dag.copy()
+            self._dag_shared = False
+        return self.dag
+
+    def _writable_map(self) -> dict:
+        """The 1st map, unless shared by :meth:`fork`, in which case, prepend a new one."""
+        m = self.maps[0]
+        if id(m) in self._frozen:
+            m = {}
+            self.maps.insert(0, m)
+        return m
+
+    def _visible_maps(self, key) -> List[dict]:
+        """All maps, except the frozen ones that `key` has been evicted from."""
+        hidden = self._evicted and self._evicted.get(_root_key(key))
+        if hidden:
+            return [m for m in self.maps if id(m) not in hidden]
+        return self.maps
+
+    def _cow_doc(self, key) -> None:
+        """
+        Copy the containers along a :term:`jsonp` `key` found in a frozen map, ...
+
+        into a writable one, before modifying them (structural sharing).
+        """
+        parts = get_jsonp(key)
+        parts = parts and [p for p in parts if p]
+        if not parts:
+            return
+
+        root = parts[0]
+        for m in self._visible_maps(root):
+            if root in m:
+                break
+        else:
+            return
+        if id(m) not in self._frozen:
+            return
+
+        doc = copy.copy(m[root])
+        self._writable_map()[root] = doc
+        for part in parts[1:-1]:
+            if isinstance(doc, abc.MutableMapping) and part in doc:
+                pass
+            elif isinstance(doc, abc.MutableSequence) and part.isdigit():
+                part = int(part)
+                if part >= len(doc):
+                    break
+            else:
+                break
+            doc[part] = doc = copy.copy(doc[part])
+
+    def __iter__(self):
+        if not self._evicted:
+            return super().__iter__()
+
+        evicted = self._evicted
+        d = {}
+        for m in reversed(self.maps):
+            mid = id(m)
+            d.update(dict.fromkeys(k for k in m if mid not in evicted.get(k, ())))
+        return iter(d)
+
+    def __len__(self):
+        return len(list(iter(self))) if self._evicted else super().__len__()
+
+    def __bool__(self):
+        return any(True for _ in self) if self._evicted else super().__bool__()
+
     def __repr__(self):
         if is_debug():
             return self.debugstr()
@@ -241,12 +461,21 @@ class Solution(ChainMap, Plottable):
         """
         canceled, _sorted_nodes = unsatisfied_operations(
             dag,
-            [
-                i
-                for i in self
-                # don't send canceled SFXs as Inputs.
-                if not is_sfx(i) or self.get(i, True)
-            ],
+            chain(
+                (
+                    i
+                    for i in self
+                    # don't send canceled SFXs as Inputs.
+                    if not is_sfx(i) or self.get(i, True)
+                ),
+                # Outputs produced, even if evicted (e.g. while recomputing).
+                (
+                    out
+                    for op, layer in self.executed.items()
+                    if not isinstance(layer, Exception)
+                    for out in dag.adj[op]
+                ),
+            ),
         )
         # Minus executed, bc partial-out op might not have any provides left.
         newly_canceled = canceled.keys() - self.canceled.keys() - self.executed.keys()
@@ -264,38 +493,124 @@ class Solution(ChainMap, Plottable):
 
     def __contains__(self, key):
         acc = acc_contains(key)
-        return any(acc(m, key) for m in self.maps)
+        return any(acc(m, key) for m in self._visible_maps(key))
 
     def __getitem__(self, key):
         acc = acc_getitem(key)
-        for mapping in self.maps:
+        for mapping in self._visible_maps(key):
             try:
                 return acc(mapping, key)
             except KeyError:
                 pass
         return self.__missing__(key)
 
+    def __missing__(self, key):
+        if self.is_lazy and not self._lazy_computing:
+            self._compute_lazily((key,))
+            acc = acc_getitem(key)
+            for mapping in self._visible_maps(key):
+                try:
+                    return acc(mapping, key)
+                except KeyError:
+                    pass
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if self.is_lazy:
+            try:
+                return self[key]
+            except KeyError:
+                return default
+        return super().get(key, default)
+
+    def get_many(self, keys: Items) -> list:
+        """
+        Get the values of many `keys`, computing at once any missing in a :attr:`is_lazy` solution.
+
+        :raises KeyError:
+            for the 1st of `keys` not in solution (i.e. not computed)
+        """
+        keys = aslist(keys, "keys")
+        if self.is_lazy:
+            self._compute_lazily(keys)
+        return [self[k] for k in keys]
+
+    def _compute_lazily(self, deps) -> None:
+        """Execute the operations upstream of `deps` not executed yet (the "ancestor cone")."""
+        plan = self.plan
+        dag = plan.dag
+        missing = [d for d in map(jsonp_ize, deps) if d in dag and d not in self]
+        if not missing:
+            return
+
+        cone = set()
+        for dep in yield_chaindocs(dag, missing):
+            cone.update(nx.ancestors(dag, dep))
+        done = self.executed.keys() | self.canceled.keys()
+        steps = [op for op in yield_ops(plan.steps) if op in cone and op not in done]
+        if not steps:
+            return
+
+        log.info(
+            "=== (%s) Lazily executing x%i ops%s for missing%s...",
+            self.solid,
+            len(steps),
+            [op.name for op in steps],
+            missing,
+        )
+        self._lazy_computing = True
+        try:
+            plan._pick_executor(steps)(self, steps)
+        finally:
+            self._lazy_computing = False
+
     def __setitem__(self, key, val):
         self._overwrites_cache = None
-        super().__setitem__(key, val)
+        if get_jsonp(key):
+            # Parent docs mutated in place, their digests are stale.
+            self._fingerprints.clear()
+        self._writable_map()[key] = val
 
     def __delitem__(self, key):
         self._overwrites_cache = None
 
+        frozen = self._frozen
+        is_jsonp = get_jsonp(key)
+        if frozen and is_jsonp:
+            self._cow_doc(key)
+
         acc = acc_contains(key)
-        matches = [m for m in self.maps if acc(m, key)]
+        matches = [m for m in self._visible_maps(key) if acc(m, key)]
         if not matches:
             raise KeyError(key)
 
+        ## Forget digests of evicted values.
+        #
+        if is_jsonp:
+            self._fingerprints.clear()
+        else:
+            for m in matches:
+                self._fingerprints.pop(id(m[key]), None)
+
         acc = acc_delitem(key)
         for m in matches:
-            acc(m, key)
+            if id(m) in frozen:
+                if not is_jsonp:
+                    hidden = self._evicted.get(key, frozenset())
+                    self._evicted[key] = hidden | {id(m)}
+            else:
+                acc(m, key)
 
         ## Delete it from extra places when non-layered.
         #
         if not self.is_layered:
-            for m in self.layers:
-                m.pop(key, None)
+            executed = self.executed
+            for op, m in executed.items():
+                if isinstance(m, dict) and key in m:
+                    if id(m) in frozen:
+                        executed[op] = {k: v for k, v in m.items() if k != key}
+                    else:
+                        del m[key]
 
             self._initial_inputs.pop(key, None)
 
@@ -310,11 +625,19 @@ class Solution(ChainMap, Plottable):
             self.maps.insert(0, op_layer)
             self.executed[op] = op_layer
         else:
-            op_layer = self.maps[-1]
+            # Unless forked, the 1st map is also the last, for `input_names`.
+            op_layer = self._writable_map()
             # Update just they keys, the values are in `input_names`.
             self.executed[op] = outputs
 
         if outputs:
+            jsonps = [k for k in outputs if get_jsonp(k)]
+            if jsonps:
+                # Parent docs mutated in place, their digests are stale.
+                self._fingerprints.clear()
+                if self._frozen and not self.is_layered:
+                    for k in jsonps:
+                        self._cow_doc(k)
             _update_outputs_grouped_by_accessor(op_layer, outputs)
 
     def operation_executed(self, op, outputs):
@@ -360,12 +683,17 @@ class Solution(ChainMap, Plottable):
             )
 
             if outs_to_break:
-                dag = self.dag
+                dag = self._own_dag()
                 dag.remove_edges_from((op, out) for out in outs_to_break)
                 self._reschedule(dag, "rescheduled", op)
                 # list used by `check_if_incomplete()`
                 self.broken[op] = outs_to_break
 
+        if getattr(op, "streaming", None):
+            self._unresolved = True
+        if self.sinks:
+            self._sink_outputs(op, outputs)
+
     def operation_failed(self, op, ex):
         """
         Invoked once per operation, with its results.
@@ -373,16 +701,322 @@ class Solution(ChainMap, Plottable):
         It will update :attr:`executed` with the operation status and
         the :attr:`canceled` with the unsatisfied ops downstream of `op`.
         """
-        dag = self.dag
+        dag = self._own_dag()
         self.executed[op] = ex
         dag.remove_edges_from(tuple(dag.out_edges(op)))
         self._reschedule(dag, "failure of", op)
+        if self._sunk_pending:
+            # Canceled consumers may release sunk values.
+            self._drop_sunk()
+
+    def _resolve_inputs(self, op) -> None:
+        """
+        Load any :class:`.lazy` inputs needed by `op`, and share any :class:`.Stream`\\s ...
+
+        needed also by other operations, or kept as outputs.
+        """
+        plan = self.plan
+        for dep in op.needs:
+            key = _root_key(dep)
+            for m in self._visible_maps(key):
+                if key in m:
+                    break
+            else:
+                continue
+
+            val = m[key]
+            if isinstance(val, lazy):
+                log.debug("... (%s) loading lazy input '%s' for %s.", self.solid, key, op)
+                self._fingerprints.pop(id(val), None)
+                val = val()
+                if id(m) in self._frozen:
+                    m = self._writable_map()
+                else:
+                    self._overwrites_cache = None
+                m[key] = val
+            if (
+                isinstance(val, Stream)
+                and not val.shared
+                and (
+                    # All values kept, when no outputs asked.
+                    not plan.asked_outs
+                    or key in plan.provides
+                    or sum(1 for _ in yield_ops(self.dag.adj[key])) > 1
+                )
+            ):
+                log.debug("... (%s) sharing stream '%s' for %s.", self.solid, key, op)
+                val.share()
+
+    def _materialize_streams(self) -> None:
+        """Replace the :class:`.Stream`\\s left in the solution with their concatenated chunks."""
+        for key in list(self):
+            for m in self._visible_maps(key):
+                if key in m:
+                    break
+            else:
+                continue
+
+            val = m[key]
+            # Skip streams already iterated, e.g. from :meth:`.Pipeline.compute_iter()`.
+            if isinstance(val, Stream) and (val.shared or not val.consumed):
+                log.debug("... (%s) materializing stream '%s'.", self.solid, key)
+                val = val.materialize()
+                if id(m) in self._frozen:
+                    m = self._writable_map()
+                else:
+                    self._overwrites_cache = None
+                m[key] = val
+
+    def _sink_outputs(self, op, outputs: Mapping) -> None:
+        """Hand any `outputs` with :attr:`sinks` to them, and drop the values consumed."""
+        for dep, val in outputs.items():
+            sink = self.sinks.get(dep)
+            if sink:
+                self.sunk[dep] = sink(dep, val)
+                self._sunk_pending[dep] = op
+                log.debug("... (%s) sunk '%s' from %s.", self.solid, dep, op)
+        self._drop_sunk()
+
+    def _drop_sunk(self) -> None:
+        """Replace sunk values with their :attr:`sunk` refs, when no consumers remain."""
+        dag, executed, canceled = self.dag, self.executed, self.canceled
+        for dep, op in list(self._sunk_pending.items()):
+            consumers = yield_ops(dag.adj[dep]) if dep in dag else ()
+            if any(c not in executed and c not in canceled for c in consumers):
+                continue
+
+            del self._sunk_pending[dep]
+            ref = self.sunk[dep]
+            if dep in self:
+                del self[dep]
+            layer = executed.get(op)
+            if (
+                self.is_layered
+                and isinstance(layer, dict)
+                and id(layer) not in self._frozen
+            ):
+                _update_outputs_grouped_by_accessor(layer, {dep: ref})
+            else:
+                self[dep] = ref
+                if isinstance(layer, dict) and id(layer) not in self._frozen:
+                    # Restore the key of non-layered outputs, popped above.
+                    layer[dep] = ref
 
     def is_failed(self, op):
         """returns Non(not executed), False(ok), Exception(failed)"""
         exe = self.executed.get(op)
         return exe and isinstance(exe, Exception) and exe
 
+    def fingerprint(self, dep) -> str:
+        """
+        The :term:`fingerprint` of the value of `dep`, memoized per value identity.
+
+        Asking again for the same value object (e.g. through another dependency)
+        returns the cached digest, unless that value has been evicted meanwhile
+        (or :term:`jsonp` documents were modified).
+
+        :raises KeyError:
+            if `dep` not in solution
+
+        .. seealso:: :func:`.fingerprint.fingerprint()`
+        """
+        from .fingerprint import fingerprint
+
+        val = self[dep]
+        cache = self._fingerprints
+        hit = cache.get(id(val))
+        if hit and hit[0]() is val:
+            return hit[1]
+
+        digest = fingerprint(val)
+        try:
+            ref = weakref.ref(val)
+        except TypeError:
+            # Keep unreferenceable values alive, not to have their ids recycled.
+            ref = lambda: val  # noqa: E731
+        cache[id(val)] = (ref, digest)
+
+        return digest
+
+    def _forget_operation(self, op) -> None:
+        """Drop any status, outputs & broken edges of an `op` about to re-execute."""
+        layer = self.executed.pop(op, None)
+        self.canceled.pop(op, None)
+        self.broken.pop(op, None)
+        self.elapsed_ms.pop(op, None)
+
+        if isinstance(layer, dict):
+            if self.is_layered:
+                self.maps = [m for m in self.maps if m is not layer]
+                for k in layer:
+                    self._fingerprints.pop(id(layer[k]), None)
+            else:
+                for k in list(layer):
+                    if k in self:
+                        del self[k]
+
+        ## Restore any edges removed due to failures or partial outputs.
+        #
+        missing_edges = [
+            (op, out, attrs)
+            for _, out, attrs in self.plan.dag.out_edges(op, data=True)
+            if not self.dag.has_edge(op, out)
+        ]
+        if missing_edges:
+            self._own_dag().add_edges_from(missing_edges)
+
+    def recompute(self, changed_inputs: Mapping) -> "Solution":
+        """
+        Replace some values, and re-:term:`execute` just the operations downstream of them.
+
+        All values *strictly downstream* of `changed_inputs` are invalidated,
+        and only the operations producing them are executed again (in :term:`steps` order),
+        in place, reusing all other values already in the solution.
+        Producers of any values :term:`evicted <eviction>` still needed by those operations
+        are re-executed too, but their outputs evicted again in the end,
+        so that the solution ends up with the same keys as before.
+
+        :param changed_inputs:
+            a mapping with the new values of some :term:`dependency`\\s in the
+            plan's dag; intermediate values override those computed.
+        :return:
+            this same solution, for chaining calls
+
+        :raises ValueError:
+            *Unknown dependencies to recompute...*
+                if some of `changed_inputs` are not in the plan's dag.
+            *Cannot recompute...*
+                if some (evicted) inputs are missing to re-execute the operations.
+
+        .. Note::
+            After a :meth:`.Pipeline.compute()` with specific `outputs`, :term:`eviction`\\s
+            have dropped all other values, including the given inputs, so most
+            recomputations fail with *Cannot recompute...*;  to recompute incrementally,
+            compute with ``outputs=None``, or with evictions skipped, like this::
+
+                with evictions_skipped(True):
+                    sol = pipe.compute(inputs, outputs)
+
+        .. seealso:: :term:`recompute` with a new plan, in :meth:`.Pipeline.compute()`.
+
+        **Example:**
+
+            >>> from graphtik import compose, operation
+            >>> from operator import add, mul
+
+            >>> pipe = compose(
+            ...     "pipe",
+            ...     operation(mul, "mul", needs=["a", "b"], provides="ab"),
+            ...     operation(add, "add", needs=["c", "d"], provides="cd"),
+            ...     operation(add, "total", needs=["ab", "cd"], provides="sum"),
+            ... )
+            >>> sol = pipe.compute({"a": 1, "b": 2, "c": 3, "d": 4})
+            >>> sol.recompute({"a": 10})
+            {'a': 10, 'b': 2, 'c': 3, 'd': 4, 'cd': 7, 'ab': 20, 'sum': 27}
+            >>> [op.name for op in sol.executed]  # "add" not re-executed
+            ['add', 'mul', 'total']
+        """
+        plan = self.plan
+        dag = plan.dag
+        changed_inputs = {jsonp_ize(k): v for k, v in changed_inputs.items()}
+
+        unknown = iset(changed_inputs) - dag.nodes
+        if unknown:
+            raise ValueError(
+                f"Unknown dependencies to recompute: {list(unknown)}\n  {plan}"
+            )
+
+        ## Collect operations strictly downstream (subdocs & superdocs included),
+        #  except those still blocked by untouched failures upstream.
+        #
+        downstream = set()
+        for dep in yield_chaindocs(dag, changed_inputs):
+            downstream.update(nx.descendants(dag, dep))
+        stuck = {
+            op
+            for op in chain(self.canceled, self.executed)
+            if op not in downstream
+            and (op in self.canceled or isinstance(self.executed[op], Exception))
+        }
+        ops = {
+            op
+            for op in yield_ops(downstream)
+            if op in dag and not stuck.intersection(nx.ancestors(dag, op))
+        }
+
+        ## Add producers of needs evicted meanwhile.
+        #
+        missing = []
+        todo = list(ops)
+        while todo:
+            op = todo.pop()
+            for need, _, optional in dag.in_edges(op, data="optional"):
+                if need in changed_inputs or need in self:
+                    continue
+                producers = set(dag.predecessors(need))
+                if producers & ops:
+                    continue
+                producers = {p for p in producers if p not in stuck}
+                if producers:
+                    ops.update(producers)
+                    todo.extend(producers)
+                elif not optional and not is_sfx(need):
+                    missing.append(need)
+        if missing:
+            raise ValueError(
+                f"Cannot recompute, missing (evicted?) inputs: {list(iset(missing))}"
+                f"\n  +--changed: {list(changed_inputs)}\n  +--solution: {list(self)}"
+                f"\n  {plan}"
+                "\n  (hint: compute with `evictions_skipped(True)` to recompute later)"
+            )
+
+        steps = [op for op in plan.steps if op in ops]
+        keys_before = set(self)
+        log.info(
+            "=== (%s) Recomputing x%i ops%s due to changed%s...",
+            self.solid,
+            len(steps),
+            [op.name for op in steps],
+            list(changed_inputs),
+        )
+
+        for op in steps:
+            self._forget_operation(op)
+        self._overwrites_cache = None
+        for dep, val in changed_inputs.items():
+            if dep in self:
+                self._fingerprints.pop(id(self[dep]), None)
+            ## Replace in inputs, dropping any values computed for it.
+            #
+            if id(self.maps[-1]) in self._frozen:
+                # Forked, keep shared inputs intact.
+                if dep in self:
+                    del self[dep]
+                acc_setitem(dep)(self._writable_map(), dep, val)
+            else:
+                contains, delitem = acc_contains(dep), acc_delitem(dep)
+                for m in self.maps[:-1]:
+                    if contains(m, dep):
+                        delitem(m, dep)
+                acc_setitem(dep)(self.maps[-1], dep, val)
+            if not self.is_layered:
+                self._initial_inputs[dep] = val
+        if any(get_jsonp(dep) for dep in changed_inputs):
+            self._fingerprints.clear()
+
+        if self.is_lazy:
+            # Recomputed when read again.
+            return self
+        plan._execute_sequential_method(self, steps)
+
+        ## Re-evict what had been evicted before.
+        #
+        for dep in plan.steps:
+            if isinstance(dep, str) and dep in self and dep not in keys_before:
+                del self[dep]
+
+        return self
+
     @property
     def overwrites(self) -> Mapping[Any, List]:
         """
@@ -399,9 +1033,12 @@ class Solution(ChainMap, Plottable):
             maps = self.maps
         else:
             maps = [*reversed(self.layers), self._initial_inputs]
+        evicted = self._evicted
         dd = defaultdict(list)
         for d in maps:
             for k, v in d.items():
+                if id(d) in evicted.get(k, ()):
+                    continue
                 dd[k].append(v)
 
         return {
@@ -524,6 +1161,35 @@ class _OpTask:
         return f"OpTask({self.op}, sol_keys={sol_items!r})"
 
 
+class _GatherTask:
+    """Mimic a future gathering the element-tasks of an operation that :attr:`~.FnOp.fans_out`."""
+
+    __slots__ = ("op", "futures", "pull")
+
+    def __init__(self, op, futures, pull=None):
+        self.op = op
+        self.futures = futures
+        #: the :meth:`.StorePool.pull()` of an :term:`object store` pool, if any
+        self.pull = pull
+
+    def get(self):
+        results = []
+        for fut in self.futures:
+            outputs = fut.get()
+            if isinstance(outputs, bytes):
+                import dill
+
+                outputs = dill.loads(outputs)
+            if self.pull:
+                outputs = self.pull(outputs)
+            results.append(outputs)
+
+        return self.op.gather_results(results)
+
+    def __repr__(self):
+        return f"GatherTask({self.op}, x{len(self.futures)} elements)"
+
+
 #: (unstable API) Populated with the :class:`_OpTask` for the currently executing operation.
 #: It does not work for (deprecated) :term:`parallel execution`.
 #:
@@ -532,6 +1198,15 @@ class _OpTask:
 task_context: ContextVar[_OpTask] = ContextVar("task_context")
 
 
+def _exhausted(gen):
+    """Run a generator till its end, and return its return-value."""
+    try:
+        while True:
+            next(gen)
+    except StopIteration as ex:
+        return ex.value
+
+
 def _do_task(task):
     """
     Un-dill the *simpler* :class:`_OpTask` & Dill the results, to pass through pool-processes.
@@ -702,7 +1377,15 @@ class ExecutionPlan(
         #  (s)ee https://stackoverflow.com/a/24673524/548792)
         #  and handle results in this thread, to evade Solution locks.
         #
+        if solution._unresolved:
+            for op in operations:
+                solution._resolve_inputs(op)
         input_values = dict(solution)
+        # Pools with an :term:`object store` return handles, resolved here
+        # only for tasks running in this process.
+        pull = getattr(pool, "pull", None)
+        # Pools like :class:`.HybridPool` pick a pool for each op.
+        route = getattr(pool, "route", None)
 
         def prep_task(op):
             ok = False
@@ -710,17 +1393,40 @@ class ExecutionPlan(
                 # Mark start time here, to include also marshalling overhead.
                 solution.elapsed_ms[op] = time.time()
 
-                task = _OpTask(op, input_values, solution.solid, solution.callbacks)
-                if first_solid(global_marshal, getattr(op, "marshalled", None)):
-                    task = task.marshalled()
-
-                if first_solid(global_parallel, getattr(op, "parallel", None)):
-                    if not pool:
+                is_marshal = first_solid(global_marshal, getattr(op, "marshalled", None))
+                ## :term:`execution kind`\s imply `parallel` only for routing pools,
+                #  inline ones never.
+                kind = _op_kind(op)
+                is_parallel = kind != "inline" and first_solid(
+                    global_parallel, getattr(op, "parallel", None), bool(kind and route)
+                )
+                op_pool = pool
+                if route and is_parallel:
+                    op_pool = route(op)
+                    if op_pool is None:
                         raise RuntimeError(
-                            "With `parallel` you must `set_execution_pool().`"
+                            f"No pool for execution kind {kind!r} of {op.name!r},"
+                            f" nor a default one, in {pool}!"
                         )
+                if is_parallel and not op_pool:
+                    raise RuntimeError("With `parallel` you must `set_execution_pool().`")
+
+                if is_parallel and getattr(op, "fans_out", None):
+                    ok = True
+                    return self._fan_out(
+                        op, input_values, solution.solid, op_pool, is_marshal
+                    )
+
+                values = input_values
+                # Unless submitted to the object store, resolve its handles here.
+                if pull and not (is_parallel and hasattr(op_pool, "pull")):
+                    values = pull(values, [_root_key(n) for n in op.needs])
+                task = _OpTask(op, values, solution.solid, solution.callbacks)
+                if is_marshal:
+                    task = task.marshalled()
 
-                    task = pool.apply_async(_do_task, (task,))
+                if is_parallel:
+                    task = op_pool.apply_async(_do_task, (task,))
                 elif isinstance(task, bytes):
                     # Marshalled (but non-parallel) tasks still need `_do_task()`.
                     task = partial(_do_task, task)
@@ -737,6 +1443,31 @@ class ExecutionPlan(
 
         return [prep_task(op) for op in operations]
 
+    def _fan_out(self, op, input_values: dict, solid, pool, is_marshal) -> "_GatherTask":
+        """
+        Submit each element of a :term:`map operation` (or :term:`partitioned operation`) ...
+
+        as a separate pool task.
+        """
+        needed = {_root_key(n) for n in op.needs}
+        input_values = {k: v for k, v in input_values.items() if k in needed}
+        pull = getattr(pool, "pull", None)
+        if pull:
+            input_values = pull(input_values)
+        element_op = op.element_op()
+
+        futures = []
+        for inputs in op.iter_element_inputs(input_values):
+            task = _OpTask(element_op, dict(inputs), solid)
+            if is_marshal:
+                task = task.marshalled()
+            futures.append(pool.apply_async(_do_task, (task,)))
+        log.debug(
+            "+++ (%s) Fanned-out x%i tasks of %s.", solid, len(futures), op.name
+        )
+
+        return _GatherTask(op, futures, pull)
+
     def _handle_task(self, future, op, solution) -> None:
         """Un-dill parallel task results (if marshalled), and update solution / handle failure."""
 
@@ -766,8 +1497,16 @@ class ExecutionPlan(
                 "... (%s) op(%s) completed in %sms.", solution.solid, op.name, elapsed
             )
         except Exception as ex:
-            is_endured = first_solid(
-                solution.is_endurance, getattr(op, "endured", None)
+            ## Errors of upstream streams surface in their consumers.
+            producer = stream_producer(ex)
+            if producer not in solution.executed or producer is op:
+                producer = None
+            culprit = f"{producer.name}) into op({op.name}" if producer else op.name
+            # A chunk failing in its producer is endured, if either op endures it.
+            is_endured = any(
+                first_solid(solution.is_endurance, getattr(o, "endured", None))
+                for o in (op, producer)
+                if o
             )
             elapsed = elapsed_ms(op)
             loglevel = logging.WARNING if is_endured else logging.ERROR
@@ -777,7 +1516,7 @@ class ExecutionPlan(
                 "\n  x%i ops executed so far: %s",
                 solution.solid,
                 "*Enduring* " if is_endured else "",
-                op.name,
+                culprit,
                 elapsed,
                 type(ex).__name__,
                 ex,
@@ -787,6 +1526,12 @@ class ExecutionPlan(
             )
 
             if is_endured:
+                if producer:
+                    # Drop the broken stream, not to be materialized.
+                    for dep in producer.provides:
+                        if dep in solution:
+                            del solution[dep]
+                    solution.operation_failed(producer, ex)
                 solution.operation_failed(op, ex)
             else:
                 from .jetsam import save_jetsam
@@ -796,7 +1541,33 @@ class ExecutionPlan(
                 save_jetsam(ex, locals(), "solution", task="future", plan="self")
                 raise
 
-    def _execute_thread_pool_barrier_method(self, solution: Solution):
+    def _pick_executor(self, steps, iterate=False) -> Callable:
+        """
+        Parallel executor if any of the `steps` (or all) are :term:`parallel`.
+
+        :param iterate:
+            if true, return the generator variant of the executor,
+            yielding each operation as soon as it has been handled
+        """
+        routed = hasattr(get_execution_pool(), "route")
+        in_parallel = is_parallel_tasks() or any(
+            getattr(op, "parallel", None)
+            or (routed and _op_kind(op) not in (None, "inline"))
+            for op in yield_ops(steps)
+        )
+        if iterate:
+            return (
+                self._iter_thread_pool_barrier_method
+                if in_parallel
+                else self._iter_sequential_method
+            )
+        return (
+            self._execute_thread_pool_barrier_method
+            if in_parallel
+            else self._execute_sequential_method
+        )
+
+    def _execute_thread_pool_barrier_method(self, solution: Solution, steps=None):
         """
         (deprecated)  This method runs the graph using a parallel pool of thread executors.
         You may achieve lower total latency if your graph is sufficiently
@@ -804,102 +1575,133 @@ class ExecutionPlan(
 
         :param solution:
             must contain the input values only, gets modified
+        :param steps:
+            if given, execute just these instead of the plan's :attr:`steps`
         """
+        for _ in self._iter_thread_pool_barrier_method(solution, steps):
+            pass
+
+    def _iter_thread_pool_barrier_method(self, solution: Solution, steps=None):
+        """Like :meth:`_execute_thread_pool_barrier_method()` yielding each op handled."""
+        if steps is None:
+            steps = self.steps
         pool = get_execution_pool()  # cache pool
         parallel = solution.is_parallel
         marshal = solution.is_marshal
 
-        # with each loop iteration, we determine a set of operations that can be
-        # scheduled, then schedule them onto a thread pool, then collect their
-        # results onto a memory solution for use upon the next iteration.
-        while True:
-            ## Note: do not check abort in between task handling (at the bottom),
-            #  or it would ignore solution updates from already executed tasks.
-            self._check_if_aborted(solution)
-
-            # the upnext list contains a list of operations for scheduling
-            # in the current round of scheduling
-            upnext = []
-            # TODO: optimization: start batches from previous last op).
-            for node in self.steps:
-                ## Determines if a Operation is ready to be scheduled for execution
-                #  based on what has already been executed.
-                if (
-                    isinstance(node, Operation)
-                    and node not in solution.executed
-                    and set(yield_ops(nx.ancestors(self.dag, node))).issubset(
-                        solution.executed
-                    )
-                ):
-                    if node not in solution.canceled:
-                        upnext.append(node)
-                elif isinstance(node, str):
-                    # Only evict if all successors for the data node
-                    # have been executed.
+        try:
+            ## Let pools place operations on their workers.
+            place = getattr(pool, "place", None)
+            if place:
+                place(self)
+
+            # with each loop iteration, we determine a set of operations that can be
+            # scheduled, then schedule them onto a thread pool, then collect their
+            # results onto a memory solution for use upon the next iteration.
+            while True:
+                ## Note: do not check abort in between task handling (at the bottom),
+                #  or it would ignore solution updates from already executed tasks.
+                self._check_if_aborted(solution)
+
+                # the upnext list contains a list of operations for scheduling
+                # in the current round of scheduling
+                upnext = []
+                # TODO: optimization: start batches from previous last op).
+                for node in steps:
+                    ## Determines if a Operation is ready to be scheduled for execution
+                    #  based on what has already been executed.
                     if (
-                        # An optional need may not have a value in the solution.
-                        node in solution
-                        and (
-                            # The 2nd eviction branch for unused provides.
-                            node not in self.dag.nodes
-                            # Scan node's successors in `broken_dag`, not to block
-                            # an op waiting for calced data already given as input.
-                            or set(self.dag.successors(node)).issubset(
-                                solution.executed
-                            )
+                        isinstance(node, Operation)
+                        and node not in solution.executed
+                        and set(yield_ops(nx.ancestors(self.dag, node))).issubset(
+                            solution.executed
                         )
                     ):
-                        if log.isEnabledFor(logging.INFO):
-                            log.info(
-                                "... (%s) evicting '%s' from solution%s.",
-                                solution.solid,
-                                node,
-                                list(solution),
+                        if node not in solution.canceled:
+                            upnext.append(node)
+                    elif isinstance(node, str):
+                        # Only evict if all successors for the data node
+                        # have been executed.
+                        if (
+                            # An optional need may not have a value in the solution.
+                            node in solution
+                            and (
+                                # The 2nd eviction branch for unused provides.
+                                node not in self.dag.nodes
+                                # Scan node's successors in `broken_dag`, not to block
+                                # an op waiting for calced data already given as input.
+                                or set(self.dag.successors(node)).issubset(
+                                    solution.executed
+                                )
                             )
-                        del solution[node]
+                        ):
+                            if log.isEnabledFor(logging.INFO):
+                                log.info(
+                                    "... (%s) evicting '%s' from solution%s.",
+                                    solution.solid,
+                                    node,
+                                    list(solution),
+                                )
+                            del solution[node]
+
+                # stop if no nodes left to schedule, exit out of the loop
+                if not upnext:
+                    ## Re-check evictions and assume all ops executed.
+                    #  Sequenced executor has no such problem bc exhausts steps.
+                    #
+                    #  TODO: evictions for parallel are wasting loops.
+                    #
+                    for node in steps:
+                        if isinstance(node, str) and node in solution:
+                            del solution[node]
+                    break
+
+                if _isDebugLogging():
+                    log.debug(
+                        "+++ (%s) Parallel batch%s on solution%s.",
+                        solution.solid,
+                        list(op.name for op in upnext),
+                        list(solution),
+                    )
+                tasks = self._prepare_tasks(upnext, solution, pool, parallel, marshal)
 
-            # stop if no nodes left to schedule, exit out of the loop
-            if not upnext:
-                ## Re-check evictions and assume all ops executed.
-                #  Sequenced executor has no such problem bc exhausts steps.
-                #
-                #  TODO: evictions for parallel are wasting loops.
+                ## Handle results.
                 #
-                for node in self.steps:
-                    if isinstance(node, str) and node in solution:
-                        del solution[node]
-                break
-
-            if _isDebugLogging():
-                log.debug(
-                    "+++ (%s) Parallel batch%s on solution%s.",
-                    solution.solid,
-                    list(op.name for op in upnext),
-                    list(solution),
-                )
-            tasks = self._prepare_tasks(upnext, solution, pool, parallel, marshal)
-
-            ## Handle results.
-            #
-            for op, task in zip(upnext, tasks):
-                self._handle_task(task, op, solution)
+                for op, task in zip(upnext, tasks):
+                    self._handle_task(task, op, solution)
+                    yield op
+        finally:
+            ## Pull values left in the solution from an :term:`object store`.
+            collect = getattr(pool, "collect", None)
+            if collect:
+                collect(solution)
 
-    def _execute_sequential_method(self, solution: Solution):
+    def _execute_sequential_method(self, solution: Solution, steps=None):
         """
         This method runs the graph one operation at a time in a single thread
 
         :param solution:
             must contain the input values only, gets modified
+        :param steps:
+            if given, execute just these instead of the plan's :attr:`steps`
         """
-        for step in self.steps:
+        for _ in self._iter_sequential_method(solution, steps):
+            pass
+
+    def _iter_sequential_method(self, solution: Solution, steps=None):
+        """Like :meth:`_execute_sequential_method()` yielding each op handled."""
+        for step in self.steps if steps is None else steps:
             self._check_if_aborted(solution)
 
             if isinstance(step, Operation):
                 if step in solution.canceled:
                     continue
 
+                if solution._unresolved:
+                    solution._resolve_inputs(step)
                 task = _OpTask(step, solution, solution.solid, solution.callbacks)
                 self._handle_task(task, step, solution)
+                yield step
 
             elif isinstance(step, str):
                 # Cache value may be missing if it is optional.
@@ -924,6 +1726,8 @@ class ExecutionPlan(
         callbacks: Callable[[OpCb], None] = None,
         solution_class=None,
         layered_solution=None,
+        lazy=False,
+        sinks: Mapping[str, Any] = None,
     ) -> Solution:
         """
         :param named_inputs:
@@ -952,6 +1756,15 @@ class ExecutionPlan(
               regardless of any *jsonp* dependencies.
             - If ``None``, layers are used only if there are NO :term:`jsonp` dependencies
               in the network.
+        :param lazy:
+            when true, return the solution without executing anything,
+            and execute the operations needed for each value when first read
+            (see :attr:`.Solution.is_lazy`); :term:`eviction`\\s are skipped.
+        :param sinks:
+            a mapping of outputs --> :term:`sink`\\s, either callables or file paths
+            (see :func:`.as_sink()`), to receive each value as soon as it is produced;
+            once no more needed downstream, the value in the solution is replaced
+            by whatever the sink returned (see :attr:`.Solution.sunk`).
 
         :return:
             The :term:`solution` which contains the results of each operation executed
@@ -965,26 +1778,197 @@ class ExecutionPlan(
             *Unreachable outputs...*
                 if net cannot produce asked `outputs`.
         """
+        return _exhausted(
+            self._execute_iter(
+                named_inputs,
+                outputs,
+                name=name,
+                callbacks=callbacks,
+                solution_class=solution_class,
+                layered_solution=layered_solution,
+                lazy=lazy,
+                sinks=sinks,
+            )
+        )
+
+    def partition(self, nparts: int, **kw) -> Mapping[str, int]:
+        """
+        Assign operations to `nparts` worker processes, for :term:`locality-aware placement`.
+
+        Keyword-args & errors are those of :func:`.partition.partition_plan()`.
+        """
+        from .partition import partition_plan
+
+        return partition_plan(self, nparts, **kw)
+
+    def to_dask(self, named_inputs: Mapping, **kw) -> Mapping[str, Any]:
+        """
+        Translate this plan into a :term:`dask graph`, with a task per operation.
+
+        Keyword-args are those of :func:`.daskexec.plan_to_dask()`;
+        run it with :func:`.daskexec.execute_dask()` to get back a :class:`.Solution`.
+        """
+        from .daskexec import plan_to_dask
+
+        return plan_to_dask(self, named_inputs, **kw)
+
+    def prioritized_steps(self, outputs: Items) -> Tuple:
+        """
+        Re-order :attr:`steps` so that operations needed for the 1st `outputs` run first.
+
+        Operations upstream of each of the `outputs` (in their given order) are
+        moved ahead of the rest (preserving their relative order), and each
+        :term:`eviction` instruction is moved right after the last operation
+        producing or consuming that data.
+
+        :param outputs:
+            the outputs by priority (those not in :attr:`provides` are ignored)
+        """
+        dag = self.dag
+        steps = self.steps
+        ops = list(yield_ops(steps))
+        done = set()
+        ordered = []
+        for out in astuple(outputs, "outputs", allowed_types=abc.Collection):
+            if out not in dag:
+                continue
+            cone = set(nx.ancestors(dag, out))
+            for op in ops:
+                if op in cone and op not in done:
+                    done.add(op)
+                    ordered.append(op)
+        ordered.extend(op for op in ops if op not in done)
+
+        ## Re-insert evictions after their last user.
+        #
+        position = {op: i for i, op in enumerate(ordered)}
+        evictions = defaultdict(list)
+        last_op = None
+        for step in steps:
+            if isinstance(step, Operation):
+                last_op = step
+            elif isinstance(step, str):
+                users = [
+                    n
+                    for d in yield_chaindocs(dag, (step,))
+                    for n in chain(dag.predecessors(d), dag.successors(d))
+                ]
+                # Not before the op it was following, e.g. for unused provides.
+                users.append(last_op)
+                idx = max((position[n] for n in users if n in position), default=-1)
+                evictions[idx].append(step)
+
+        reordered = [*evictions.get(-1, ())]
+        for i, op in enumerate(ordered):
+            reordered.append(op)
+            reordered.extend(evictions.get(i, ()))
+
+        return tuple(reordered)
+
+    def execute_iter(
+        self,
+        named_inputs,
+        outputs=None,
+        *,
+        name="",
+        callbacks: Callable[[OpCb], None] = None,
+        solution_class=None,
+        layered_solution=None,
+        prioritized=False,
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Like :meth:`execute()` but yield ``(dependency, value)`` as soon as each output is produced.
+
+        :param outputs:
+            the outputs to yield (each one once, when first produced or given),
+            or all :attr:`provides` if None
+        :param prioritized:
+            when true, execute operations in :meth:`prioritized_steps()` order
+            for the given `outputs` (useful only with :term:`sequential` execution)
+        :return:
+            a generator with the solution as its return-value
+            (i.e. ``StopIteration.value``)
+
+        Rest params & errors are the same as :meth:`execute()`.
+        """
+        asked = self.provides if outputs is None else astuple(outputs, "outputs")
+        steps = self.prioritized_steps(asked) if prioritized else self.steps
+        pending = iset(asked)
+
+        gen = self._execute_iter(
+            named_inputs,
+            outputs,
+            name=name,
+            callbacks=callbacks,
+            solution_class=solution_class,
+            layered_solution=layered_solution,
+            steps=steps,
+        )
+        try:
+            solution = next(gen)
+            while True:
+                for dep in [d for d in pending if d in solution]:
+                    pending.remove(dep)
+                    yield dep, solution[dep]
+                next(gen)
+        except StopIteration as ex:
+            return ex.value
+        finally:
+            gen.close()
+
+    def _resolve_sinks(self, sinks: Mapping[str, Any]) -> Mapping[str, Callable]:
+        """Convert :term:`sink` specs into callables, screaming on unknown outputs."""
+        from .sinks import as_sink
+
+        unknown = [d for d in sinks if d not in self.net.data]
+        if unknown:
+            raise ValueError(
+                f"Unknown outputs{unknown} to sink!"
+                f"\n  +--possible outputs: {list(self.net.provides)}"
+            )
+
+        return {dep: as_sink(sink) for dep, sink in sinks.items()}
+
+    def _execute_iter(
+        self,
+        named_inputs,
+        outputs=None,
+        *,
+        name="",
+        callbacks=None,
+        solution_class=None,
+        layered_solution=None,
+        lazy=False,
+        steps=None,
+        sinks=None,
+    ):
+        """
+        The generator behind :meth:`execute()`, yielding 1st the new solution, ...
+
+        and then each operation as soon as it has been handled;
+        its return-value is the solution.
+
+        :param steps:
+            if given, execute these (e.g. re-ordered) instead of :attr:`steps`
+        """
         ok = False
         try:
             self.validate(named_inputs, outputs)
             dag = self.dag  # locals opt
+            if sinks:
+                sinks = self._resolve_sinks(sinks)
+            if steps is None:
+                steps = self.steps
 
             ## Choose a method of execution
             #
-            in_parallel = is_parallel_tasks() or any(
-                getattr(op, "parallel", None) for op in yield_ops(self.steps)
-            )
-            executor = (
-                self._execute_thread_pool_barrier_method
-                if in_parallel
-                else self._execute_sequential_method
-            )
+            executor = self._pick_executor(steps, iterate=True)
+            in_parallel = executor == self._iter_thread_pool_barrier_method
 
             # If certain outputs asked, put relevant-only inputs in solution,
             # otherwise, keep'em all.
             #
-            evict = self.asked_outs and not is_skip_evictions()
+            evict = self.asked_outs and not is_skip_evictions() and not lazy
             # Note: clone and keep original `inputs` in the 1st chained-map.
 
             if solution_class is None:
@@ -998,6 +1982,20 @@ class ExecutionPlan(
                 callbacks,
                 is_layered=layered_solution,
             )
+            if sinks:
+                solution.sinks = sinks
+            if lazy:
+                solution.is_lazy = True
+                log.info(
+                    "=== (%s) Lazy pipeline(%s), on inputs%s, according to %s.",
+                    solution.solid,
+                    name,
+                    list(solution),
+                    self,
+                )
+                ok = True
+                yield solution
+                return solution
 
             log.info(
                 "=== (%s) Executing pipeline(%s)%s%s, on inputs%s, according to %s...",
@@ -1009,9 +2007,11 @@ class ExecutionPlan(
                 self,
             )
 
+            yield solution
             ok2 = False
             try:
-                executor(solution)
+                yield from executor(solution, steps)
+                solution._materialize_streams()
                 ok2 = True
             finally:
                 ## Log cumulative operations elapsed time.
@@ -1043,6 +2043,10 @@ class ExecutionPlan(
 
             ok = True
             return solution
+        except GeneratorExit:
+            # Abandoned iteration is not an error.
+            ok = True
+            raise
         finally:
             if not ok:
                 from .jetsam import save_jetsam
@@ -0,0 +1,237 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Cheap & stable :term:`fingerprint`\\s of :term:`solution` values, to detect changes.
+
+Values are hashed through a registry of *fingerprinters* keyed by type,
+so that big arrays & frames are hashed directly from their memory buffers
+(plus their dtype, shape & index metadata) instead of being pickled.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.fingerprint import *
+    >>> __name__ = "graphtik.fingerprint"
+"""
+
+import hashlib
+import logging
+import pickle
+from collections import abc as cabc
+from operator import itemgetter
+from typing import Any, Callable, Union
+
+log = logging.getLogger(__name__)
+
+#: A fingerprinter receives a value and returns either bytes-like data to feed
+#: the hasher as is, or any other "reduced" value to be fingerprinted recursively.
+Fingerprinter = Callable[[Any], Any]
+
+#: The registry of fingerprinters, keyed by type.
+_fingerprinters = {}
+#: Fingerprinters for types keyed by their ``"<module>.<qualname>"``,
+#: resolved on first use, not to import heavy libraries (e.g. *pandas*) too early.
+_lazy_fingerprinters = {}
+#: Memoize registry lookups per concrete type, invalidated on registrations.
+_resolved = {}
+
+#: The number of bytes of the hex-digests returned.
+digest_size = 16
+
+
+def register_fingerprinter(typ: Union[type, str], fingerprinter: Fingerprinter):
+    """
+    Install a `fingerprinter` for values of `typ` (and its subclasses).
+
+    :param typ:
+        a class, or a string like ``"<module>.<qualname>"`` for classes
+        not to be imported until a value of them is actually met
+    :param fingerprinter:
+        a callable receiving the value and returning either *bytes-like* data
+        (fed to the hasher as is), or any other value to be fingerprinted
+        recursively (e.g. a tuple with the significant state of the object).
+
+    **Example:**
+
+        >>> class Point:
+        ...     def __init__(self, x, y):
+        ...         self.x, self.y = x, y
+
+        >>> register_fingerprinter(Point, lambda p: (p.x, p.y))
+        >>> fingerprint(Point(1, 2)) == fingerprint(Point(1, 2))
+        True
+        >>> fingerprint(Point(1, 2)) == fingerprint(Point(2, 1))
+        False
+    """
+    if not callable(fingerprinter):
+        raise TypeError(f"Expected a callable fingerprinter, got: {fingerprinter!r}")
+    if isinstance(typ, str):
+        _lazy_fingerprinters[typ] = fingerprinter
+    elif isinstance(typ, type):
+        _fingerprinters[typ] = fingerprinter
+    else:
+        raise TypeError(f"Expected a class or a 'module.qualname' string, got: {typ!r}")
+    _resolved.clear()
+
+
+def _get_fingerprinter(cls) -> Fingerprinter:
+    """Search the registry along the MRO of `cls` (``None`` if not found)."""
+    try:
+        return _resolved[cls]
+    except KeyError:
+        pass
+
+    fingerprinter = None
+    for base in cls.__mro__:
+        fingerprinter = _fingerprinters.get(base)
+        if fingerprinter:
+            break
+        fingerprinter = _lazy_fingerprinters.get(
+            f"{base.__module__}.{base.__qualname__}"
+        )
+        if fingerprinter:
+            break
+    _resolved[cls] = fingerprinter
+
+    return fingerprinter
+
+
+def _type_tag(value) -> bytes:
+    cls = type(value)
+    return f"<{cls.__module__}.{cls.__qualname__}>".encode()
+
+
+def _feed(hasher, value) -> None:
+    """Update `hasher` with the fingerprint of `value` (recursively)."""
+    hasher.update(_type_tag(value))
+
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        hasher.update(str(len(value)).encode())
+        hasher.update(value)
+        return
+
+    fingerprinter = _get_fingerprinter(type(value))
+    if fingerprinter:
+        reduced = fingerprinter(value)
+        if isinstance(reduced, (bytes, bytearray, memoryview)):
+            hasher.update(reduced)
+        else:
+            _feed(hasher, reduced)
+    elif isinstance(value, cabc.Mapping):
+        ## Order of keys is irrelevant, sort pairs by the digests of their keys.
+        #
+        hasher.update(str(len(value)).encode())
+        pairs = sorted(
+            ((fingerprint(k), v) for k, v in value.items()), key=itemgetter(0)
+        )
+        for k_digest, v in pairs:
+            hasher.update(k_digest.encode())
+            _feed(hasher, v)
+    elif isinstance(value, (list, tuple)):
+        hasher.update(str(len(value)).encode())
+        for v in value:
+            _feed(hasher, v)
+    elif isinstance(value, (set, frozenset)):
+        hasher.update(str(len(value)).encode())
+        for v_digest in sorted(fingerprint(v) for v in value):
+            hasher.update(v_digest.encode())
+    else:
+        ## Last resort, but still stable for most plain values.
+        #
+        hasher.update(pickle.dumps(value, protocol=4))
+
+
+def fingerprint(value) -> str:
+    """
+    Hash `value` based on its contents, for cheap & stable change detection.
+
+    :return:
+        a hex-digest string, equal for equal values of the same type
+
+    - Strings, numbers & ``None`` are hashed by their representation.
+    - :term:`Hierarchical data <hierarchical data>` (dicts, lists, tuples & sets)
+      are recursed, and dict-keys are sorted (their order is irrelevant).
+    - Numpy arrays & Pandas objects have their buffers hashed directly,
+      along with their dtypes, shape and index metadata.
+    - Other types are handled by any fingerprinter installed with
+      :func:`register_fingerprinter()`, or else, they are pickled.
+
+    **Example:**
+
+        >>> fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+        True
+        >>> fingerprint(1) == fingerprint(1.0)
+        False
+    """
+    hasher = hashlib.blake2b(digest_size=digest_size)
+    _feed(hasher, value)
+
+    return hasher.hexdigest()
+
+
+def _reduce_str(s: str):
+    return s.encode("utf-8", "surrogatepass")
+
+
+def _reduce_scalar(n):
+    return repr(n).encode()
+
+
+def _reduce_ndarray(arr):
+    """The dtype & shape, followed by the raw data of the array (object items recursed)."""
+    import numpy as np
+
+    meta = (arr.dtype.str, arr.shape)
+    if arr.dtype.hasobject:
+        return (meta, arr.tolist())
+
+    if not arr.flags.c_contiguous:
+        arr = np.ascontiguousarray(arr)
+    # Reinterpret as bytes, to hash also 0-dim & zero-sized arrays.
+    data = arr.reshape(-1).view(np.uint8) if arr.size else b""
+
+    return (meta, memoryview(data))
+
+
+def _reduce_pandas_array(values):
+    """Hash object-arrays with pandas (vectorized), the rest with numpy."""
+    import numpy as np
+    import pandas as pd
+
+    values = np.asarray(values)
+    if values.dtype.hasobject:
+        values = pd.util.hash_array(values)
+
+    return values
+
+
+def _reduce_pandas_index(index):
+    return (list(index.names), _reduce_pandas_array(index))
+
+
+def _reduce_series(sr):
+    return (sr.name, str(sr.dtype), sr.index, _reduce_pandas_array(sr))
+
+
+def _reduce_dataframe(df):
+    return (
+        df.shape,
+        df.columns,
+        df.index,
+        [
+            (str(df.dtypes.iat[i]), _reduce_pandas_array(df.iloc[:, i]))
+            for i in range(df.shape[1])
+        ],
+    )
+
+
+register_fingerprinter(str, _reduce_str)
+for _typ in (bool, int, float, complex, type(None), type(...)):
+    register_fingerprinter(_typ, _reduce_scalar)
+register_fingerprinter("numpy.ndarray", _reduce_ndarray)
+register_fingerprinter("numpy.generic", lambda n: _reduce_ndarray(n.__array__()))
+register_fingerprinter("pandas.core.indexes.base.Index", _reduce_pandas_index)
+register_fingerprinter("pandas.core.series.Series", _reduce_series)
+register_fingerprinter("pandas.core.frame.DataFrame", _reduce_dataframe)
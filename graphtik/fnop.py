@@ -12,9 +12,10 @@
 import logging
 import sys
 import textwrap
+from collections import ChainMap
 from collections import abc as cabc
 from functools import update_wrapper, wraps
-from typing import Any, Callable, Collection, List, Mapping, Tuple
+from typing import Any, Callable, Collection, Iterable, List, Mapping, Tuple, Union
 
 from boltons.setutils import IndexedSet as iset
 
@@ -48,6 +49,7 @@ from .modifier import (
     modify,
     optional,
 )
+from .streams import Stream
 
 log = logging.getLogger(__name__)
 
@@ -253,6 +255,19 @@ def _spread_sideffects(
         return deps, deps
 
 
+def _materialized_streams(positional, varargs, kwargs):
+    """Replace any :class:`.Stream` args with their materialized values."""
+
+    def mat(v):
+        return v.materialize() if isinstance(v, Stream) else v
+
+    return (
+        [mat(v) for v in positional],
+        [mat(v) for v in varargs],
+        {k: mat(v) for k, v in kwargs.items()},
+    )
+
+
 class FnOp(Operation):
     """
     An :term:`operation` performing a callable (ie a function, a method, a lambda).
@@ -309,6 +324,10 @@ class FnOp(Operation):
         parallel=None,
         marshalled=None,
         returns_dict=None,
+        streaming=None,
+        partitioned=None,
+        vectorized=None,
+        kind: str = None,
         node_props: Mapping = None,
     ):
         """
@@ -326,6 +345,10 @@ class FnOp(Operation):
             raise TypeError(
                 f"Operation `node_props` must be a dict, was {type(node_props).__name__!r}: {node_props}"
             )
+        if kind is not None and not isinstance(kind, str):
+            raise TypeError(
+                f"Operation `kind` must be a string, was {type(kind).__name__!r}: {kind}"
+            )
 
         if name is None and fn:
             name = func_name(fn, None, mod=0, fqdn=0, human=0, partials=1)
@@ -420,6 +443,23 @@ class FnOp(Operation):
         #:
         #: Can be changed amidst execution by the operation's function.
         self.returns_dict = returns_dict
+        #: If true (or a positive int), it is a :term:`streaming operation`,
+        #: whose *callable* returns (or yields) chunks of its single output,
+        #: handed downstream in a :class:`.Stream` with a bounded queue
+        #: of that many chunks (or :data:`.streams.default_queue_size` if ``True``).
+        self.streaming = streaming
+        #: If a positive int, it is a :term:`partitioned operation`, splitting
+        #: its :mod:`pandas` inputs into that many blocks of rows, computed in parallel
+        #: (when :attr:`parallel`), and its outputs reassembled with :func:`pandas.concat()`.
+        self.partitioned = partitioned
+        #: If true, its *callable* is :term:`vectorized`: when :term:`micro-batching`,
+        #: it receives lists of the values of many requests for each need,
+        #: and must return lists of as many values for each output.
+        self.vectorized = vectorized
+        #: The :term:`execution kind` routing it to a pool of a :class:`.HybridPool`
+        #: (e.g. ``io``, ``cpu``), or ``inline`` to run it in the executor's thread;
+        #: if None, read from a ``kind`` key of :attr:`node_props`.
+        self.kind = kind
         #: Added as-is into NetworkX graph, and you may filter operations by
         #: :meth:`.Pipeline.withset()`.
         #: Also plot-rendering affected if they match `Graphviz` properties,
@@ -453,6 +493,8 @@ class FnOp(Operation):
             *(f"{n}={aslist(d, n)}" for n, d in deps if d),
             f"fn{returns_dict_marker}={fn_name!r}",
         ]
+        if self.kind:
+            items.append(f"kind={self.kind!r}")
         if self.node_props:
             items.append(f"x{len(self.node_props)}props")
 
@@ -463,7 +505,7 @@ class FnOp(Operation):
         parallel = "|" if first_solid(is_parallel_tasks(), self.parallel) else ""
         marshalled = "&" if first_solid(is_marshal_tasks(), self.marshalled) else ""
 
-        return f"FnOp{endured}{resched}{parallel}{marshalled}({', '.join(items)})"
+        return f"{type(self).__name__}{endured}{resched}{parallel}{marshalled}({', '.join(items)})"
 
     @property
     def deps(self) -> Mapping[str, Collection]:
@@ -492,6 +534,10 @@ class FnOp(Operation):
         parallel=...,
         marshalled=...,
         returns_dict=...,
+        streaming=...,
+        partitioned=...,
+        vectorized=...,
+        kind=...,
         node_props: Mapping = ...,
         renamer=None,
     ) -> "FnOp":
@@ -585,7 +631,7 @@ class FnOp(Operation):
         if renamer:
             self._rename_graph_names(kw, renamer)
 
-        return FnOp(**kw)
+        return type(self)(**kw)
 
     def validate_fn_name(self):
         """Call it before enclosing it in a pipeline, or it will fail on compute(). """
@@ -829,6 +875,108 @@ class FnOp(Operation):
 
         return results
 
+    def _as_stream(self, chunks) -> Stream:
+        from .streams import default_queue_size
+
+        if len(self._fn_provides) != 1 or self.returns_dict:
+            raise ValueError(
+                f"Streaming operation must provide a single output, got: {list(self._fn_provides)}"
+                f"\n  {self}"
+            )
+        streaming = self.streaming
+        maxsize = default_queue_size if streaming is True else int(streaming)
+
+        return Stream(chunks, maxsize, producer=self)
+
+    @property
+    def fans_out(self) -> bool:
+        """
+        Whether it splits into many tasks (e.g. when :attr:`partitioned`).
+
+        Such operations provide :meth:`element_op()`, :meth:`iter_element_inputs()`
+        & :meth:`gather_results()` to fan-out when :term:`parallel`.
+        """
+        return bool(self.partitioned)
+
+    def element_op(self) -> "FnOp":
+        """A non-partitioned clone of this op, to compute each block of rows."""
+        return self.withset(name=f"{self.name}[*]", partitioned=None, parallel=None)
+
+    def iter_element_inputs(self, named_inputs) -> Iterable[Mapping]:
+        """Yield the `named_inputs` with :mod:`pandas` needs sliced in blocks of rows."""
+        partitioned = int(self.partitioned)
+        if partitioned < 1:
+            raise ValueError(
+                f"Partitioned operation needs a positive number of partitions: {self}"
+            )
+
+        frames = {}
+        for n in self.needs:
+            if is_sfx(n):
+                continue
+            n = dep_stripped(n)
+            if n in named_inputs:
+                val = named_inputs[n]
+                if type(val).__module__.startswith("pandas") and hasattr(val, "iloc"):
+                    frames[n] = val
+        lengths = {n: len(v) for n, v in frames.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(
+                f"Partitioned inputs have different number of rows: {lengths}\n  {self}"
+            )
+
+        nrows = next(iter(lengths.values()), 0)
+        nparts = max(1, min(partitioned, nrows))
+        bounds = [nrows * i // nparts for i in range(nparts + 1)]
+        for start, stop in zip(bounds, bounds[1:]):
+            yield ChainMap(
+                {n: v.iloc[start:stop] for n, v in frames.items()}, named_inputs
+            )
+
+    def gather_results(self, results: List[dict]) -> dict:
+        """
+        Concatenate each :mod:`pandas` output of the partitions' `results` (in order).
+
+        Other outputs are gathered in a list of their values in each partition.
+        """
+        gathered = {}
+        for k in results[0]:
+            if all(k in r for r in results):
+                values = [r[k] for r in results]
+                if all(type(v).__module__.startswith("pandas") for v in values):
+                    import pandas as pd
+
+                    values = pd.concat(values)
+                gathered[k] = values
+
+        return gathered
+
+    def _compute_partitioned(self, named_inputs, outputs) -> dict:
+        """
+        Compute partitions one after the other, or when :term:`parallel`,
+        in a thread-pool (with no more threads than CPUs).
+        """
+        import os
+        from concurrent.futures import ThreadPoolExecutor
+        from contextvars import copy_context
+
+        from .config import is_parallel_tasks
+
+        element_op = self.element_op()
+        parts = list(self.iter_element_inputs(named_inputs))
+        nthreads = min(len(parts), os.cpu_count() or 1)
+        if nthreads == 1 or not first_solid(is_parallel_tasks(), self.parallel):
+            results = [element_op.compute(p, outputs) for p in parts]
+        else:
+            with ThreadPoolExecutor(nthreads) as pool:
+                futures = [
+                    pool.submit(copy_context().run, element_op.compute, p, outputs)
+                    for p in parts
+                ]
+                results = [f.result() for f in futures]
+
+        return self.gather_results(results)
+
     def compute(
         self,
         named_inputs=None,
@@ -852,8 +1000,20 @@ class FnOp(Operation):
             if named_inputs is None:
                 named_inputs = {}
 
+            if self.partitioned:
+                results_op = self._compute_partitioned(named_inputs, outputs)
+                ok = True
+                return results_op
+
             positional, varargs, kwargs = self._match_inputs_with_fn_needs(named_inputs)
-            results_fn = self.fn(*positional, *varargs, **kwargs)
+            if self.streaming:
+                results_fn = self.fn(*positional, *varargs, **kwargs)
+                results_fn = self._as_stream(results_fn)
+            else:
+                positional, varargs, kwargs = _materialized_streams(
+                    positional, varargs, kwargs
+                )
+                results_fn = self.fn(*positional, *varargs, **kwargs)
             results_op = self._zip_results_with_provides(results_fn)
 
             outputs = astuple(outputs, "outputs", allowed_types=cabc.Collection)
@@ -926,6 +1086,10 @@ def operation(
     parallel=UNSET,
     marshalled=UNSET,
     returns_dict=UNSET,
+    streaming=UNSET,
+    partitioned=UNSET,
+    vectorized=UNSET,
+    kind=UNSET,
     node_props: Mapping = UNSET,
 ) -> FnOp:
     r"""
@@ -1019,6 +1183,24 @@ def operation(
         if true, it means the `fn` :term:`returns dictionary` with all `provides`,
         and no further processing is done on them
         (i.e. the returned output-values are not zipped with `provides`)
+    :param streaming:
+        if true (or a positive int, the size of the bounded queue of chunks),
+        it is a :term:`streaming operation`: `fn` must return an iterable of chunks
+        for its single `provides`, and receives any streamed `needs` as iterables
+        of chunks (if it is their sole consumer), or else, materialized.
+    :param partitioned:
+        if a positive int, it is a :term:`partitioned operation`, computing
+        that many blocks of the rows of its dataframe & series `needs`
+        (in parallel, when `parallel`), and concatenating the results of each `provides`.
+    :param vectorized:
+        if true, `fn` is :term:`vectorized`, receiving lists of values
+        for each of its `needs` and returning lists for its `provides`,
+        when :term:`micro-batching` requests (see :class:`.Batcher`).
+    :param kind:
+        the :term:`execution kind`, like ``io`` or ``cpu``, routing the operation
+        to the respective pool of a plugged :class:`.HybridPool` (implying `parallel`),
+        or ``inline``, to run it in the executor's thread (never `parallel`);
+        may also be given as a ``kind`` key in `node_props`.
     :param node_props:
         Added as-is into NetworkX graph, and you may filter operations by
         :meth:`.Pipeline.withset()`.
@@ -1095,3 +1277,214 @@ def operation(
     decorator.withset = op.withset
 
     return decorator
+
+
+#: The single `provides` of the operation computing each element of a :class:`MapOp`.
+_ELEMENT = "_element"
+
+
+class _PipelineCall:
+    """Compute a nested pipeline with keyword inputs, returning its single `outputs` or all."""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def __call__(self, **inputs):
+        pipeline = self.pipeline
+        sol = pipeline.compute(inputs)
+        outputs = pipeline.outputs and astuple(pipeline.outputs, "outputs")
+
+        return sol[outputs[0]] if outputs and len(outputs) == 1 else dict(sol)
+
+    def __repr__(self):
+        return f"_PipelineCall({self.pipeline.name!r})"
+
+
+class MapOp(FnOp):
+    """
+    A :term:`map operation` applying its function (or a nested pipeline) on each element of a need.
+
+    - Use :func:`.map_operation()` factory to build instances of this class instead.
+    - When :term:`parallel`, each element is submitted as a separate task
+      into the :term:`execution pool` (see :meth:`element_op`).
+    """
+
+    def __init__(
+        self,
+        fn: Callable = None,
+        name=None,
+        needs: Items = None,
+        provides: Items = None,
+        aliases: Mapping = None,
+        *,
+        map_over: str = None,
+        gather: Union[str, Callable] = None,
+        **kw,
+    ):
+        """
+        Build a new map operation out of some function (or pipeline) and its requirements.
+
+        See :func:`.map_operation` for the full documentation of parameters.
+        """
+        super().__init__(fn, name, needs, provides, aliases, **kw)
+        if gather not in (None, "list", "array") and not callable(gather):
+            raise ValueError(
+                f"Map-op `gather` must be 'list', 'array' or a callable, got: {gather!r}"
+            )
+        #: the :term:`needs` with the iterable of elements (default, the 1st one)
+        self.map_over = map_over
+        #: how to gather the list of the elements' results into the output:
+        #: ``list`` (default), ``array`` (with :func:`numpy.asarray()`),
+        #: or a callable receiving that list
+        self.gather = gather
+
+    def withset(self, *args, map_over=..., gather=..., **kw) -> "MapOp":
+        """Like :meth:`.FnOp.withset()`, accepting also `map_over` & `gather`."""
+        clone = super().withset(*args, **kw)
+        if map_over is not ...:
+            clone.map_over = map_over
+        if gather is not ...:
+            clone.gather = gather
+        return clone
+
+    @property
+    def mapped_need(self) -> str:
+        """The (stripped) name of the :attr:`map_over` need, screaming if not a need."""
+        fn_needs = [dep_stripped(n) for n in self._fn_needs]
+        map_over = self.map_over
+        if map_over is None:
+            if not fn_needs:
+                raise ValueError(f"Map-op without needs to map over!\n  {self}")
+            return fn_needs[0]
+
+        map_over = dep_stripped(map_over)
+        if map_over not in fn_needs:
+            raise ValueError(
+                f"Map-op's `map_over` {map_over!r} not in its needs{fn_needs}!\n  {self}"
+            )
+        return map_over
+
+    def element_op(self) -> FnOp:
+        """
+        A plain operation computing a single element (mapped need bound to the element).
+
+        It provides just the internal ``_element`` output, to be :meth:`gather_results`\\ed.
+        """
+        from .modifier import keyword
+
+        fn = self.fn
+        needs = self._user_needs
+        if hasattr(fn, "net") and hasattr(fn, "compute"):  # a nested pipeline
+            fn = _PipelineCall(fn)
+            needs = [keyword(dep_stripped(n)) for n in self._fn_needs]
+
+        return FnOp(fn, f"{self.name}[*]", needs=needs, provides=_ELEMENT)
+
+    @property
+    def fans_out(self) -> bool:
+        return True
+
+    def gather_results(self, results: List[dict]) -> dict:
+        """Gather the elements' `results` and zip them with :attr:`provides`."""
+        results = [r[_ELEMENT] for r in results]
+        gather = self.gather
+        if gather is None or gather == "list":
+            gathered = list(results)
+        elif gather == "array":
+            import numpy as np
+
+            gathered = np.asarray(results)
+        else:
+            gathered = gather(results)
+
+        return self._zip_results_with_provides(gathered)
+
+    def iter_element_inputs(self, named_inputs) -> Iterable[Mapping]:
+        """Yield the `named_inputs` overlaid with each element of the :attr:`mapped_need`."""
+        map_over = self.mapped_need
+        for item in named_inputs[map_over]:
+            yield ChainMap({map_over: item}, named_inputs)
+
+    def compute(self, named_inputs=None, outputs: Items = None, *args, **kw) -> dict:
+        """Compute (sequentially) the elements of the mapped need, and gather them."""
+        ok = False
+        try:
+            self.validate_fn_name()
+            if named_inputs is None:
+                named_inputs = {}
+
+            element_op = self.element_op()
+            results = [
+                element_op.compute(inputs)
+                for inputs in self.iter_element_inputs(named_inputs)
+            ]
+            results_op = self.gather_results(results)
+            if outputs:
+                outputs = set(astuple(outputs, "outputs", allowed_types=cabc.Collection))
+                results_op = {k: v for k, v in results_op.items() if k in outputs}
+
+            ok = True
+            return results_op
+        finally:
+            if not ok:
+                from .jetsam import save_jetsam
+
+                ex = sys.exc_info()[1]
+                save_jetsam(ex, locals(), "outputs", "results", operation="self")
+
+
+def map_operation(
+    fn: Callable = UNSET,
+    name=UNSET,
+    needs: Items = UNSET,
+    provides: Items = UNSET,
+    aliases: Mapping = UNSET,
+    *,
+    map_over: str = UNSET,
+    gather: Union[str, Callable] = UNSET,
+    **kw,
+) -> MapOp:
+    """
+    A :term:`map operation` factory, working like :func:`operation()`.
+
+    :param fn:
+        the callable applied to each element, or a nested :class:`.Pipeline`
+        computed for each element (receiving all `needs` as inputs, and returning
+        its single `outputs`, if given with :meth:`.Pipeline.withset()`,
+        or else, all its values)
+    :param map_over:
+        the need with the iterable of elements (default, the 1st one);
+        it is bound to each element, while the rest `needs` are passed as is
+    :param gather:
+        how to combine the results of the elements into the `provides`:
+        ``'list'`` (default), ``'array'`` (a :mod:`numpy` array),
+        or a callable receiving the list of results
+
+    Rest params are the same as :func:`operation()`.
+
+    **Example:**
+
+        >>> from graphtik import compose, map_operation
+
+        >>> op = map_operation(lambda x, k: x * k, "scale", needs=["xs", "k"], provides="ys")
+        >>> op
+        MapOp(name='scale', needs=['xs', 'k'], provides=['ys'], fn='<lambda>')
+        >>> compose("mapping", op).compute({"xs": [1, 2, 3], "k": 10})
+        {'xs': [1, 2, 3], 'k': 10, 'ys': [10, 20, 30]}
+    """
+    kw = {
+        **kw,
+        **{k: v for k, v in locals().items() if v is not UNSET and k != "kw"},
+    }
+    op = MapOp(**kw)
+
+    if "fn" in kw:
+        return op
+
+    @wraps(op.withset)
+    def decorator(*args, **kw):
+        return op.withset(*args, **kw)
+
+    decorator.withset = op.withset
+
+    return decorator
@@ -0,0 +1,140 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Bind :mod:`pandas` dataframe columns to needs, for :term:`columnar execution`.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.frames import *
+    >>> __name__ = "graphtik.frames"
+"""
+import logging
+from typing import Any, Callable, Collection, Mapping
+
+log = logging.getLogger(__name__)
+
+
+def bind_columns(
+    frame, needs: Collection[str], columns: Mapping[str, str] = None
+) -> dict:
+    """
+    Map the `needs` named like `frame` columns (or renamed in `columns`) to :class:`pandas.Series`.
+
+    :param frame:
+        a :class:`pandas.DataFrame`
+    :param needs:
+        the names of the inputs to bind
+    :param columns:
+        a mapping of need names --> column names, for needs named differently
+    :raises ValueError:
+        if `columns` names columns missing from `frame`
+
+    **Example:**
+
+        >>> import pandas as pd
+
+        >>> df = pd.DataFrame({"a": [1, 2], "b": [3, 4]})
+        >>> sorted(bind_columns(df, ["a", "c"], {"c": "b"}))
+        ['a', 'c']
+    """
+    columns = dict(columns or ())
+    missing = [c for c in columns.values() if c not in frame.columns]
+    if missing:
+        raise ValueError(
+            f"Bound columns{missing} missing from frame columns{list(frame.columns)}!"
+        )
+    for need in needs:
+        if need not in columns and need in frame.columns:
+            columns[need] = need
+
+    return {need: frame[col] for need, col in columns.items()}
+
+
+class RowWise:
+    """
+    Call a function once per row of its :class:`pandas.Series` args, collecting results into series.
+
+    Scalar args are passed as is to all rows;  the results of functions returning
+    tuples (for many `provides`) or dictionaries (:term:`returns dictionary`)
+    are transposed into tuples or dictionaries of series.
+
+    Series are sliced into lists in chunks of `chunksize` rows, cheaper than
+    indexing each cell.
+
+    **Example:**
+
+        >>> import math
+        >>> import pandas as pd
+
+        >>> RowWise(math.log10)(pd.Series([1, 10, 100])).tolist()
+        [0.0, 1.0, 2.0]
+    """
+
+    def __init__(
+        self, fn: Callable, nresults: int = 1, returns_dict=False, chunksize=1024
+    ):
+        self.fn = fn
+        self.nresults = nresults
+        self.returns_dict = returns_dict
+        self.chunksize = chunksize
+
+    def __repr__(self):
+        return f"RowWise({self.fn!r})"
+
+    def __call__(self, *args, **kwargs) -> Any:
+        import pandas as pd
+
+        series = [v for v in (*args, *kwargs.values()) if isinstance(v, pd.Series)]
+        if not series:
+            return self.fn(*args, **kwargs)
+
+        index = series[0].index
+        nrows = len(index)
+        rows = []
+        for start in range(0, nrows, self.chunksize):
+            stop = min(start + self.chunksize, nrows)
+
+            def chunk(v):
+                if isinstance(v, pd.Series):
+                    return v.iloc[start:stop].tolist()
+                return [v] * (stop - start)
+
+            args_chunk = [chunk(v) for v in args]
+            kwargs_chunk = {k: chunk(v) for k, v in kwargs.items()}
+            rows.extend(
+                self.fn(
+                    *(v[i] for v in args_chunk),
+                    **{k: v[i] for k, v in kwargs_chunk.items()},
+                )
+                for i in range(stop - start)
+            )
+
+        if self.returns_dict:
+            keys = rows[0].keys() if rows else ()
+            return {k: pd.Series([r[k] for r in rows], index=index) for k in keys}
+        if self.nresults > 1:
+            cols = zip(*rows) if rows else [()] * self.nresults
+            return tuple(pd.Series(list(c), index=index) for c in cols)
+        return pd.Series(rows, index=index)
+
+
+def raised_by_pandas(ex: BaseException) -> bool:
+    """
+    Whether `ex` was raised inside :mod:`pandas` (or :mod:`numpy`) code,
+    e.g. *"The truth value of a Series is ambiguous"*, not by the function calling it.
+    """
+    tb = ex.__traceback__
+    if tb is None:
+        return False
+    while tb.tb_next:
+        tb = tb.tb_next
+    module = tb.tb_frame.f_globals.get("__name__") or ""
+    return module.split(".", 1)[0] in ("pandas", "numpy")
+
+
+def rowwise_op(op: "FnOp") -> "FnOp":
+    """Clone `op` with its function called :class:`RowWise`, for ops failing on whole series."""
+    return op.withset(fn=RowWise(op.fn, len(op._fn_provides), op.returns_dict))
@@ -0,0 +1,126 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Assign the operations of a plan to worker processes, for :term:`locality-aware placement`.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.partition import *
+    >>> __name__ = "graphtik.partition"
+"""
+import logging
+import sys
+from typing import Any, Dict, Mapping
+
+from .planning import yield_ops
+
+log = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    A cheap estimate of the bytes of a `value`, without pickling it.
+
+    Uses ``nbytes`` (e.g. :mod:`numpy` arrays), :mod:`pandas` ``memory_usage()``,
+    or :func:`sys.getsizeof()`.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if type(value).__module__.startswith("pandas") and hasattr(value, "memory_usage"):
+        usage = value.memory_usage(index=True)
+        return int(getattr(usage, "sum", lambda: usage)())
+
+    return sys.getsizeof(value)
+
+
+def update_estimate(estimates: Dict[str, float], key: str, value: float):
+    """Blend a new measurement into the `estimates` (exponential moving average)."""
+    old = estimates.get(key)
+    estimates[key] = value if old is None else (old + value) / 2
+
+
+def partition_plan(
+    plan,
+    nparts: int,
+    *,
+    sizes: Mapping[str, float] = None,
+    costs: Mapping[str, float] = None,
+    imbalance: float = 0.1,
+) -> Dict[str, int]:
+    """
+    Greedily assign the operations of a `plan` into `nparts` partitions.
+
+    Each operation (in the order of the plan's steps) goes to the partition
+    that would receive the least bytes of its needs from other partitions,
+    among those not exceeding their share of the total compute
+    (plus `imbalance`); ties go to the least loaded partition.
+
+    :param plan:
+        the :class:`.ExecutionPlan` to partition
+    :param nparts:
+        the number of partitions (e.g. worker processes)
+    :param sizes:
+        estimated bytes of data values, by name (unknown ones get the mean size)
+    :param costs:
+        estimated compute (e.g. msecs) of operations, by name (unknown ones get the mean)
+    :param imbalance:
+        the fraction of compute a partition may exceed its fair share
+    :return:
+        the partition index for each operation name
+
+    :raises ValueError:
+        if `nparts` not a positive integer
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+        >>> pipe = compose(
+        ...     "clusters",
+        ...     operation(str, "A1", needs="a", provides="a1"),
+        ...     operation(str, "B1", needs="b", provides="b1"),
+        ...     operation(str, "A2", needs="a1", provides="a2"),
+        ...     operation(str, "B2", needs="b1", provides="b2"),
+        ... )
+        >>> sorted(partition_plan(pipe.compile(["a", "b"]), 2).items())
+        [('A1', 0), ('A2', 0), ('B1', 1), ('B2', 1)]
+    """
+    if not isinstance(nparts, int) or nparts < 1:
+        raise ValueError(f"`nparts` must be a positive integer, got: {nparts!r}")
+    sizes = sizes or {}
+    costs = costs or {}
+    dag = plan.dag
+    ops = list(yield_ops(plan.steps))
+
+    def mean(estimates):
+        return sum(estimates.values()) / len(estimates) if estimates else 1
+
+    default_size, default_cost = mean(sizes), mean(costs)
+    op_costs = {op: costs.get(op.name, default_cost) for op in ops}
+    cap = (1 + imbalance) * sum(op_costs.values()) / nparts
+
+    loads = [0.0] * nparts
+    producers: Dict[str, int] = {}
+    placement = {}
+    for op in ops:
+        cost = op_costs[op]
+        inbound = [
+            (producers[n], sizes.get(n, default_size))
+            for n in dag.predecessors(op)
+            if n in producers
+        ]
+        candidates = [p for p in range(nparts) if loads[p] + cost <= cap]
+        part = min(
+            candidates or range(nparts),
+            key=lambda p: (sum(size for src, size in inbound if src != p), loads[p]),
+        )
+        placement[op.name] = part
+        loads[part] += cost
+        for out in dag.successors(op):
+            producers[out] = part
+    log.debug("Partitioned x%i ops into loads: %s", len(ops), loads)
+
+    return placement
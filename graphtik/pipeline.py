@@ -11,10 +11,22 @@
 
 import inspect
 import logging
+import os
 import re
 import sys
 from collections import abc as cabc
-from typing import Callable, List, Mapping, Union
+from collections import deque
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Tuple,
+    Union,
+)
 
 from boltons.setutils import IndexedSet as iset
 
@@ -371,6 +383,8 @@ class Pipeline(Operation):
         callbacks=None,
         solution_class: "Type[Solution]" = None,
         layered_solution=None,
+        lazy=False,
+        sinks: Mapping = None,
     ) -> "Solution":
         """
         Compile & :term:`execute` the plan, log :term:`jetsam` & plot :term:`plottable` on errors.
@@ -418,7 +432,15 @@ class Pipeline(Operation):
               layer for each operation, regardless of any *jsonp* dependencies.
             - If ``None``, layers are used only if there are NO :term:`jsonp` dependencies
               in the network.
-
+        :param lazy:
+            when true, return the solution immediately, and compute its values
+            on demand, when read (e.g. ``sol["x"]``, :meth:`.Solution.get_many()`),
+            executing just the operations upstream of them, not yet executed.
+        :param sinks:
+            a mapping of outputs --> :term:`sink`\\s (callables or file paths
+            like ``out/x.npy``, see :mod:`graphtik.sinks`), to write each value
+            as soon as it is produced, keeping in the solution just the reference
+            or path returned, after the last operation needing it has run.
 
         :return:
             The :term:`solution` which contains the results of each operation executed
@@ -474,37 +496,525 @@ class Pipeline(Operation):
                 callbacks=callbacks,
                 solution_class=solution_class,
                 layered_solution=layered_solution,
+                lazy=lazy,
+                sinks=sinks,
             )
 
             ok = True
             return solution
         finally:
             if not ok:
-                from .jetsam import save_jetsam
-
-                ex = sys.exc_info()[1]
-                jetsam = save_jetsam(
-                    ex,
-                    locals(),
-                    "plan",
-                    "solution",
-                    "outputs",
-                    pipeline="self",
-                    network="net",
+                self._log_n_plot_jetsam(sys.exc_info()[1], locals())
+
+    def _log_n_plot_jetsam(self, ex, local_vars: Mapping):
+        """Annotate the error of a compute-method with :term:`jetsam` and log/plot it."""
+        from .jetsam import save_jetsam
+
+        jetsam = save_jetsam(
+            ex,
+            local_vars,
+            "plan",
+            "solution",
+            "outputs",
+            pipeline="self",
+            network="net",
+        )
+
+        try:
+            jetsam.log_n_plot()
+        except Exception as ex2:
+            log.warning(
+                "Suppressed error while logging/plotting jetsam of %s: %s(%s)"
+                "\n  +--annotations:%s",
+                self,
+                type(ex2).__name__,
+                ex2,
+                jetsam,
+                exc_info=True,
+            )
+
+    def compute_iter(
+        self,
+        named_inputs: Mapping = None,
+        # /,  PY3.8+ positional-only
+        outputs: Items = UNSET,
+        recompute_from: Items = None,
+        *,
+        prioritized=False,
+        predicate: "NodePredicate" = UNSET,
+        callbacks=None,
+        solution_class: "Type[Solution]" = None,
+        layered_solution=None,
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Like :meth:`compute()` but yield ``(dependency, value)`` pairs as soon as each output is produced.
+
+        :param outputs:
+            the outputs to yield (each one once), in order of priority;
+            if ``None``, all outputs produced are yielded (and nothing evicted)
+        :param prioritized:
+            when true, operations upstream of the 1st `outputs` are executed first
+            (see :meth:`.ExecutionPlan.prioritized_steps()`);
+            useful only with :term:`sequential` execution.
+        :return:
+            a generator of ``(dependency, value)`` pairs, with the solution
+            as its return-value (i.e. ``StopIteration.value``)
+
+        Rest params & errors (with their :term:`jetsam`) are the same as :meth:`compute()`,
+        and planning happens when the 1st pair is asked.
+
+        **Example:**
+
+            >>> from graphtik import compose, operation
+
+            >>> pipe = compose(
+            ...     "slow_n_fast",
+            ...     operation(lambda a: a + 1, "slow", needs="a", provides="b"),
+            ...     operation(lambda a: a * 2, "fast", needs="a", provides="c"),
+            ... )
+            >>> list(pipe.compute_iter({"a": 1}, outputs=["c", "b"], prioritized=True))
+            [('c', 2), ('b', 2)]
+        """
+        from .config import reset_abort
+
+        try:
+            if named_inputs is None:
+                named_inputs = {}
+
+            net = self.net  # jetsam
+            if outputs == UNSET:
+                outputs = self.outputs
+            if predicate == UNSET:
+                predicate = self.predicate
+
+            log.info("=== Compiling pipeline(%s) ...", self.name)
+            plan = net.compile(
+                named_inputs.keys(), outputs, recompute_from, predicate=predicate
+            )
+
+            # Restore `abort` flag for next run.
+            reset_abort()
+
+            return (
+                yield from plan.execute_iter(
+                    named_inputs,
+                    outputs,
+                    name=self.name,
+                    callbacks=callbacks,
+                    solution_class=solution_class,
+                    layered_solution=layered_solution,
+                    prioritized=prioritized,
                 )
+            )
+        except Exception as ex:
+            # Not `finally`, to skip the generator closed by its consumer.
+            self._log_n_plot_jetsam(ex, locals())
+            raise
+
+    def compute_chunked(
+        self,
+        named_inputs: Mapping,
+        outputs: Items = UNSET,
+        *,
+        chunk_by: Mapping[str, int],
+        reducers: Mapping[str, Union[str, Callable]] = None,
+        parallel: Union[bool, int] = False,
+        predicate: "NodePredicate" = UNSET,
+        callbacks=None,
+    ) -> dict:
+        """
+        :term:`Chunked execution` of the plan, once per chunk of some inputs, reducing the outputs.
+
+        The plan is compiled & validated just once, and then executed on copies
+        of `named_inputs` with the inputs in `chunk_by` sliced into chunks of rows
+        (see :func:`.iter_chunks()`).
+
+        :param chunk_by:
+            a mapping of input names --> rows per chunk, for inputs like arrays,
+            dataframes, lists or paths of ``.npy`` files (memory-mapped);
+            all must split into the same number of chunks
+        :param reducers:
+            a mapping of output names --> reducer callables receiving the list
+            of the values of the output in all chunks (in order),
+            or the name of one in :data:`.chunking.reducers`
+            (``concat``, ``sum``, ``list`` & ``first``);
+            outputs not given are concatenated (see :func:`.concat_chunks()`);
+            only the outputs of each chunk are kept, and those reduced by name
+            in :data:`.chunking.folds` are folded as soon as each chunk completes
+        :param parallel:
+            if true, execute chunks in a thread-pool (an int sets its size),
+            with no more chunks in flight than its workers
+        :return:
+            a dict with the reduced `outputs`
+            (or all outputs of the plan produced in every chunk, if `outputs`
+            is ``None``, but not the inputs given)
+
+        :raises ValueError:
+            if the inputs in `chunk_by` are empty (no chunks)
+        :raises IncompleteExecutionError:
+            if any operation failed in some chunk (when :term:`endured`)
+
+        Rest params & errors are the same as :meth:`compute()`.
+
+        **Example:**
+
+            >>> from graphtik import compose, operation
 
-                try:
-                    jetsam.log_n_plot()
-                except Exception as ex2:
-                    log.warning(
-                        "Suppressed error while logging/plotting jetsam of %s: %s(%s)"
-                        "\n  +--annotations:%s",
-                        self,
-                        type(ex2).__name__,
-                        ex2,
-                        jetsam,
-                        exc_info=True,
+            >>> pipe = compose(
+            ...     "chunked",
+            ...     operation(lambda xs, k: [x * k for x in xs], "scale", needs=["xs", "k"], provides="ys"),
+            ...     operation(sum, "total", needs="ys", provides="sum"),
+            ... )
+            >>> pipe.compute_chunked({"xs": [1, 2, 3, 4, 5], "k": 10}, ["ys", "sum"],
+            ...                      chunk_by={"xs": 2}, reducers={"sum": "sum"})
+            {'ys': [10, 20, 30, 40, 50], 'sum': 150}
+        """
+        from .chunking import as_reducer, folds, iter_chunks
+        from .config import reset_abort
+
+        if outputs == UNSET:
+            outputs = self.outputs
+        if predicate == UNSET:
+            predicate = self.predicate
+        reducers = reducers or {}
+        folding = {
+            k: folds[v]
+            for k, v in reducers.items()
+            if isinstance(v, str) and v in folds
+        }
+        reducers = {k: as_reducer(v) for k, v in reducers.items()}
+
+        log.info("=== Compiling chunked pipeline(%s) ...", self.name)
+        plan = self.net.compile(named_inputs.keys(), outputs, predicate=predicate)
+        plan.validate(named_inputs, outputs)
+
+        # Restore `abort` flag for next run.
+        reset_abort()
+
+        def execute_chunk(chunk: dict) -> dict:
+            sol = plan.execute(chunk, outputs, name=self.name, callbacks=callbacks)
+            sol.scream_if_incomplete()
+            # Keep just the values, not the solution with its intermediates.
+            return dict(sol)
+
+        def iter_chunk_outputs() -> Iterator[dict]:
+            """Yield the values of each chunk, in order."""
+            chunks = iter_chunks(named_inputs, chunk_by)
+            if not parallel:
+                yield from map(execute_chunk, chunks)
+                return
+
+            from concurrent.futures import ThreadPoolExecutor
+            from contextvars import copy_context
+
+            # The default size of the pool-executor.
+            nworkers = (
+                min(32, (os.cpu_count() or 1) + 4)
+                if parallel is True
+                else int(parallel)
+            )
+            with ThreadPoolExecutor(nworkers) as pool:
+                in_flight = deque()
+                for chunk in chunks:
+                    if len(in_flight) >= nworkers:
+                        yield in_flight.popleft().result()
+                    in_flight.append(
+                        pool.submit(copy_context().run, execute_chunk, chunk)
                     )
+                while in_flight:
+                    yield in_flight.popleft().result()
+
+        asked = None if outputs is None else aslist(outputs, "outputs")
+        ## Per output, the folded value or the list of values of all chunks so far.
+        reduced = {}
+        nchunks = 0
+        for values in iter_chunk_outputs():
+            if asked is None:
+                asked = [k for k in plan.provides if k in values]
+            elif outputs is None:
+                # Keep only values produced in every chunk.
+                asked = [k for k in asked if k in values]
+            for out in asked:
+                fold = folding.get(out)
+                if not fold:
+                    reduced.setdefault(out, []).append(values[out])
+                elif nchunks:
+                    reduced[out] = fold(reduced[out], values[out])
+                else:
+                    reduced[out] = values[out]
+            nchunks += 1
+
+        if not nchunks:
+            raise ValueError(
+                f"No chunks to compute, chunked inputs{list(chunk_by)} are empty!"
+            )
+        log.info(
+            "=== Reducing outputs%s of x%i chunks of pipeline(%s).",
+            asked,
+            nchunks,
+            self.name,
+        )
+        concat = as_reducer("concat")
+
+        return {
+            out: reduced[out]
+            if out in folding
+            else reducers.get(out, concat)(reduced[out])
+            for out in asked
+        }
+
+    def apply(
+        self,
+        frame,
+        outputs: Items = UNSET,
+        *,
+        columns: Mapping[str, str] = None,
+        frame_name: str = None,
+        inputs: Mapping = None,
+        rowwise_fallback: Union[bool, Items] = True,
+        predicate: "NodePredicate" = UNSET,
+        callbacks=None,
+    ):
+        """
+        :term:`Columnar execution` of the plan on whole :class:`pandas.Series` of a dataframe.
+
+        The needs named like the `frame` columns are bound to those columns,
+        the plan executes once, and the `outputs` are appended as new columns.
+
+        :param frame:
+            a :class:`pandas.DataFrame`
+        :param columns:
+            a mapping of need names --> column names, for needs named differently
+            (see :func:`.bind_columns()`)
+        :param frame_name:
+            if given, the whole `frame` is also bound to this input, for needs
+            with :term:`jsonp` paths into it, like ``<frame_name>/<column>``
+        :param inputs:
+            more (scalar) inputs for the plan
+        :param rowwise_fallback:
+            if true, operations whose series made :mod:`pandas` raise :class:`TypeError`
+            or :class:`ValueError` (e.g. *"The truth value of a Series is ambiguous"*,
+            see :func:`.raised_by_pandas()`) are re-executed with their function
+            called per row, in chunks of rows (see :class:`.RowWise`);
+            if the names of some operations, only those fall back, on any such error;
+            just the failed operations and those downstream are re-executed,
+            on the values already computed
+        :return:
+            a copy of `frame` with the `outputs` as new columns
+            (or all values produced, if `outputs` is ``None``)
+
+        Rest params & errors are the same as :meth:`compute()`.
+
+        **Example:**
+
+            >>> import pandas as pd
+            >>> from graphtik import compose, operation
+
+            >>> pipe = compose(
+            ...     "columnar",
+            ...     operation(lambda a, b: a * b, "mul", needs=["a", "b"], provides="ab"),
+            ...     operation(lambda ab: "big" if ab > 4 else "small", "label",
+            ...               needs="ab", provides="size"),
+            ... )
+            >>> pipe.apply(pd.DataFrame({"a": [1, 2, 3], "b": [1, 2, 3]}), ["ab", "size"])
+               a  b  ab   size
+            0  1  1   1  small
+            1  2  2   4  small
+            2  3  3   9    big
+
+        Above, the ``label`` operation could not handle series, and was re-executed per row.
+        """
+        from .fnop import FnOp
+        from .frames import bind_columns, raised_by_pandas, rowwise_op
+
+        named_inputs = dict(inputs or ())
+        named_inputs.update(bind_columns(frame, self.net.needs, columns))
+        if frame_name is not None:
+            named_inputs[frame_name] = frame
+
+        if isinstance(rowwise_fallback, bool):
+            fallbacks = None
+        else:
+            fallbacks = set(aslist(rowwise_fallback, "rowwise_fallback"))
+
+        def falls_back(op, ex) -> bool:
+            if not (isinstance(op, FnOp) and isinstance(ex, (TypeError, ValueError))):
+                return False
+            if fallbacks is not None:
+                return op.name in fallbacks
+            return raised_by_pandas(ex)
+
+        rowwise = set()
+        pipe = self
+        values = named_inputs
+        while True:
+            raised = None
+            try:
+                sol = pipe.compute(
+                    values, outputs, predicate=predicate, callbacks=callbacks
+                )
+                failures = [
+                    (op, ex)
+                    for op, ex in sol.executed.items()
+                    if isinstance(ex, Exception)
+                ]
+            except (TypeError, ValueError) as ex:
+                raised = ex
+                jetsam = getattr(ex, "jetsam", None) or {}
+                sol = jetsam.get("solution")
+                failures = [(jetsam.get("operation"), ex)]
+
+            failed = {op.name for op, ex in failures if falls_back(op, ex)}
+            if not rowwise_fallback or not failed or failed & rowwise or sol is None:
+                if raised:
+                    raise raised
+                sol.scream_if_incomplete()
+                break
+
+            rowwise.update(failed)
+            log.info(
+                "Pipeline(%s): re-executing row-wise ops%s, failed on series.",
+                self.name,
+                sorted(rowwise),
+            )
+            pipe = Pipeline(
+                [rowwise_op(op) if op.name in rowwise else op for op in self.ops],
+                self.name,
+                outputs=self.outputs,
+                predicate=self.predicate,
+            )
+            # Ops whose outputs are given are pruned, so only the failed ones
+            # and those downstream re-execute.
+            values = {**named_inputs, **sol}
+
+        if outputs == UNSET:
+            outputs = self.outputs
+        outputs = (
+            [k for k in sol if k not in named_inputs]
+            if outputs is None
+            else aslist(outputs, "outputs")
+        )
+        frame = frame.copy()
+        for out in outputs:
+            frame[out] = sol[out]
+
+        return frame
+
+    def compute_stream(
+        self,
+        records: Iterable[Mapping],
+        outputs: Items = UNSET,
+        *,
+        max_in_flight: int = 2,
+        predicate: "NodePredicate" = UNSET,
+        callbacks=None,
+    ) -> Iterator["Solution"]:
+        """
+        :term:`Pipelined execution` of the plan on a stream of input `records`, overlapping them.
+
+        Each record is computed in a thread, and may start its early operations
+        while the previous records are still in later ones, but every operation
+        computes the records in their input order (see :class:`.StageGates`).
+
+        :param records:
+            an iterable of `named_inputs` mappings, consumed lazily
+        :param max_in_flight:
+            the maximum number of records executing concurrently;
+            no more records are pulled until the oldest one is yielded (backpressure)
+        :return:
+            an iterator of solutions, one per record, in input order;
+            errors of a record are raised when its turn comes
+
+        Rest params & errors are the same as :meth:`compute()`.
+
+        **Example:**
+
+            >>> from graphtik import compose, operation
+
+            >>> pipe = compose(
+            ...     "staged",
+            ...     operation(lambda a: a + 1, "parse", needs="a", provides="b"),
+            ...     operation(lambda b: b * 10, "store", needs="b", provides="c"),
+            ... )
+            >>> [sol["c"] for sol in pipe.compute_stream([{"a": i} for i in range(4)], "c")]
+            [10, 20, 30, 40]
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from contextvars import copy_context
+
+        from .stages import StageGates
+
+        if not isinstance(max_in_flight, int) or max_in_flight < 1:
+            raise ValueError(
+                f"`max_in_flight` must be a positive integer, got: {max_in_flight!r}"
+            )
+
+        gates = StageGates()
+
+        def compute_record(seq: int, record: Mapping) -> "Solution":
+            try:
+                return self.compute(
+                    record,
+                    outputs,
+                    predicate=predicate,
+                    callbacks=gates.callbacks(seq, callbacks),
+                )
+            finally:
+                gates.finish(seq)
+
+        in_flight = deque()
+        with ThreadPoolExecutor(
+            max_in_flight, thread_name_prefix=f"{self.name}-stream"
+        ) as pool:
+            for seq, record in enumerate(records):
+                if len(in_flight) >= max_in_flight:
+                    yield in_flight.popleft().result()
+                in_flight.append(
+                    pool.submit(copy_context().run, compute_record, seq, record)
+                )
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    async def acompute_iter(self, *args, **kw) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Async variant of :meth:`compute_iter()` (same params), executing in a worker thread.
+
+        The operations are executed in the default executor of the running event-loop,
+        within a copy of the caller's :mod:`contextvars` (e.g. :term:`configurations`),
+        and each ``(dependency, value)`` pair is yielded in the loop,
+        as soon as it is produced.
+        """
+        import asyncio
+        import threading
+        from contextvars import copy_context
+
+        loop = asyncio.get_running_loop()
+        ctx = copy_context()
+        pairs = ctx.run(self.compute_iter, *args, **kw)
+        done = object()
+        # Cleared while `next()` executes in the worker-thread.
+        idle = threading.Event()
+        idle.set()
+
+        def step():
+            try:
+                return ctx.run(next, pairs, done)
+            finally:
+                idle.set()
+
+        try:
+            while True:
+                idle.clear()
+                pair = await loop.run_in_executor(None, step)
+                if pair is done:
+                    break
+                yield pair
+        finally:
+            if not idle.is_set():
+                # Cancelled while still executing, and the generator cannot close
+                # before its `next()` returns.
+                await loop.run_in_executor(None, idle.wait)
+            pairs.close()
 
     def __call__(self, **input_kwargs) -> "Solution":
         """
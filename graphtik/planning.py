@@ -5,6 +5,7 @@
 """
 import logging
 import sys
+import threading
 from collections import abc, defaultdict
 from functools import partial
 from itertools import count
@@ -432,9 +433,20 @@ class Network(Plottable):
             self._append_operation(graph, op)
         self.needs, self.provides = collect_requirements(self.graph)
 
-        #: Speed up :meth:`compile()` call and avoid a multithreading issue(?)
-        #: that is occurring when accessing the dag in networkx.
+        #: Speed up :meth:`compile()` call, read without locking
+        #: (plans are immutable, safe to share among threads).
         self._cached_plans = {}
+        #: Serialize cache-misses, so concurrent compiles build each plan once.
+        self._compile_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = vars(self).copy()
+        del state["_compile_lock"]  # unpicklable
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self._compile_lock = threading.Lock()
 
     def __repr__(self):
         nodes = self.graph.nodes
@@ -946,33 +958,44 @@ class Network(Plottable):
             ## Build (or retrieve from cache) execution plan
             #  for the given dep-lists (excluding any unknown node-names).
             #
-            if cache_key in self._cached_plans:
+            plan = self._cached_plans.get(cache_key)
+            if plan is not None:
                 log.debug("... compile cache-hit key: %s", cache_key)
-                plan = self._cached_plans[cache_key]
             else:
-                if recompute_from:
-                    inputs, recomputes = inputs_for_recompute(
-                        self.graph.copy(), inputs, recompute_from, k2
-                    )
-
-                _prune_results = self._prune_graph(inputs, outputs, predicate)
-                pruned_dag, sorted_nodes, needs, provides, op_comments = _prune_results
-
-                steps = self._build_execution_steps(
-                    pruned_dag, sorted_nodes, needs, outputs or ()
-                )
-                plan = ExecutionPlan(
-                    self,
-                    needs,
-                    provides,
-                    pruned_dag,
-                    tuple(steps),
-                    asked_outs=outputs is not None,
-                    comments=op_comments,
-                )
-
-                self._cached_plans[cache_key] = plan
-                log.debug("... compile cache-updated key: %s", cache_key)
+                with self._compile_lock:
+                    # Re-check, in case another thread has just compiled it.
+                    plan = self._cached_plans.get(cache_key)
+                    if plan is None:
+                        if recompute_from:
+                            inputs, recomputes = inputs_for_recompute(
+                                self.graph.copy(), inputs, recompute_from, k2
+                            )
+
+                        _prune_results = self._prune_graph(inputs, outputs, predicate)
+                        (
+                            pruned_dag,
+                            sorted_nodes,
+                            needs,
+                            provides,
+                            op_comments,
+                        ) = _prune_results
+
+                        steps = self._build_execution_steps(
+                            pruned_dag, sorted_nodes, needs, outputs or ()
+                        )
+                        plan = ExecutionPlan(
+                            self,
+                            needs,
+                            provides,
+                            # Solutions must copy it before modifying it.
+                            nx.freeze(pruned_dag),
+                            tuple(steps),
+                            asked_outs=outputs is not None,
+                            comments=op_comments,
+                        )
+
+                        self._cached_plans[cache_key] = plan
+                        log.debug("... compile cache-updated key: %s", cache_key)
 
             ok = True
             return plan
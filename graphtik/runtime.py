@@ -0,0 +1,380 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+A shared :term:`execution runtime` scheduling fairly the tasks of concurrent solutions,
+and a pool routing tasks by the :term:`execution kind` of their operations.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.runtime import *
+    >>> __name__ = "graphtik.runtime"
+"""
+import itertools as itt
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, List, Mapping, Optional
+
+log = logging.getLogger(__name__)
+
+#: The fairness policies for picking the next :class:`Tenant` to dispatch a task from.
+policies = ("round-robin", "weighted", "earliest-deadline")
+
+_current_tenant: ContextVar[Optional["Tenant"]] = ContextVar(
+    "current_tenant", default=None
+)
+
+
+class Tenant:
+    """
+    The queue of tasks submitted within a :meth:`Runtime.session()` (or a thread).
+
+    :ivar priority:
+        tenants with higher priority are always served first
+    :ivar weight:
+        the share of dispatches, for the ``weighted`` policy
+    :ivar deadline:
+        the :func:`time.monotonic()` timestamp, for the ``earliest-deadline`` policy
+    """
+
+    _ids = itt.count()
+
+    def __init__(self, name=None, priority=0, weight=1, deadline=None):
+        if not weight > 0:
+            raise ValueError(f"`weight` must be positive, got: {weight!r}")
+        self.name = f"tenant-{next(self._ids)}" if name is None else name
+        self.priority = priority
+        self.weight = weight
+        self.deadline = deadline
+        self.queue = deque()
+        #: how many tasks dispatched so far
+        self.served = 0
+
+    def __repr__(self):
+        return (
+            f"Tenant({self.name!r}, priority={self.priority}, "
+            f"weight={self.weight}, queued={len(self.queue)})"
+        )
+
+
+class RuntimeTask:
+    """Mimic :class:`multiprocessing.pool.AsyncResult` for tasks queued in a :class:`Runtime`."""
+
+    __slots__ = ("_done", "_value", "_error")
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = self._error = None
+
+    def _set(self, value=None, error=None):
+        self._value, self._error = value, error
+        self._done.set()
+
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def successful(self) -> bool:
+        if not self.ready():
+            raise ValueError(f"{self} not ready")
+        return self._error is None
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+
+    def get(self, timeout=None) -> Any:
+        if not self._done.wait(timeout):
+            raise TimeoutError()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class Runtime:
+    """
+    A process-wide :term:`execution pool` scheduling the tasks of many solutions into another pool.
+
+    Parallel operations submitted by all solutions computing within a :meth:`session()`
+    (or with this instance plugged as the :term:`execution pool`)
+    are queued per :class:`Tenant`, and dispatched into the wrapped `pool`
+    keeping at most `max_in_flight` of them running, picking tenants
+    by priority, and then by the `policy`:
+
+    - ``round-robin``: take turns,
+    - ``weighted``: the one with least dispatched tasks per weight,
+    - ``earliest-deadline``: the one with the earliest deadline (none is last).
+
+    **Example:**
+
+        >>> from multiprocessing.dummy import Pool
+        >>> from graphtik import compose, operation
+
+        >>> pipe = compose(
+        ...     "fair",
+        ...     operation(lambda a: a + 1, "inc", needs="a", provides="b", parallel=True),
+        ... )
+        >>> runtime = Runtime(Pool(2), max_in_flight=2, policy="weighted")
+        >>> with runtime.session(weight=3):
+        ...     pipe.compute({"a": 1})
+        {'a': 1, 'b': 2}
+        >>> runtime.stats
+        {'submitted': 1, 'completed': 1, 'max_queued': 1}
+    """
+
+    def __init__(
+        self,
+        pool,
+        *,
+        max_in_flight: int = None,
+        max_queued: int = None,
+        policy: str = "round-robin",
+    ):
+        """
+        :param pool:
+            a :mod:`multiprocessing` like pool with ``apply_async()`` & callbacks
+        :param max_in_flight:
+            tasks running in `pool` at any time (default: its size, or the cpu-count)
+        :param max_queued:
+            if given, submitting solutions block while that many tasks are queued
+            (backpressure)
+        :param policy:
+            one of :data:`policies`
+        """
+        if policy not in policies:
+            raise ValueError(f"Unknown policy {policy!r}, not one of: {policies}")
+        if max_in_flight is None:
+            max_in_flight = getattr(pool, "_processes", None) or os.cpu_count() or 1
+        if not isinstance(max_in_flight, int) or max_in_flight < 1:
+            raise ValueError(
+                f"`max_in_flight` must be a positive integer, got: {max_in_flight!r}"
+            )
+        self.pool = pool
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.policy = policy
+        self._cond = threading.Condition()
+        #: tenants with queued tasks, in arrival order (rotated for round-robin)
+        self._active = []
+        self._in_flight = 0
+        self._queued = 0
+        self._thread_tenants = threading.local()
+        #: Counters of tasks.
+        self.stats = dict.fromkeys("submitted completed max_queued".split(), 0)
+
+    def __repr__(self):
+        return (
+            f"Runtime({self.policy!r}, in_flight={self._in_flight}/{self.max_in_flight}, "
+            f"queued={self._queued})"
+        )
+
+    @contextmanager
+    def session(self, *, name=None, priority=0, weight=1, deadline: float = None):
+        """
+        Plug this runtime as the :term:`execution pool`, queueing tasks in a new :class:`Tenant`.
+
+        :param deadline:
+            seconds from now, for the ``earliest-deadline`` policy
+        """
+        from .config import execution_pool_plugged
+
+        if deadline is not None:
+            deadline = time.monotonic() + deadline
+        tenant = Tenant(name, priority, weight, deadline)
+        token = _current_tenant.set(tenant)
+        try:
+            with execution_pool_plugged(self):
+                yield tenant
+        finally:
+            _current_tenant.reset(token)
+
+    def _tenant(self) -> Tenant:
+        tenant = _current_tenant.get()
+        if tenant is None:
+            tenant = getattr(self._thread_tenants, "tenant", None)
+            if tenant is None:
+                tenant = self._thread_tenants.tenant = Tenant(
+                    threading.current_thread().name
+                )
+        return tenant
+
+    def apply_async(self, fn: Callable, args=(), kwds=None) -> RuntimeTask:
+        """Queue a task for the tenant of the current session (or thread)."""
+        tenant = self._tenant()
+        task = RuntimeTask()
+        with self._cond:
+            if self.max_queued is not None:
+                self._cond.wait_for(lambda: self._queued < self.max_queued)
+            tenant.queue.append((fn, args, kwds or {}, task))
+            if tenant not in self._active:
+                self._active.append(tenant)
+            self._queued += 1
+            self.stats["submitted"] += 1
+            self.stats["max_queued"] = max(self.stats["max_queued"], self._queued)
+            self._dispatch()
+
+        return task
+
+    def _pick(self) -> Tenant:
+        top = max(t.priority for t in self._active)
+        candidates = [t for t in self._active if t.priority == top]
+        if self.policy == "weighted":
+            return min(candidates, key=lambda t: t.served / t.weight)
+        if self.policy == "earliest-deadline":
+            return min(
+                candidates,
+                key=lambda t: math.inf if t.deadline is None else t.deadline,
+            )
+        return candidates[0]
+
+    def _dispatch(self):
+        """Submit queued tasks into the pool, while room (call it holding the lock)."""
+        while self._active and self._in_flight < self.max_in_flight:
+            tenant = self._pick()
+            fn, args, kwds, task = tenant.queue.popleft()
+            tenant.served += 1
+            ## Rotate for round-robin, or drop if empty.
+            self._active.remove(tenant)
+            if tenant.queue:
+                self._active.append(tenant)
+            self._queued -= 1
+            self._in_flight += 1
+            self._cond.notify_all()
+
+            try:
+                self.pool.apply_async(
+                    fn,
+                    args,
+                    kwds,
+                    callback=lambda value, task=task: self._done(task, value),
+                    error_callback=lambda ex, task=task: self._done(task, error=ex),
+                )
+            except Exception as ex:
+                self._in_flight -= 1
+                task._set(error=ex)
+
+    def _done(self, task: RuntimeTask, value=None, error=None):
+        with self._cond:
+            self._in_flight -= 1
+            self.stats["completed"] += 1
+            self._dispatch()
+        task._set(value, error)
+
+
+class HybridPool:
+    """
+    An :term:`execution pool` routing the tasks of each operation by its :term:`execution kind`.
+
+    Parallel operations run in the pool of their :attr:`.FnOp.kind`
+    (e.g. a thread-pool for ``io``, a process-pool for ``cpu``),
+    or in the `default` pool, if none for their kind (or kind-less),
+    so that a single execution overlaps I/O with CPU work.
+    Operations of ``inline`` kind run in the executor's thread, always.
+
+    **Example:**
+
+        >>> from multiprocessing.dummy import Pool
+        >>> from graphtik import compose, operation
+        >>> from graphtik.config import execution_pool_plugged
+
+        >>> pipe = compose(
+        ...     "hybrid",
+        ...     operation(lambda a: a + 1, "fetch", needs="a", provides="b", kind="io"),
+        ...     operation(lambda b: b * 2, "crunch", needs="b", provides="c", kind="cpu"),
+        ...     operation(
+        ...         str, "format", needs="c", provides="s", node_props={"kind": "inline"}
+        ...     ),
+        ... )
+        >>> with HybridPool({"io": Pool(4), "cpu": Pool(2)}) as pool:
+        ...     with execution_pool_plugged(pool):
+        ...         pipe.compute({"a": 1})
+        {'a': 1, 'b': 2, 'c': 4, 's': '4'}
+    """
+
+    def __init__(self, pools: Mapping[str, Any], default=None):
+        """
+        :param pools:
+            the :mod:`multiprocessing` like pools, by kind (not ``inline``)
+        :param default:
+            the pool for operations of other kinds, or none
+            (default: the ``cpu`` pool, if any)
+
+        :raises ValueError:
+            if no pool given, or given for ``inline`` kind
+        """
+        if not pools and default is None:
+            raise ValueError("No pools given!")
+        if "inline" in pools:
+            raise ValueError("Operations of `inline` kind run in the executor's thread!")
+        self.pools = dict(pools)
+        self.default = pools.get("cpu") if default is None else default
+
+    def __repr__(self):
+        return f"HybridPool({list(self.pools)}, default={self.default!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exinfo):
+        self.terminate()
+
+    @property
+    def _all(self) -> list:
+        """The distinct pools."""
+        pools = [*self.pools.values(), self.default]
+        return [p for i, p in enumerate(pools) if p is not None and p not in pools[:i]]
+
+    @property
+    def _processes(self) -> int:
+        """The total size of the pools, read by :class:`.Runtime`."""
+        return sum(getattr(p, "_processes", None) or 1 for p in self._all)
+
+    def route(self, op):
+        """
+        The pool for the tasks of `op`, by its :term:`execution kind`.
+
+        Called by the executor for each parallel operation.
+        """
+        from .execution import _op_kind
+
+        return self.pools.get(_op_kind(op), self.default)
+
+    def apply_async(self, fn: Callable, args=(), kwds=None, **kw):
+        """Submit tasks not :meth:`route()`\\d to the `default` pool."""
+        if self.default is None:
+            raise RuntimeError(f"No default pool in {self}!")
+        return self.default.apply_async(fn, args, kwds or {}, **kw)
+
+    def _hooks(self, name) -> List[Callable]:
+        return [getattr(p, name) for p in self._all if hasattr(p, name)]
+
+    def place(self, plan):
+        for place in self._hooks("place"):
+            place(plan)
+
+    def pull(self, values, keys=None) -> dict:
+        for pull in self._hooks("pull"):
+            values = pull(values, keys)
+        return values
+
+    def collect(self, solution):
+        for collect in self._hooks("collect"):
+            collect(solution)
+
+    def close(self):
+        for pool in self._all:
+            pool.close()
+
+    def terminate(self):
+        for pool in self._all:
+            pool.terminate()
+
+    def join(self):
+        for pool in self._all:
+            pool.join()
@@ -0,0 +1,480 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Serve a warm pipeline over a local socket, in :term:`service mode`.
+
+Launch it from the command-line with::
+
+    python -m graphtik serve my.module:pipeline --address unix:/tmp/pipe.sock --plan "a,b->c"
+
+and :term:`compute` through a :class:`Client`.
+
+.. Warning::
+    Requests in the :mod:`pickle` payload may execute arbitrary code in the server,
+    so they are accepted only over Unix sockets, or with the server's `authkey`
+    (the default JSON payload is always accepted).
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.serve import *
+    >>> __name__ = "graphtik.serve"
+"""
+import hmac
+import http.client
+import http.server
+import importlib
+import json
+import logging
+import os
+import pickle
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Iterable, Mapping, Tuple, Union
+
+from .base import UNSET, Items, aslist
+
+log = logging.getLogger(__name__)
+
+#: The compact binary payload, accepted only from trusted clients (see :func:`make_server()`).
+PICKLE_TYPE = "application/x-pickle"
+#: The textual payload (the default), for values serializable to JSON.
+JSON_TYPE = "application/json"
+#: The HTTP header with the `authkey` of the server, to accept :data:`PICKLE_TYPE` payloads.
+AUTHKEY_HEADER = "X-Graphtik-Authkey"
+
+#: content-type --> (decode(bytes) --> object, encode(object) --> bytes)
+codecs = {
+    PICKLE_TYPE: (pickle.loads, lambda o: pickle.dumps(o, pickle.HIGHEST_PROTOCOL)),
+    JSON_TYPE: (json.loads, lambda o: json.dumps(o).encode("utf-8")),
+}
+
+
+def _authkey_token(authkey: Union[str, bytes]) -> str:
+    """The `authkey` as sent in the :data:`AUTHKEY_HEADER` (bytes hex-encoded)."""
+    return authkey.hex() if isinstance(authkey, bytes) else authkey
+
+
+class ServiceError(Exception):
+    """A request failed in the :term:`service mode` server (status code in ``args[1]``)."""
+
+
+class ServiceOverloaded(ServiceError):
+    """Too many requests queued in the server, retry later."""
+
+
+def load_pipeline(spec: str) -> "Pipeline":
+    """
+    Import a pipeline from a ``<module>:<attribute>`` path (attribute may be dotted).
+
+    :raises ValueError:
+        if `spec` is not a ``<module>:<attribute>`` path
+    :raises TypeError:
+        if the object loaded cannot ``compute()``
+
+    **Example:**
+
+        >>> load_pipeline("graphtik.serve:load_pipeline")
+        Traceback (most recent call last):
+        TypeError: Expected a pipeline at 'graphtik.serve:load_pipeline', got: <function load_pipeline at ...>
+    """
+    modname, sep, attrs = spec.partition(":")
+    if not (modname and sep and attrs):
+        raise ValueError(f"Expected a `<module>:<pipeline>` path, got: {spec!r}")
+
+    obj = importlib.import_module(modname)
+    for attr in attrs.split("."):
+        obj = getattr(obj, attr)
+    if not callable(getattr(obj, "compute", None)):
+        raise TypeError(f"Expected a pipeline at {spec!r}, got: {obj!r}")
+
+    return obj
+
+
+def parse_plan(spec: str) -> Tuple[list, list]:
+    """
+    Parse ``"<input>,...-><output>,..."`` into 2 lists.
+
+    **Example:**
+
+        >>> parse_plan("a, b->c")
+        (['a', 'b'], ['c'])
+    """
+    inputs, sep, outputs = spec.partition("->")
+    if not sep:
+        raise ValueError(f"Expected a plan like `<inputs>-><outputs>`, got: {spec!r}")
+
+    def split(names):
+        return [n.strip() for n in names.split(",") if n.strip()]
+
+    return split(inputs), split(outputs)
+
+
+class PipelineService:
+    """
+    Compute requests on a pipeline loaded once, with its plans precompiled.
+
+    Requests are computed in a pool of worker threads, queueing up
+    to `max_queued` more of them;  any more are rejected with :class:`ServiceOverloaded`.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+
+        >>> pipe = compose("svc", operation(lambda a: a + 1, "inc", needs="a", provides="b"))
+        >>> service = PipelineService(pipe, plans=[(["a"], ["b"])])
+        >>> service.compute({"a": 1}, "b")
+        {'b': 2}
+        >>> service.health()
+        {'status': 'ok', 'pipeline': 'svc', 'in_flight': 0, 'workers': 4, 'max_queued': 64}
+        >>> service.close()
+    """
+
+    def __init__(
+        self,
+        pipeline: "Pipeline",
+        *,
+        workers: int = 4,
+        max_queued: int = 64,
+        plans: Iterable[Tuple[Items, Items]] = (),
+    ):
+        """
+        :param workers:
+            the number of threads computing requests
+        :param max_queued:
+            how many requests may wait for a free worker
+        :param plans:
+            pairs of (inputs, outputs) to :meth:`.Pipeline.compile()` on start,
+            to warm up its cache of plans
+        """
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError(f"`workers` must be a positive integer, got: {workers!r}")
+        if not isinstance(max_queued, int) or max_queued < 0:
+            raise ValueError(
+                f"`max_queued` must be a non-negative integer, got: {max_queued!r}"
+            )
+        self.pipeline = pipeline
+        self.workers = workers
+        self.max_queued = max_queued
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="graphtik-serve")
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        #: Counters & timings exposed in :meth:`metrics()`.
+        self.stats = dict.fromkeys(
+            "requests failures rejected seconds_total plans_compiled".split(), 0
+        )
+
+        for inputs, outputs in plans:
+            log.info("Precompiling %s: %s --> %s", pipeline.name, inputs, outputs)
+            pipeline.compile(inputs, outputs)
+            self.stats["plans_compiled"] += 1
+
+    def __repr__(self):
+        return f"PipelineService({self.pipeline.name!r}, workers={self.workers})"
+
+    def compute(self, named_inputs: Mapping, outputs: Items = UNSET) -> dict:
+        """
+        Compute a request in a worker, and return its `outputs` (or all values, if `None`).
+
+        :raises ServiceOverloaded:
+            if all workers & queue slots are taken
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise ServiceOverloaded(
+                f"{self} overloaded with {self._in_flight} requests!", 503
+            )
+        try:
+            with self._lock:
+                self._in_flight += 1
+                self.stats["requests"] += 1
+            fut = self._pool.submit(
+                copy_context().run, self._compute, named_inputs, outputs
+            )
+            return fut.result()
+        except Exception:
+            with self._lock:
+                self.stats["failures"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _compute(self, named_inputs, outputs) -> dict:
+        start = time.perf_counter()
+        try:
+            sol = self.pipeline.compute(named_inputs, outputs)
+            return dict(sol)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stats["seconds_total"] += elapsed
+
+    def health(self) -> dict:
+        return {
+            "status": "ok",
+            "pipeline": self.pipeline.name,
+            "in_flight": self._in_flight,
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+        }
+
+    def metrics(self) -> str:
+        """The :attr:`stats` in *Prometheus* text format."""
+        stats = {**self.stats, "in_flight": self._in_flight}
+        return "".join(f"graphtik_serve_{k} {v}\n" for k, v in stats.items())
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Route ``GET /health``, ``GET /metrics`` & ``POST /compute`` to the server's service."""
+
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self):
+        # Unix-socket clients have no address.
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        log.debug("%s - " + format, self.address_string(), *args)
+
+    def _reply(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._reply(200, codecs[JSON_TYPE][1](service.health()), JSON_TYPE)
+        elif self.path == "/metrics":
+            self._reply(200, service.metrics().encode("utf-8"), "text/plain")
+        else:
+            self._reply(404, b"Not found", "text/plain")
+
+    def _is_trusted(self) -> bool:
+        """Unix-socket clients, or those sending the server's `authkey`."""
+        if isinstance(self.server, _UnixServer):
+            return True
+        authkey = getattr(self.server, "authkey", None)
+        token = self.headers.get(AUTHKEY_HEADER)
+        return bool(authkey and token) and hmac.compare_digest(
+            token.encode("utf-8"), _authkey_token(authkey).encode("utf-8")
+        )
+
+    def do_POST(self):
+        if self.path != "/compute":
+            self._reply(404, b"Not found", "text/plain")
+            return
+
+        content_type = self.headers.get("Content-Type", JSON_TYPE)
+        if content_type not in codecs:
+            self._reply(415, f"Unknown payload {content_type!r}".encode(), "text/plain")
+            return
+        if content_type == PICKLE_TYPE and not self._is_trusted():
+            self._reply(
+                403,
+                b"Pickled payloads need a Unix socket, or the server's authkey",
+                "text/plain",
+            )
+            return
+        decode, encode = codecs[content_type]
+
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            request = decode(body)
+            named_inputs = request["inputs"]
+            outputs = request.get("outputs", UNSET)
+        except Exception as ex:
+            self._reply(400, encode({"error": f"Bad request: {ex}"}), content_type)
+            return
+
+        try:
+            results = self.server.service.compute(named_inputs, outputs)
+            status, reply = 200, {"outputs": results}
+        except ServiceOverloaded as ex:
+            status, reply = 503, {"error": str(ex.args[0])}
+        except Exception as ex:
+            status, reply = 500, {"error": f"{type(ex).__name__}: {ex}"}
+        try:
+            body = encode(reply)
+        except Exception as ex:
+            status, content_type = 500, JSON_TYPE
+            body = codecs[JSON_TYPE][1](
+                {"error": f"Cannot encode reply: {type(ex).__name__}: {ex}"}
+            )
+        self._reply(status, body, content_type)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(
+    service: PipelineService, address: str, *, authkey: Union[str, bytes] = None
+) -> socketserver.BaseServer:
+    """
+    Bind a (not yet started) HTTP server for the `service` on the `address`.
+
+    :param address:
+        ``unix:<path>`` for a Unix socket, or ``[<host>]:<port>`` for HTTP
+        (host defaults to ``127.0.0.1``, port 0 picks a free one)
+    :param authkey:
+        the secret that HTTP clients must send to post :data:`PICKLE_TYPE` payloads
+        (Unix-socket clients are trusted);  if not given, only JSON is accepted over HTTP
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:") :]
+        if os.path.exists(path):
+            os.unlink(path)
+        server = _UnixServer(path, _Handler)
+    else:
+        host, _, port = address.rpartition(":")
+        server = _TCPServer((host or "127.0.0.1", int(port)), _Handler)
+    server.service = service
+    server.authkey = authkey
+
+    return server
+
+
+def serve(
+    spec: str,
+    address: str = "127.0.0.1:8765",
+    *,
+    workers: int = 4,
+    max_queued: int = 64,
+    plans: Iterable[str] = (),
+    authkey: Union[str, bytes] = None,
+):
+    """
+    Load the pipeline at `spec` (see :func:`load_pipeline()`) and serve it until interrupted.
+
+    :param plans:
+        ``"<inputs>-><outputs>"`` strings of the plans to precompile (see :func:`parse_plan()`)
+    :param authkey:
+        (default: ``$GRAPHTIK_AUTHKEY``, if set) see :func:`make_server()`
+
+    Rest params as in :class:`PipelineService` & :func:`make_server()`.
+    """
+    service = PipelineService(
+        load_pipeline(spec),
+        workers=workers,
+        max_queued=max_queued,
+        plans=[parse_plan(p) for p in plans],
+    )
+    if authkey is None:
+        from .distributed import AUTHKEY_ENVVAR
+
+        authkey = os.environ.get(AUTHKEY_ENVVAR) or None
+    server = make_server(service, address, authkey=authkey)
+    log.info("Serving %s on %s ...", service, address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, **kw):
+        super().__init__("localhost", **kw)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class Client:
+    """
+    Compute on a pipeline served on `address` (see :func:`make_server()`).
+
+    :param content_type:
+        the payload for the requests, one of :data:`codecs`
+    :param authkey:
+        the server's secret, needed to send :data:`PICKLE_TYPE` payloads over HTTP
+    """
+
+    def __init__(
+        self, address: str, *, content_type=JSON_TYPE, authkey=None, timeout=None
+    ):
+        if content_type not in codecs:
+            raise ValueError(
+                f"Unknown payload {content_type!r}, not one of: {list(codecs)}"
+            )
+        self.address = address
+        self.content_type = content_type
+        self.authkey = authkey
+        self.timeout = timeout
+
+    def __repr__(self):
+        return f"Client({self.address!r})"
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.address.startswith("unix:"):
+            return _UnixConnection(self.address[len("unix:") :], timeout=self.timeout)
+        host, _, port = self.address.rpartition(":")
+        return http.client.HTTPConnection(
+            host or "127.0.0.1", int(port), timeout=self.timeout
+        )
+
+    def _request(self, method, path, body=None) -> Tuple[int, str, bytes]:
+        conn = self._connect()
+        try:
+            headers = {"Content-Type": self.content_type} if body is not None else {}
+            if self.authkey:
+                headers[AUTHKEY_HEADER] = _authkey_token(self.authkey)
+            conn.request(method, path, body, headers)
+            resp = conn.getresponse()
+            return resp.status, resp.getheader("Content-Type"), resp.read()
+        finally:
+            conn.close()
+
+    def compute(self, named_inputs: Mapping, outputs: Items = UNSET) -> dict:
+        """
+        :raises ServiceOverloaded:
+            when the server has no free workers or queue slots
+        :raises ServiceError:
+            if the computation failed in the server
+        """
+        encode = codecs[self.content_type][1]
+        request = {"inputs": dict(named_inputs)}
+        if outputs != UNSET:
+            request["outputs"] = None if outputs is None else aslist(outputs, "outputs")
+        status, content_type, body = self._request(
+            "POST", "/compute", encode(request)
+        )
+        if content_type not in codecs:
+            raise ServiceError(body.decode("utf-8", errors="replace"), status)
+        reply = codecs[content_type][0](body)
+        if status == 503:
+            raise ServiceOverloaded(reply["error"], status)
+        if status != 200:
+            raise ServiceError(reply["error"], status)
+        return reply["outputs"]
+
+    def health(self) -> Any:
+        return json.loads(self._request("GET", "/health")[2])
+
+    def metrics(self) -> str:
+        return self._request("GET", "/metrics")[2].decode("utf-8")
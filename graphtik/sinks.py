@@ -0,0 +1,124 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+:term:`sink`\\s to persist asked outputs as soon as produced, and free their memory.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.sinks import *
+    >>> __name__ = "graphtik.sinks"
+"""
+import importlib.util
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Callable, Union
+
+log = logging.getLogger(__name__)
+
+#: A writer receiving ``(dependency, value)`` and returning a reference
+#: to keep in the :term:`solution` in place of the value (e.g. a path).
+Sink = Callable[[str, Any], Any]
+
+
+def _write_npy(path: Path, value):
+    import numpy as np
+
+    np.save(path, value)
+
+
+def _write_parquet(path: Path, value):
+    value.to_parquet(path)
+
+
+def _write_pickle(path: Path, value):
+    with open(path, "wb") as fout:
+        pickle.dump(value, fout, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+#: The writers for the file-types supported, keyed by (lower-case) suffix.
+file_writers = {
+    ".npy": _write_npy,
+    ".parquet": _write_parquet,
+    ".pkl": _write_pickle,
+    ".pickle": _write_pickle,
+}
+
+
+def _has_parquet_engine() -> bool:
+    return any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet"))
+
+
+class FileSink:
+    """
+    A :term:`sink` writing values into a file, and returning its path.
+
+    The file-type is decided by the suffix of the `path`, among :data:`file_writers`:
+
+    - ``.npy``: a :mod:`numpy` array, with :func:`numpy.save()`;
+    - ``.parquet``: a :mod:`pandas` dataframe (if *pyarrow* or *fastparquet* installed);
+    - ``.pkl`` / ``.pickle``: any picklable value.
+
+    Any missing parent folders are created when writing.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], writer: Callable = None):
+        """
+        :param path:
+            the file to write into
+        :param writer:
+            a callable ``(path, value)`` to use, instead of the one for the suffix
+
+        :raises ValueError:
+            if suffix of `path` unknown, or no parquet engine is installed
+        """
+        self.path = Path(path)
+        if writer is None:
+            suffix = self.path.suffix.lower()
+            writer = file_writers.get(suffix)
+            if writer is None:
+                raise ValueError(
+                    f"Unknown sink file-type {suffix!r} for {str(path)!r}"
+                    f"\n  +--supported file-types: {list(file_writers)}"
+                )
+            if writer is _write_parquet and not _has_parquet_engine():
+                raise ValueError(
+                    f"Parquet sink {str(path)!r} needs `pyarrow` or `fastparquet` installed!"
+                )
+        self.writer = writer
+
+    def __call__(self, dep: str, value) -> Path:
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.writer(path, value)
+        log.debug("... sunk '%s' into: %s", dep, path)
+
+        return path
+
+    def __repr__(self):
+        return f"FileSink({str(self.path)!r})"
+
+
+def as_sink(sink: Union[Sink, str, os.PathLike]) -> Sink:
+    """
+    Return a callable `sink` as is, or a :class:`FileSink` for a file path.
+
+    :raises TypeError:
+        if `sink` is neither callable nor a path
+
+    **Example:**
+
+        >>> as_sink("out/a.pkl")
+        FileSink('out/a.pkl')
+        >>> as_sink(print)
+        <built-in function print>
+    """
+    if isinstance(sink, (str, os.PathLike)):
+        return FileSink(sink)
+    if not callable(sink):
+        raise TypeError(f"Expected a callable or a file-path as sink, got: {sink!r}")
+    return sink
@@ -0,0 +1,150 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+:term:`lazy input`\\s, loaded only when the 1st operation needing them is about to run.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.sources import *
+    >>> __name__ = "graphtik.sources"
+"""
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Callable, Dict, Union
+
+log = logging.getLogger(__name__)
+
+
+class lazy:
+    """
+    A thunk for an input value, loaded only if & when an operation needs it.
+
+    Give it as the value of some input in ``named_inputs``; the :term:`solution`
+    calls `load_fn` (with any `args` & `kwargs`) right before the 1st operation
+    consuming it executes, and keeps the loaded value in its place
+    (subject to :term:`eviction` as usual); if pruned, it is never called.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation, lazy
+
+        >>> def load_big():
+        ...     print("loading...")
+        ...     return 10
+
+        >>> pipe = compose(
+        ...     "lazies",
+        ...     operation(lambda a: a + 1, "inc", needs="a", provides="a1"),
+        ...     operation(lambda b: b * 2, "double", needs="b", provides="b2"),
+        ... )
+        >>> pipe.compute({"a": lazy(load_big), "b": 1}, "b2")
+        {'b2': 2}
+        >>> pipe.compute({"a": lazy(load_big), "b": 1}, "a1")
+        loading...
+        {'a1': 11}
+    """
+
+    __slots__ = ("load_fn", "args", "kwargs")
+
+    def __init__(self, load_fn: Callable, *args, **kwargs):
+        if not callable(load_fn):
+            raise TypeError(f"Expected a callable loader, got: {load_fn!r}")
+        self.load_fn = load_fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self):
+        return self.load_fn(*self.args, **self.kwargs)
+
+    def __repr__(self):
+        args = [repr(a) for a in self.args]
+        args.extend(f"{k}={v!r}" for k, v in self.kwargs.items())
+        fn_name = getattr(self.load_fn, "__qualname__", None) or repr(self.load_fn)
+        return f"lazy({', '.join([fn_name, *args])})"
+
+
+def _read_npy(path: Path):
+    import numpy as np
+
+    return np.load(path)
+
+
+def _read_parquet(path: Path):
+    import pandas as pd
+
+    return pd.read_parquet(path)
+
+
+def _read_pickle(path: Path):
+    with open(path, "rb") as fin:
+        return pickle.load(fin)
+
+
+#: The readers for the file-types supported, keyed by (lower-case) suffix,
+#: mirroring :data:`.sinks.file_writers`.
+file_readers = {
+    ".npy": _read_npy,
+    ".parquet": _read_parquet,
+    ".pkl": _read_pickle,
+    ".pickle": _read_pickle,
+}
+
+
+def dir_source(
+    path: Union[str, os.PathLike], pattern="*", readers: Dict[str, Callable] = None
+) -> Dict[str, lazy]:
+    """
+    A mapping of all readable files in folder `path` into :class:`lazy` inputs.
+
+    :param path:
+        the folder to scan (not recursively, unless `pattern` is like ``**/*``)
+    :param pattern:
+        a :meth:`pathlib.Path.glob()` pattern to select files
+    :param readers:
+        extra ``{suffix: reader(path)}`` to use along with :data:`file_readers`
+    :return:
+        a dict of ``{<file-stem>: lazy(reader, <file-path>)}``,
+        for files with a known suffix (the rest are ignored),
+        to use as (or to update) the `named_inputs` of a computation
+
+    :raises ValueError:
+        if two files have the same stem
+
+    **Example:**
+
+        >>> import tempfile, pickle, pathlib
+        >>> tmpdir = pathlib.Path(tempfile.mkdtemp())
+        >>> _ = (tmpdir / "a.pkl").write_bytes(pickle.dumps(1))
+        >>> _ = (tmpdir / "notes.txt").write_text("ignored")
+
+        >>> inputs = dir_source(tmpdir)
+        >>> list(inputs)
+        ['a']
+        >>> inputs["a"]()
+        1
+    """
+    if readers:
+        readers = {**file_readers, **{k.lower(): v for k, v in readers.items()}}
+    else:
+        readers = file_readers
+
+    source = {}
+    for fpath in sorted(Path(path).glob(pattern)):
+        reader = readers.get(fpath.suffix.lower())
+        if not reader or not fpath.is_file():
+            continue
+        key = fpath.stem
+        if key in source:
+            raise ValueError(
+                f"Duplicate input {key!r} in source folder {str(path)!r}:"
+                f"\n  +--{source[key].args[0]}\n  +--{fpath}"
+            )
+        source[key] = lazy(reader, fpath)
+    log.debug("Source folder %r provides lazy inputs: %s", str(path), list(source))
+
+    return source
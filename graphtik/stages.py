@@ -0,0 +1,105 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Gate operations to compute records in input order, for :term:`pipelined execution`.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.stages import *
+    >>> __name__ = "graphtik.stages"
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Tuple
+
+log = logging.getLogger(__name__)
+
+
+def _split_callbacks(callbacks) -> Tuple[Callable, Callable]:
+    """Make `callbacks` a 2-tuple with possibly None callables, as the executor does."""
+    if callbacks is None:
+        return None, None
+    if callable(callbacks):
+        return callbacks, None
+    callbacks = tuple(callbacks)
+    return (callbacks + (None, None))[:2]
+
+
+class StageGates:
+    """
+    Let each operation (stage) compute the records of a stream in their input order.
+
+    Records are numbered by the order they were fed, and the :term:`callbacks`
+    returned by :meth:`callbacks()` block a record from entering an operation
+    until all previous records have either passed that operation, or :meth:`finish`\\ed
+    (e.g. when failed, or not needing that operation).
+
+    **Example:**
+
+        >>> gates = StageGates()
+        >>> gates.enter("op", 0); gates.leave("op", 0)
+        >>> gates.enter("op", 1)  # would block, if record 0 had not passed "op".
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        #: op-name --> the numbers of records that have passed it (above :attr:`_low`).
+        self._passed = defaultdict(set)
+        #: the numbers of finished records (above :attr:`_low`).
+        self._finished = set()
+        #: all records numbered below this have finished.
+        self._low = 0
+
+    def __repr__(self):
+        return f"StageGates(low={self._low}, finished={sorted(self._finished)})"
+
+    def _ready(self, op_name: str, seq: int) -> bool:
+        passed, finished = self._passed[op_name], self._finished
+        return all(j in passed or j in finished for j in range(self._low, seq))
+
+    def enter(self, op_name: str, seq: int):
+        """Block until all records before `seq` have passed `op_name` (or finished)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._ready(op_name, seq))
+
+    def leave(self, op_name: str, seq: int):
+        """Record `seq` has passed `op_name`."""
+        with self._cond:
+            self._passed[op_name].add(seq)
+            self._cond.notify_all()
+
+    def finish(self, seq: int):
+        """Record `seq` has passed all its operations (or failed)."""
+        with self._cond:
+            self._finished.add(seq)
+            while self._low in self._finished:
+                self._finished.discard(self._low)
+                for seqs in self._passed.values():
+                    seqs.discard(self._low)
+                self._low += 1
+            self._cond.notify_all()
+
+    def callbacks(self, seq: int, callbacks=None) -> Tuple[Callable, Callable]:
+        """
+        The pre/post :term:`callbacks` gating the operations of record `seq`.
+
+        :param callbacks:
+            any user callbacks (a callable or a 2-tuple), called within the gates
+        """
+        user_pre, user_post = _split_callbacks(callbacks)
+
+        def pre_cb(op_cb):
+            self.enter(op_cb.op.name, seq)
+            if user_pre:
+                user_pre(op_cb)
+
+        def post_cb(op_cb):
+            if user_post:
+                user_post(op_cb)
+            self.leave(op_cb.op.name, seq)
+
+        return pre_cb, post_cb
@@ -0,0 +1,195 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+:term:`streaming operation`\\s passing their outputs downstream chunk by chunk.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.streams import *
+    >>> __name__ = "graphtik.streams"
+"""
+import logging
+import queue
+import threading
+from contextvars import copy_context
+from itertools import chain
+from typing import Any, Iterable, Iterator
+
+log = logging.getLogger(__name__)
+
+#: The size of the bounded queue for operations with ``streaming=True``.
+default_queue_size = 4
+
+_CHUNK, _END, _ERROR = range(3)
+
+
+def concat_chunks(chunks: Iterable) -> Any:
+    """
+    Materialize `chunks` into a single value, combined according to the type of the 1st one.
+
+    - :mod:`numpy` arrays are concatenated (along the 1st axis),
+    - :mod:`pandas` series & dataframes are concatenated (along rows),
+    - strings & bytes are joined,
+    - lists & tuples are chained into a list,
+    - anything else is collected into a list.
+
+    **Example:**
+
+        >>> concat_chunks(["ab", "c"])
+        'abc'
+        >>> concat_chunks([[1, 2], (3,)])
+        [1, 2, 3]
+        >>> concat_chunks([1, 2])
+        [1, 2]
+    """
+    chunks = list(chunks)
+    if not chunks:
+        return []
+
+    first = chunks[0]
+    mod = type(first).__module__
+    if mod.startswith("numpy"):
+        import numpy as np
+
+        return np.concatenate(chunks)
+    if mod.startswith("pandas"):
+        import pandas as pd
+
+        return pd.concat(chunks)
+    if isinstance(first, str):
+        return "".join(chunks)
+    if isinstance(first, (bytes, bytearray)):
+        return b"".join(chunks)
+    if isinstance(first, (list, tuple)):
+        return list(chain.from_iterable(chunks))
+
+    return chunks
+
+
+def stream_producer(ex: BaseException):
+    """The operation of the :class:`Stream` whose chunks raised `ex`, or None."""
+    return getattr(ex, "stream_producer", None)
+
+
+class Stream:
+    """
+    A single-pass iterable of chunks produced by a :term:`streaming operation`.
+
+    When `maxsize` is positive, iterating it starts a background thread
+    pulling chunks from the producer into a bounded queue, so that producer
+    and consumer work concurrently, keeping at most `maxsize` chunks in memory.
+    Errors of the producer are re-raised in the consumer, attributed
+    to the :attr:`producer` (see :func:`stream_producer()`).
+
+    Streams needed by more than one operation (or kept in the solution)
+    are :meth:`share`\\d, to collect their chunks in memory when 1st iterated,
+    and be iterated many times, so that they no longer bound memory:
+    **all their chunks are buffered**, until the stream is evicted.
+    """
+
+    def __init__(self, chunks: Iterable, maxsize: int = 0, producer=None):
+        self._chunks = chunks
+        self.maxsize = maxsize
+        #: The operation producing the chunks, blamed for their errors.
+        self.producer = producer
+        #: true once iterated (unless :attr:`shared`), since chunks are not kept around.
+        self.consumed = False
+        #: true if chunks are to be kept in memory, to be iterated many times.
+        self.shared = False
+        self._value = _END
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        state = ", shared" if self.shared else ", consumed" if self.consumed else ""
+        return f"Stream(maxsize={self.maxsize}{state})"
+
+    def __iter__(self) -> Iterator:
+        if self.shared:
+            with self._lock:
+                if not self.consumed:
+                    self._chunks = list(self._iter_once())
+            return iter(self._chunks)
+
+        return self._iter_once()
+
+    def _iter_once(self) -> Iterator:
+        if self.consumed:
+            raise RuntimeError(f"{self} already iterated!")
+        self.consumed = True
+
+        if self.maxsize > 0:
+            return self._iter_queued()
+        return self._iter_direct()
+
+    def _blame(self, ex: Exception) -> Exception:
+        """Attribute the error `ex` to the :attr:`producer`, unless to an upstream one."""
+        if self.producer is not None and stream_producer(ex) is None:
+            from .jetsam import save_jetsam
+
+            ex.stream_producer = self.producer
+            save_jetsam(ex, {"producer": self.producer}, operation="producer")
+        return ex
+
+    def _iter_direct(self) -> Iterator:
+        try:
+            yield from self._chunks
+        except Exception as ex:
+            raise self._blame(ex)
+
+    def _iter_queued(self) -> Iterator:
+        q = queue.Queue(self.maxsize)
+        stopped = threading.Event()
+
+        def put(item) -> bool:
+            while not stopped.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def pump():
+            try:
+                for chunk in self._chunks:
+                    if not put((_CHUNK, chunk)):
+                        return
+                put((_END, None))
+            except Exception as ex:
+                put((_ERROR, ex))
+
+        thread = threading.Thread(
+            target=copy_context().run, args=(pump,), name=f"{self}", daemon=True
+        )
+        thread.start()
+        try:
+            while True:
+                kind, item = q.get()
+                if kind == _CHUNK:
+                    yield item
+                elif kind == _END:
+                    break
+                else:
+                    raise self._blame(item)
+        finally:
+            ## Unblock producer, if consumer abandoned iteration.
+            stopped.set()
+
+    def share(self) -> "Stream":
+        """Keep chunks in memory when 1st iterated, to be iterated many times."""
+        if self.consumed and not self.shared:
+            raise RuntimeError(f"{self} already iterated!")
+        self.shared = True
+        return self
+
+    def materialize(self) -> Any:
+        """Combine all chunks with :func:`concat_chunks()` (memoized, if :attr:`shared`)."""
+        if not self.shared:
+            return concat_chunks(self)
+        with self._lock:
+            if self._value is _END:
+                self._value = concat_chunks(self)
+            return self._value
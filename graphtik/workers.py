@@ -0,0 +1,997 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""
+Process-pools of :term:`warm worker`\\s, with the pipeline preloaded, :term:`forked <forked workers>`,
+or keeping their outputs in an :term:`object store`, and pools of sub-interpreters.
+
+.. doctest::
+    :hide:
+
+    .. Workaround sphinx-doc/sphinx#6590
+
+    >>> from graphtik.workers import *
+    >>> __name__ = "graphtik.workers"
+"""
+import itertools as itt
+import logging
+import os
+import pickle
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Union
+
+log = logging.getLogger(__name__)
+
+#: The operations of the pipeline preloaded in this worker process, by name.
+_worker_ops: Mapping[str, "Operation"] = {}
+
+#: The solution values inherited by :term:`forked workers`, by their pool-id & `solid`.
+_fork_snapshots: Dict[tuple, dict] = {}
+_fork_ids = itt.count()
+
+
+def _dumps(obj) -> bytes:
+    """Pickle with :mod:`dill`, if installed, to support lambdas & closures."""
+    try:
+        import dill
+    except ImportError:
+        return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    return b"dill:" + dill.dumps(obj)
+
+
+def _loads(data: bytes):
+    if data.startswith(b"dill:"):
+        import dill
+
+        return dill.loads(data[len(b"dill:") :])
+    return pickle.loads(data)
+
+
+def _limit_memory(nbytes: int):
+    """Cap the address-space of this process (POSIX only)."""
+    import resource
+
+    _soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        nbytes = min(nbytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (nbytes, hard))
+
+
+def init_worker(pipeline: Union[str, bytes], memory_limit: Optional[int] = None):
+    """
+    The pool initializer loading the `pipeline` once per worker process.
+
+    :param pipeline:
+        a ``<module>:<pipeline>`` import path (see :func:`.serve.load_pipeline()`),
+        or the pickled pipeline
+    :param memory_limit:
+        if given, the max bytes of address-space (``RLIMIT_AS``) for the worker
+    """
+    global _worker_ops
+
+    if memory_limit:
+        _limit_memory(memory_limit)
+    if isinstance(pipeline, str):
+        from .serve import load_pipeline
+
+        pipeline = load_pipeline(pipeline)
+    else:
+        pipeline = _loads(pipeline)
+    _worker_ops = {op.name: op for op in pipeline.ops}
+    log.debug("Worker preloaded x%i ops of %s.", len(_worker_ops), pipeline.name)
+
+
+def compute_preloaded(op_name: str, inputs: dict, solid: str) -> dict:
+    """Compute the preloaded operation `op_name` in a worker (instead of shipping it)."""
+    from .execution import _OpTask
+
+    return _OpTask(_worker_ops[op_name], inputs, solid)()
+
+
+class WorkerPool:
+    """
+    A :mod:`multiprocessing` pool of workers with the pipeline preloaded, to plug as :term:`execution pool`.
+
+    Non-marshalled tasks of ops in the pipeline (with no :term:`callbacks`)
+    are sent to the workers as just the op name and the input values it needs
+    (see :func:`compute_preloaded()`), instead of the whole op & solution;
+    the rest of tasks (e.g. :term:`marshalling`) pass through as is.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+        >>> from graphtik.config import execution_pool_plugged
+
+        >>> pipe = compose(
+        ...     "warm",
+        ...     operation(max, "maxing", needs=["a", "b"], provides="c", parallel=True),
+        ... )
+        >>> with WorkerPool(pipe, 2) as pool, execution_pool_plugged(pool):  # doctest: +SKIP
+        ...     pipe.compute({"a": 1, "b": 2}, "c")
+        {'c': 2}
+    """
+
+    def __init__(
+        self,
+        pipeline: Union[str, "Pipeline"],
+        processes: int = None,
+        *,
+        maxtasksperchild: int = None,
+        memory_limit: int = None,
+        context=None,
+    ):
+        """
+        :param pipeline:
+            the pipeline (pickled once, with :mod:`dill`, if installed),
+            or its ``<module>:<pipeline>`` import path, to load in each worker
+        :param processes:
+            the number of workers (default: cpu-count)
+        :param maxtasksperchild:
+            recycle workers after that many tasks, to contain leaks
+        :param memory_limit:
+            the max bytes of address-space for each worker (POSIX only)
+        :param context:
+            a :mod:`multiprocessing` context (e.g. ``get_context("spawn")``)
+        """
+        import multiprocessing
+
+        if isinstance(pipeline, str):
+            from .serve import load_pipeline
+
+            payload = pipeline
+            pipeline = load_pipeline(pipeline)
+        else:
+            payload = _dumps(pipeline)
+        self.pipeline = pipeline
+        self._ops = {op.name: op for op in pipeline.ops}
+
+        ctx = context or multiprocessing
+        self.pool = ctx.Pool(
+            processes,
+            init_worker,
+            (payload, memory_limit),
+            maxtasksperchild=maxtasksperchild,
+        )
+        #: The number of workers, read by :class:`.Runtime`.
+        self._processes = self.pool._processes
+
+    def __repr__(self):
+        return f"WorkerPool({self.pipeline.name!r}, processes={self._processes})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exinfo):
+        self.terminate()
+
+    def _slim_task(self, fn: Callable, args: tuple) -> tuple:
+        """Replace :func:`._do_task()` of preloaded ops with :func:`compute_preloaded()`."""
+        from .execution import _do_task, _OpTask, _root_key
+
+        if fn is _do_task and len(args) == 1:
+            task = args[0]
+            if (
+                isinstance(task, _OpTask)
+                and self._ops.get(task.op.name) is task.op
+                and not any(task.callbacks)
+            ):
+                needed = {_root_key(n) for n in task.op.needs}
+                inputs = {k: v for k, v in task.sol.items() if k in needed}
+                return compute_preloaded, (task.op.name, inputs, task.solid)
+
+        return fn, args
+
+    def apply_async(self, fn, args=(), kwds=None, callback=None, error_callback=None):
+        fn, args = self._slim_task(fn, args)
+        return self.pool.apply_async(fn, args, kwds or {}, callback, error_callback)
+
+    def close(self):
+        self.pool.close()
+
+    def terminate(self):
+        self.pool.terminate()
+
+    def join(self):
+        self.pool.join()
+
+
+def compute_forked(fork_id: tuple, task: "_OpTask", keys: list) -> dict:
+    """Compute `task` in one of the :term:`forked workers`, adding the inherited values of `keys`."""
+    snapshot = _fork_snapshots[fork_id]
+    task.sol.update((k, snapshot[k]) for k in keys)
+
+    return task()
+
+
+class ForkPool:
+    """
+    A process-pool :term:`forked <forked workers>` per execution, inheriting its solution.
+
+    The workers are forked when the 1st task of each solution arrives,
+    and closed when its execution ends (on :meth:`collect()`), so that the next one
+    forks anew, inheriting its own values.
+    Values of a task still identical to those when forked are sent as just their keys,
+    to be read from the copy-on-write memory of the workers (see :func:`compute_forked()`),
+    and only later values, and outputs, are pickled.
+
+    Plug it to fork the workers for each :meth:`.Pipeline.compute()` (POSIX only):
+
+        >>> from graphtik import compose, operation
+        >>> from graphtik.config import execution_pool_plugged
+
+        >>> pipe = compose(
+        ...     "forked",
+        ...     operation(len, "counting", needs="table", provides="n", parallel=True),
+        ... )
+        >>> with ForkPool(2) as pool, execution_pool_plugged(pool):  # doctest: +SKIP
+        ...     pipe.compute({"table": list(range(10 ** 8))}, "n")
+        {'n': 100000000}
+    """
+
+    def __init__(self, processes: int = None):
+        """
+        :param processes:
+            the number of workers (default: cpu-count)
+        """
+        self.processes = processes
+        #: The number of workers, read by :class:`.Runtime`.
+        self._processes = processes or os.cpu_count() or 1
+        self._id = next(_fork_ids)
+        self._lock = threading.Lock()
+        #: The :mod:`multiprocessing` pools forked, by the (unique) :attr:`.Solution.solid`
+        #: of their execution (None for tasks not computing operations).
+        self.pools: Dict[Optional[str], object] = {}
+
+    def __repr__(self):
+        return f"ForkPool(processes={self._processes}, forked={len(self.pools)})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exinfo):
+        self.terminate()
+
+    def _fork(self, solid: Optional[str], snapshot: dict):
+        """Return the workers for the `solid` execution, forking them with `snapshot` if missing."""
+        import multiprocessing
+
+        with self._lock:
+            pool = self.pools.get(solid)
+            if pool is None:
+                _fork_snapshots[(self._id, solid)] = snapshot
+                ctx = multiprocessing.get_context("fork")
+                pool = self.pools[solid] = ctx.Pool(self.processes)
+                log.debug(
+                    "%s: forked for solution(%s) with values%s.",
+                    self,
+                    solid,
+                    list(snapshot),
+                )
+            return pool
+
+    def _split_task(self, fn: Callable, args: tuple) -> tuple:
+        """
+        Replace the inherited values of :func:`._do_task()` tasks with their keys.
+
+        :return:
+            the ``(pool, fn, args)`` to submit
+        """
+        from .execution import _do_task, _OpTask, _root_key
+
+        task = args[0] if fn is _do_task and len(args) == 1 else None
+        if not isinstance(task, _OpTask):
+            return self._fork(None, {}), fn, args
+
+        pool = self._fork(task.solid, dict(task.sol))
+        fork_id = (self._id, task.solid)
+        snapshot = _fork_snapshots[fork_id]
+        needed = {_root_key(n) for n in task.op.needs}
+        keys, values = [], {}
+        for k, v in task.sol.items():
+            if k in needed:
+                if k in snapshot and snapshot[k] is v:
+                    keys.append(k)
+                else:
+                    values[k] = v
+
+        return (
+            pool,
+            compute_forked,
+            (fork_id, _OpTask(task.op, values, task.solid, task.callbacks), keys),
+        )
+
+    def apply_async(self, fn, args=(), kwds=None, callback=None, error_callback=None):
+        pool, fn, args = self._split_task(fn, args)
+        return pool.apply_async(fn, args, kwds or {}, callback, error_callback)
+
+    def collect(self, solution):
+        """Close the workers forked for the `solution`, when its execution ends."""
+        with self._lock:
+            pool = self.pools.pop(solution.solid, None)
+            _fork_snapshots.pop((self._id, solution.solid), None)
+        if pool:
+            pool.close()
+            pool.join()
+
+    def _pop_pools(self) -> list:
+        with self._lock:
+            pools, self.pools = list(self.pools.items()), {}
+        for solid, _ in pools:
+            _fork_snapshots.pop((self._id, solid), None)
+        return [pool for _, pool in pools]
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+
+    def terminate(self):
+        for pool in self._pop_pools():
+            pool.terminate()
+
+    def join(self):
+        for pool in self._pop_pools():
+            pool.join()
+
+
+#: The values produced in this worker process, by the name of their handle.
+_stored: Dict[str, object] = {}
+#: The bytes of the values in :data:`_stored` copied into shared-memory segments
+#: (named as their handles), when 1st asked by another process.
+_published: Dict[str, int] = {}
+_store_lock = threading.Lock()
+#: The listener serving :data:`_stored` to other processes, started on 1st value.
+_store_server = None
+
+
+class ValueHandle:
+    """
+    A lightweight reference to a value kept in the :term:`object store`.
+
+    :ivar name:
+        the name of the value, and of its shared-memory segment, once published
+    :ivar owner:
+        the address of the worker keeping the live value
+        (of its store-server, or its data-server, when distributed)
+    :ivar size:
+        the estimated bytes of the value (see :func:`.estimate_size()`)
+    :ivar solid:
+        the :attr:`.Solution.solid` of the solution that produced it
+    """
+
+    __slots__ = ("name", "owner", "size", "solid")
+
+    def __init__(self, name: str, owner, size: int, solid: str):
+        self.name = name
+        self.owner = owner
+        self.size = size
+        self.solid = solid
+
+    def __getstate__(self):
+        return (self.name, self.owner, self.size, self.solid)
+
+    def __setstate__(self, state):
+        self.name, self.owner, self.size, self.solid = state
+
+    def __repr__(self):
+        return f"ValueHandle({self.name!r}, owner={self.owner!r}, size={self.size})"
+
+
+def _publish(name: str) -> Optional[int]:
+    """Copy a stored value pickled into its shared-memory segment (once), or None if gone."""
+    from multiprocessing import shared_memory
+
+    with _store_lock:
+        size = _published.get(name)
+        if size is not None or name not in _stored:
+            return size
+
+        data = _dumps(_stored[name])
+        shm = shared_memory.SharedMemory(name, create=True, size=max(1, len(data)))
+        try:
+            shm.buf[: len(data)] = data
+        finally:
+            shm.close()
+        _published[name] = size = len(data)
+        log.debug("Published value %r in shared-memory (%i bytes).", name, size)
+
+        return size
+
+
+def _release(names: List[str]):
+    """Drop stored values, unlinking any shared-memory they were published into."""
+    from multiprocessing import shared_memory
+
+    with _store_lock:
+        for name in names:
+            _stored.pop(name, None)
+            if _published.pop(name, None) is not None:
+                try:
+                    shm = shared_memory.SharedMemory(name)
+                    shm.close()
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def _serve_requester(conn):
+    try:
+        while True:
+            kind, arg = conn.recv()
+            if kind == "publish":
+                conn.send(_publish(arg))
+            elif kind == "release":
+                _release(arg)
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+
+
+def _serve_store():
+    from multiprocessing.connection import AuthenticationError
+
+    while True:
+        try:
+            conn = _store_server.accept()
+        except AuthenticationError as ex:
+            log.warning("Rejected store requester due to: %s", ex)
+            continue
+        except OSError:
+            return  # closed
+        threading.Thread(target=_serve_requester, args=(conn,), daemon=True).start()
+
+
+def _store_address():
+    """The address of this process's store-server, started on 1st call."""
+    global _store_server
+
+    with _store_lock:
+        if _store_server is None:
+            from multiprocessing import current_process
+            from multiprocessing.connection import Listener
+
+            _store_server = Listener(authkey=current_process().authkey)
+            threading.Thread(target=_serve_store, daemon=True).start()
+
+    return _store_server.address
+
+
+class _Owners:
+    """Ask the store-servers of the workers owning values to publish or release them."""
+
+    def __init__(self):
+        self._conns = {}
+        #: A lock per owner, so requests to different owners overlap.
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def request(self, owner, msg: tuple, reply=True):
+        from multiprocessing import current_process
+        from multiprocessing.connection import Client
+
+        with self._lock:
+            lock = self._locks.get(owner)
+            if lock is None:
+                lock = self._locks[owner] = threading.Lock()
+        with lock:
+            conn = self._conns.get(owner)
+            if conn is None:
+                conn = self._conns[owner] = Client(
+                    owner, authkey=current_process().authkey
+                )
+            try:
+                conn.send(msg)
+                return conn.recv() if reply else None
+            except (EOFError, OSError):
+                # Reconnect on the next request.
+                del self._conns[owner]
+                conn.close()
+                raise
+
+
+_owners = _Owners()
+
+
+def _forget_store():
+    """Forked children must not serve (or ask through) the store of their parent."""
+    global _store_lock, _store_server, _owners
+
+    _stored.clear()
+    _published.clear()
+    _store_lock = threading.Lock()
+    _store_server = None
+    _owners = _Owners()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_store)
+
+
+def store_value(value, solid: str) -> ValueHandle:
+    """Keep `value` in this process, to be published in shared-memory only if asked."""
+    import secrets
+
+    from .partition import estimate_size
+
+    # Short enough for the limits of shared-memory names on macOS.
+    name = f"gtk_{secrets.token_hex(8)}"
+    _stored[name] = value
+
+    return ValueHandle(name, _store_address(), estimate_size(value), solid)
+
+
+def fetch_value(handle: ValueHandle):
+    """
+    The live value, if produced in this process, or unpickled from shared-memory, ...
+
+    after asking its owner to publish it there.
+
+    :raises KeyError:
+        if the value has been released from its owner
+    """
+    if handle.name in _stored:
+        return _stored[handle.name]
+
+    from multiprocessing import shared_memory
+
+    size = _owners.request(handle.owner, ("publish", handle.name))
+    if size is None:
+        raise KeyError(f"Value of {handle} gone from its worker!")
+    shm = shared_memory.SharedMemory(handle.name)
+    try:
+        with shm.buf[:size] as data:
+            return _loads(bytes(data))
+    finally:
+        shm.close()
+
+
+def pull_handles(solution, fetch: Callable[[ValueHandle], object]):
+    """Replace in place the :class:`ValueHandle`\\s left in the `solution` with `fetch`\\ed values."""
+    pulled = {}
+    for values in [*solution.maps, *solution.executed.values()]:
+        for k, v in list(values.items()):
+            if isinstance(v, ValueHandle):
+                if v.name not in pulled:
+                    pulled[v.name] = fetch(v)
+                values[k] = pulled[v.name]
+
+
+def _is_storable(dep) -> bool:
+    from .modifier import get_jsonp, is_sfx
+
+    return not (is_sfx(dep) or get_jsonp(dep))
+
+
+def compute_stored(task: Union["_OpTask", bytes]) -> dict:
+    """Compute `task` in a worker, resolving its input handles, and storing its outputs."""
+    from contextvars import copy_context
+
+    from .execution import _root_key
+
+    if isinstance(task, bytes):
+        import dill
+
+        task = dill.loads(task)
+
+    needed = {_root_key(n) for n in task.op.needs}
+    task.sol = {
+        k: fetch_value(v) if k in needed and isinstance(v, ValueHandle) else v
+        for k, v in task.sol.items()
+    }
+    outputs = copy_context().run(task)
+
+    if not isinstance(outputs, dict):
+        return outputs
+    return {
+        k: store_value(v, task.solid) if _is_storable(k) else v
+        for k, v in outputs.items()
+    }
+
+
+class StorePool:
+    """
+    A process-pool keeping the outputs in the :term:`object store` of the workers producing them.
+
+    Tasks return just :class:`ValueHandle`\\s, resolved by the worker of the next
+    operation directly (if it had produced the value), or through shared-memory,
+    where the owning worker copies a value only when another process 1st asks it,
+    so that values do not travel through this process, unless asked.
+    When the solution completes, the handles left in it (e.g. the asked outputs,
+    when :term:`eviction`\\s are on) are pulled, and the workers release
+    all its values, along with their shared-memory.
+
+    .. Note::
+        Needs :mod:`multiprocessing.shared_memory` (python 3.8+);
+        :term:`sink`\\s receive the handles, not the values.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+        >>> from graphtik.config import execution_pool_plugged
+
+        >>> pipe = compose(
+        ...     "stored",
+        ...     operation(lambda a: [a] * 3, "rep", needs="a", provides="b", parallel=True),
+        ...     operation(len, "count", needs="b", provides="n", parallel=True),
+        ... )
+        >>> with StorePool(2) as pool, execution_pool_plugged(pool):  # doctest: +SKIP
+        ...     pipe.compute({"a": 1}, "n")
+        {'n': 3}
+    """
+
+    def __init__(self, processes: int = None, *, context=None):
+        """
+        :param processes:
+            the number of workers (default: cpu-count)
+        :param context:
+            a :mod:`multiprocessing` context (e.g. ``get_context("spawn")``)
+        """
+        import multiprocessing
+        from multiprocessing import resource_tracker
+
+        # Share the tracker of shared-memory segments with the workers.
+        resource_tracker.ensure_running()
+        self._lock = threading.Lock()
+        #: The handles of the values stored in the workers, by :attr:`.Solution.solid`.
+        self._owned: Dict[str, List[ValueHandle]] = {}
+        self._start(context or multiprocessing, processes)
+
+    def _start(self, ctx, processes):
+        self.pool = ctx.Pool(processes)
+        #: The number of workers, read by :class:`.Runtime`.
+        self._processes = self.pool._processes
+
+    def __repr__(self):
+        return f"StorePool(processes={self._processes}, stored={self._nstored()})"
+
+    def _nstored(self) -> int:
+        return sum(len(names) for names in self._owned.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exinfo):
+        self.terminate()
+
+    def _record(self, outputs):
+        """Track the handles returned by a task, till its solution is :meth:`collect`\\ed."""
+        if isinstance(outputs, dict):
+            handles = [v for v in outputs.values() if isinstance(v, ValueHandle)]
+            if handles:
+                with self._lock:
+                    for h in handles:
+                        self._owned.setdefault(h.solid, []).append(h)
+
+    def apply_async(self, fn, args=(), kwds=None, callback=None, error_callback=None):
+        from .execution import _do_task
+
+        task = None
+        if fn is _do_task and len(args) == 1:
+            task = args[0]
+            fn, args = compute_stored, (task,)
+
+        def done(outputs):
+            self._record(outputs)
+            if callback:
+                callback(outputs)
+
+        return self._submit(task, fn, args, kwds or {}, done, error_callback)
+
+    def _submit(self, task, fn, args, kwds, callback, error_callback):
+        return self.pool.apply_async(fn, args, kwds, callback, error_callback)
+
+    def pull(self, values: Mapping, keys=None) -> dict:
+        """
+        Copy `values` with the handles (of `keys`, if given) replaced by their values.
+
+        Called by the executor for tasks running in this process.
+        """
+        return {
+            k: (
+                fetch_value(v)
+                if isinstance(v, ValueHandle) and (keys is None or k in keys)
+                else v
+            )
+            for k, v in values.items()
+        }
+
+    def collect(self, solution):
+        """
+        Pull the handles left in the `solution`, in place, and release its values.
+
+        Called by the executor when the solution completes (or fails).
+        """
+        pull_handles(solution, fetch_value)
+        with self._lock:
+            handles = self._owned.pop(solution.solid, ())
+        by_owner = {}
+        for h in handles:
+            by_owner.setdefault(h.owner, []).append(h.name)
+        for owner, names in by_owner.items():
+            ## Called in the executor's `finally`: a lost worker (its values gone)
+            #  must not mask the error of the solution, nor fail a successful one.
+            try:
+                _owners.request(owner, ("release", names), reply=False)
+            except (EOFError, OSError) as ex:
+                log.warning("%s: cannot release values in %s: %r", self, owner, ex)
+        log.debug(
+            "%s: released x%i values of solution %s.",
+            self,
+            len(handles),
+            solution.solid,
+        )
+
+    def close(self):
+        self.pool.close()
+
+    def terminate(self):
+        self.pool.terminate()
+
+    def join(self):
+        self.pool.join()
+
+
+class PlacementPool(StorePool):
+    """
+    An :term:`object store` pool routing tasks to workers by :term:`locality-aware placement`.
+
+    Before executing a plan, its operations are :meth:`partitioned <.ExecutionPlan.partition>`
+    to the workers (each one a separate single-process pool), based on the :attr:`sizes`
+    of values and the :attr:`costs` of operations measured on past runs,
+    so that consecutive operations run where their inputs were stored;
+    the rest of tasks (e.g. element-tasks of :term:`map operation`\\s) go to
+    the least busy worker.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+        >>> from graphtik.config import execution_pool_plugged
+
+        >>> pipe = compose(
+        ...     "placed",
+        ...     operation(lambda a: [a] * 3, "rep", needs="a", provides="b", parallel=True),
+        ...     operation(len, "count", needs="b", provides="n", parallel=True),
+        ... )
+        >>> with PlacementPool(2) as pool, execution_pool_plugged(pool):  # doctest: +SKIP
+        ...     pipe.compute({"a": 1}, "n")
+        ...     pool.placement
+        {'n': 3}
+        {'rep': 0, 'count': 0}
+    """
+
+    def __init__(
+        self,
+        processes: int = None,
+        *,
+        context=None,
+        sizes: Mapping[str, float] = None,
+        costs: Mapping[str, float] = None,
+        imbalance: float = 0.1,
+    ):
+        """
+        :param processes:
+            the number of workers (default: cpu-count)
+        :param context:
+            a :mod:`multiprocessing` context (e.g. ``get_context("spawn")``)
+        :param sizes:
+            initial estimates of the bytes of values, by name (e.g. from a past process)
+        :param costs:
+            initial estimates of the msecs of operations, by name
+        :param imbalance:
+            see :func:`.partition.partition_plan()`
+        """
+        #: Estimated bytes of values, by name, updated from stored outputs.
+        self.sizes = dict(sizes or {})
+        #: Estimated msecs of operations, by name, updated from completed solutions.
+        self.costs = dict(costs or {})
+        self.imbalance = imbalance
+        #: The worker index of each operation, by name.
+        self.placement: Dict[str, int] = {}
+        super().__init__(processes, context=context)
+
+    def _start(self, ctx, processes):
+        nworkers = processes or os.cpu_count() or 1
+        self.pools = [ctx.Pool(1) for _ in range(nworkers)]
+        self._in_flight = [0] * nworkers
+        #: The number of workers, read by :class:`.Runtime`.
+        self._processes = nworkers
+
+    def __repr__(self):
+        return f"PlacementPool(processes={self._processes}, stored={self._nstored()})"
+
+    def place(self, plan):
+        """
+        Partition the operations of `plan` to the workers.
+
+        Called by the executor before executing the plan.
+        """
+        placement = plan.partition(
+            self._processes,
+            sizes=self.sizes,
+            costs=self.costs,
+            imbalance=self.imbalance,
+        )
+        with self._lock:
+            self.placement.update(placement)
+
+    def _record(self, outputs):
+        from .partition import update_estimate
+
+        super()._record(outputs)
+        if isinstance(outputs, dict):
+            with self._lock:
+                for k, v in outputs.items():
+                    if isinstance(v, ValueHandle):
+                        update_estimate(self.sizes, k, v.size)
+
+    def _submit(self, task, fn, args, kwds, callback, error_callback):
+        from .execution import _OpTask
+
+        with self._lock:
+            worker = None
+            if isinstance(task, _OpTask):
+                worker = self.placement.get(task.op.name)
+            if worker is None:
+                worker = min(range(self._processes), key=self._in_flight.__getitem__)
+            self._in_flight[worker] += 1
+
+        def finish():
+            with self._lock:
+                self._in_flight[worker] -= 1
+
+        def done(outputs):
+            finish()
+            callback(outputs)
+
+        def failed(ex):
+            finish()
+            if error_callback:
+                error_callback(ex)
+
+        return self.pools[worker].apply_async(fn, args, kwds, done, failed)
+
+    def collect(self, solution):
+        from .partition import update_estimate
+
+        with self._lock:
+            for op in solution.executed:
+                elapsed = solution.elapsed_ms.get(op)
+                if elapsed is not None:
+                    update_estimate(self.costs, op.name, elapsed)
+        super().collect(solution)
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+
+    def terminate(self):
+        for pool in self.pools:
+            pool.terminate()
+
+    def join(self):
+        for pool in self.pools:
+            pool.join()
+
+
+class _FutureResult:
+    """Mimic :class:`multiprocessing.pool.AsyncResult` over a :class:`concurrent.futures.Future`."""
+
+    __slots__ = ("future",)
+
+    def __init__(self, future):
+        self.future = future
+
+    def ready(self) -> bool:
+        return self.future.done()
+
+    def successful(self) -> bool:
+        if not self.ready():
+            raise ValueError(f"{self} not ready")
+        return self.future.exception() is None
+
+    def wait(self, timeout=None):
+        from concurrent.futures import wait
+
+        wait([self.future], timeout)
+
+    def get(self, timeout=None):
+        return self.future.result(timeout)
+
+
+def _add_callbacks(future, callback=None, error_callback=None):
+    """Call :mod:`multiprocessing`-like callbacks when the :class:`~concurrent.futures.Future` is done."""
+    if callback or error_callback:
+
+        def done(fut):
+            ex = fut.exception()
+            if ex is None:
+                if callback:
+                    callback(fut.result())
+            elif error_callback:
+                error_callback(ex)
+
+        future.add_done_callback(done)
+
+
+class InterpreterPool:
+    """
+    An :term:`execution pool` running tasks in sub-interpreters, or processes on older pythons.
+
+    On python 3.14+, each worker of a :class:`concurrent.futures.InterpreterPoolExecutor`
+    is an isolated sub-interpreter with its own GIL, so that CPU-bound, pure-python
+    operations scale to many cores, without forking or spawning whole processes;
+    otherwise, it falls back to a :class:`concurrent.futures.ProcessPoolExecutor`
+    (see :attr:`kind`).
+
+    Tasks (and their results) are still pickled between interpreters,
+    so the functions of the operations must be importable (e.g. no lambdas),
+    like with processes.
+
+    **Example:**
+
+        >>> from graphtik import compose, operation
+        >>> from graphtik.config import execution_pool_plugged
+
+        >>> pipe = compose(
+        ...     "interpreted",
+        ...     operation(max, "maxing", needs=["a", "b"], provides="c", parallel=True),
+        ... )
+        >>> with InterpreterPool(2) as pool, execution_pool_plugged(pool):  # doctest: +SKIP
+        ...     pipe.compute({"a": 1, "b": 2}, "c")
+        {'c': 2}
+    """
+
+    def __init__(self, workers: int = None, *, fallback=True):
+        """
+        :param workers:
+            the number of interpreters (or processes), by default the cpu-count
+        :param fallback:
+            when false, scream if sub-interpreters are not supported
+            (instead of falling back to processes)
+
+        :raises RuntimeError:
+            if no sub-interpreters and not `fallback`
+        """
+        import concurrent.futures as cf
+
+        executor_class = getattr(cf, "InterpreterPoolExecutor", None)
+        if executor_class:
+            #: Either ``"interpreters"`` or ``"processes"`` (when falling back).
+            self.kind = "interpreters"
+        elif fallback:
+            executor_class = cf.ProcessPoolExecutor
+            self.kind = "processes"
+        else:
+            raise RuntimeError(
+                "No `concurrent.futures.InterpreterPoolExecutor` (python 3.14+)!"
+            )
+        #: The number of workers, read by :class:`.Runtime`.
+        self._processes = workers or os.cpu_count() or 1
+        self.executor = executor_class(self._processes)
+        log.debug("%s: started.", self)
+
+    def __repr__(self):
+        return f"InterpreterPool({self.kind!r}, workers={self._processes})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exinfo):
+        self.terminate()
+
+    def apply_async(self, fn, args=(), kwds=None, callback=None, error_callback=None):
+        future = self.executor.submit(fn, *args, **(kwds or {}))
+        _add_callbacks(future, callback, error_callback)
+
+        return _FutureResult(future)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def terminate(self):
+        try:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        except TypeError:  # python < 3.9
+            self.executor.shutdown(wait=False)
+
+    def join(self):
+        self.executor.shutdown(wait=True)
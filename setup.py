@@ -53,6 +53,7 @@ test_deps = list(
             "html5lib",  # for sphinxext TCs
             "readme-renderer",  # for PyPi landing-page
             "pandas",
+            "dask",
         ]
     )
 )
@@ -93,6 +94,8 @@ setup(
         # May help for pickling (deprecated) `parallel` tasks.
         # See :term:`marshalling` and :func:`set_marshal_tasks()` configuration.
         "dill": ["dill"],
+        # For executing plans on dask schedulers (see :mod:`graphtik.daskexec`).
+        "dask": ["dask"],
         "all": dev_deps,
         "dev": dev_deps,
     },
@@ -0,0 +1,111 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`micro-batching`."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graphtik import compose, keyword, operation
+from graphtik.batching import Batcher, PerItem
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def pipe(calls):
+    def score(xs, ws):
+        calls.append(len(xs))
+        return [x * w for x, w in zip(xs, ws)]
+
+    return compose(
+        "scoring",
+        operation(score, "score", needs=["x", "w"], provides="s", vectorized=True),
+        operation(lambda s: -s, "negate", needs="s", provides="neg"),
+        operation(
+            lambda s: {"half": s / 2},
+            "halving",
+            needs="s",
+            provides="half",
+            returns_dict=True,
+        ),
+    )
+
+
+def test_batcher_concurrent_callers(pipe, calls):
+    n = 8
+    barrier = threading.Barrier(n)
+    batcher = Batcher(pipe, window=0.2)
+
+    def request(i):
+        barrier.wait()
+        return batcher.compute({"x": i, "w": 2}, ["neg", "half"])
+
+    with ThreadPoolExecutor(n) as pool:
+        results = list(pool.map(request, range(n)))
+
+    assert results == [{"neg": -2 * i, "half": i} for i in range(n)]
+    assert calls == [n]
+
+
+def test_batcher_max_batch_size_n_signatures(pipe, calls):
+    batcher = Batcher(pipe, window=60, max_batch_size=2)
+    f1 = batcher.submit({"x": 1, "w": 1}, "s")
+    f2 = batcher.submit({"x": 1, "w": 1}, "neg")
+    f3 = batcher.submit({"x": 2, "w": 1}, "s")
+    assert f1.result(5) == {"s": 1}
+    assert f3.result(5) == {"s": 2}
+    assert not f2.done()
+    batcher.flush()
+    assert f2.result(5) == {"neg": -1}
+    assert calls == [2, 1]
+
+
+def test_batcher_errors(calls):
+    def boom(x):
+        if x == 1:
+            raise ValueError("Boom!")
+        return x
+
+    pipe = compose("failing", operation(boom, "boom", needs="x", provides="y"))
+    with Batcher(pipe, window=60) as batcher:
+        futures = [batcher.submit({"x": i}, "y") for i in range(3)]
+    assert futures[0].result() == {"y": 0}
+    with pytest.raises(ValueError, match="Boom!"):
+        futures[1].result()
+    assert futures[2].result() == {"y": 2}
+
+    pipe = compose(
+        "short",
+        operation(lambda xs: xs[1:], "short", needs="x", provides="y", vectorized=1),
+    )
+    with Batcher(pipe) as batcher:
+        fut = batcher.submit({"x": 1}, "y")
+    with pytest.raises(ValueError, match=r"outputs\['y'\] .* not of length 1"):
+        fut.result()
+
+    with pytest.raises(ValueError, match="without needs"):
+        Batcher(compose("const", operation(lambda: 1, "const", provides="c")))
+    with pytest.raises(ValueError, match="non-negative"):
+        Batcher(pipe, window=-1)
+    with pytest.raises(ValueError, match="positive integer"):
+        Batcher(pipe, max_batch_size=0)
+
+
+def test_per_item():
+    assert PerItem(lambda a, b=0: a - b)([1, 2], b=[3, 4]) == [-2, -2]
+    assert PerItem(divmod, 2)([], []) == ((), ())
+    assert PerItem(dict, returns_dict=True)(a=[1, 2]) == {"a": [1, 2]}
+
+    pipe = compose(
+        "kw",
+        operation(
+            lambda a, b: a + b, "add", needs=["a", keyword("bb", "b")], provides="c"
+        ),
+    )
+    with Batcher(pipe) as batcher:
+        futures = [batcher.submit({"a": i, "bb": 10}, "c") for i in range(2)]
+    assert [f.result() for f in futures] == [{"c": 10}, {"c": 11}]
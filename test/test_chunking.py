@@ -0,0 +1,148 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`chunked execution`."""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.base import IncompleteExecutionError
+from graphtik.chunking import as_reducer, iter_chunks
+from graphtik.config import operations_endured
+
+
+@pytest.fixture
+def pipe():
+    return compose(
+        "chunked",
+        operation(
+            lambda xs, k: [x * k for x in xs], "scale", needs=["xs", "k"], provides="ys"
+        ),
+        operation(sum, "summing", needs="ys", provides="total"),
+        operation(len, "counting", needs="ys", provides="n"),
+    )
+
+
+@pytest.mark.parametrize("parallel", [False, True, 2])
+def test_compute_chunked(pipe, parallel):
+    calls = []
+
+    def scale(xs, k):
+        calls.append(xs)
+        return [x * k for x in xs]
+
+    pipe = compose("counted", operation(scale, "scale", ["xs", "k"], "ys"), pipe)
+    got = pipe.compute_chunked(
+        {"xs": list(range(7)), "k": 2},
+        ["ys", "total", "n"],
+        chunk_by={"xs": 3},
+        reducers={"total": "sum", "n": lambda ns: ns},
+        parallel=parallel,
+    )
+    assert got == {"ys": [0, 2, 4, 6, 8, 10, 12], "total": 42, "n": [3, 3, 1]}
+    assert sorted(calls) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_compute_chunked_bounded(pipe):
+    """Chunks in flight are bounded, and named reducers fold outputs as they complete."""
+    lock, running, peak = threading.Lock(), [0], [0]
+
+    def scale(xs, k):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return [x * k for x in xs]
+
+    pipe = compose("bounded", operation(scale, "scale", ["xs", "k"], "ys"), pipe)
+    added = []
+
+    def add(acc, value):
+        added.append(value)
+        return acc + value
+
+    folds = {"sum": add, "first": lambda acc, value: acc}
+    with mock.patch("graphtik.chunking.folds", folds):
+        got = pipe.compute_chunked(
+            {"xs": list(range(20)), "k": 1},
+            ["total", "n"],
+            chunk_by={"xs": 2},
+            reducers={"total": "sum", "n": "first"},
+            parallel=2,
+        )
+    assert got == {"total": 190, "n": 2}
+    assert peak[0] <= 2
+    ## Folded in chunk order.
+    assert added == [4 * i + 1 for i in range(1, 10)]
+
+
+def test_compute_chunked_all_outputs(pipe):
+    got = pipe.compute_chunked({"xs": [1, 2, 3], "k": 1}, None, chunk_by={"xs": 2})
+    assert got == {
+        "ys": [1, 2, 3],
+        "total": [3, 3],
+        "n": [2, 1],
+    }
+
+
+def test_compute_chunked_frames_n_npy(tmp_path, pipe):
+    np = pytest.importorskip("numpy")
+    pd = pytest.importorskip("pandas")
+
+    pipe = compose(
+        "frames",
+        operation(
+            lambda df, arr: df.assign(b=arr),
+            "join",
+            needs=["df", "arr"],
+            provides="joined",
+        ),
+        operation(
+            lambda df: df["b"].sum(), "summing", needs="joined", provides="total"
+        ),
+    )
+    path = tmp_path / "arr.npy"
+    np.save(path, np.arange(5))
+    df = pd.DataFrame({"a": range(5)})
+
+    got = pipe.compute_chunked(
+        {"df": df, "arr": str(path)},
+        ["joined", "total"],
+        chunk_by={"df": 2, "arr": 2},
+        reducers={"total": "sum"},
+    )
+    assert got["total"] == 10
+    assert got["joined"].equals(df.assign(b=np.arange(5)))
+
+
+def test_compute_chunked_errors(pipe):
+    with pytest.raises(ValueError, match="missing from inputs"):
+        list(iter_chunks({"a": [1]}, {"b": 1}))
+    with pytest.raises(ValueError, match="positive integers"):
+        list(iter_chunks({"a": [1]}, {"a": 0}))
+    with pytest.raises(ValueError, match="different number of chunks"):
+        list(iter_chunks({"a": [1, 2], "b": [1]}, {"a": 1, "b": 1}))
+    with pytest.raises(ValueError, match="Unknown reducer 'bad'"):
+        as_reducer("bad")
+    with pytest.raises(TypeError, match="reducer name"):
+        as_reducer(1)
+    with pytest.raises(ValueError, match="Unknown output node"):
+        pipe.compute_chunked({"xs": [1], "k": 1}, "bad", chunk_by={"xs": 1})
+    with pytest.raises(ValueError, match="No chunks to compute"):
+        pipe.compute_chunked(
+            {"xs": [], "k": 1}, "total", chunk_by={"xs": 1}, reducers={"total": "sum"}
+        )
+
+    def boom(xs):
+        raise ValueError("Boom!")
+
+    pipe = compose("failing", operation(boom, "boom", needs="xs", provides="ys"), pipe)
+    with pytest.raises(ValueError, match="Boom!"):
+        pipe.compute_chunked({"xs": [1], "k": 1}, "total", chunk_by={"xs": 1})
+    with operations_endured(), pytest.raises(IncompleteExecutionError):
+        pipe.compute_chunked({"xs": [1], "k": 1}, "n", chunk_by={"xs": 1})
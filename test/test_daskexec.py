@@ -0,0 +1,161 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`dask graph` translation & execution."""
+
+import pytest
+
+from graphtik import compose, operation, optional, sfx, sfxed
+from graphtik.config import operations_endured
+from graphtik.daskexec import (
+    INPUTS_KEY,
+    RELEASED,
+    _compute_op,
+    _Done,
+    _FailFast,
+    _outcome,
+    execute_dask,
+)
+
+
+def _mk(a):
+    return {"x": a}
+
+
+def _read(doc):
+    return doc["x"]
+
+
+def _add(y, o=5):
+    return y + o
+
+
+def _boom(a):
+    raise ValueError("Boom!")
+
+
+semantics = compose(
+    "semantics",
+    operation(_mk, "mk", needs="a", provides=sfxed("doc", "made")),
+    operation(
+        _read,
+        "read",
+        needs=sfxed("doc", "made"),
+        provides=["y", sfx("done")],
+        aliases=[("y", "yy")],
+    ),
+    operation(_add, "opt", needs=["yy", optional("o"), sfx("done")], provides="w"),
+)
+
+jsonps = compose(
+    "jsonps",
+    operation(_add, "jsonp", needs="doc/x", provides="doc/z"),
+    operation(_add, "jsonp2", needs="doc/z", provides="out"),
+)
+
+
+def test_to_dask_deps():
+    plan = semantics.compile("a")
+    graph = plan.to_dask({"a": 1, "junk": 0}, solid="s1")
+    assert graph[INPUTS_KEY] == {"a": 1, "junk": 0}
+    deps = {k: v[6:] for k, v in graph.items() if k != INPUTS_KEY}
+    assert deps == {
+        "mk": (INPUTS_KEY,),
+        "read": (INPUTS_KEY, "mk"),
+        "opt": (INPUTS_KEY, "read"),
+    }
+    # Sideffect `done` provided by the 1st upstream of `opt`.
+    assert graph["opt"][1:5] == (plan.net.find_op_by_name("opt"), "s1", None, ((0,),))
+
+    graph = jsonps.compile("doc").to_dask({})
+    assert graph["jsonp2"][4:] == ((), None, INPUTS_KEY, "jsonp")
+
+
+def test_compute_op_cancels():
+    op = semantics.net.find_op_by_name("opt")
+    done = _compute_op(op, "s", None, ((0,),), None, {}, _Done({"yy": 1}))
+    assert done.get() == {"w": 6}
+    assert 0 <= done.elapsed < 10
+
+    ## Missing compulsory needs, or sideffects.
+    assert _compute_op(op, "s", None, (), None, {}, _Done({"y": 1})).canceled
+    assert _compute_op(op, "s", None, ((0,),), None, {"yy": 1}, _Done()).canceled
+
+    ## Failures cancel the rest, unless endured.
+    fail_fast = _FailFast()
+    done = _compute_op(op, "s", None, (), fail_fast, {"yy": "a"})
+    assert not done.canceled
+    with pytest.raises(TypeError):
+        done.get()
+    assert fail_fast.failed
+    assert _compute_op(op, "s", None, (), fail_fast, {"yy": 1}).canceled
+
+    fail_fast = _FailFast(endurance=True)
+    _compute_op(op, "s", None, (), fail_fast, {"yy": "a"})
+    assert not fail_fast.failed
+
+
+def test_outcome_releases():
+    done = _Done({"a": 1, "doc/b": 2, "c": 3, sfx("s"): True}, elapsed=1)
+    assert _outcome(done, None) is done
+    out = _outcome(done, {"doc", "c"})
+    assert out.outputs == {"a": RELEASED, "doc/b": 2, "c": 3, sfx("s"): True}
+    assert out.elapsed == 1
+    assert _outcome(_Done(), {"c"}).canceled
+
+
+@pytest.mark.parametrize("scheduler", ["sync", "threads", "processes"])
+def test_execute_dask(scheduler):
+    pytest.importorskip("dask")
+    plan = semantics.compile("a")
+    sol = execute_dask(plan, {"a": 1}, scheduler=scheduler)
+    exp = plan.execute({"a": 1})
+    assert dict(sol) == dict(exp) == {"a": 1, "doc": {"x": 1}, "y": 1, "yy": 1, "w": 6}
+    assert list(sol.executed) == list(exp.executed)
+
+    sol = execute_dask(jsonps.compile("doc"), {"doc": {"x": 1}}, scheduler=scheduler)
+    assert sol == {"doc": {"x": 1, "z": 6}, "out": 11}
+
+    ## Evictions
+    assert execute_dask(semantics.compile("a", "w"), {"a": 1}) == {"w": 6}
+
+
+def test_execute_dask_failures():
+    pytest.importorskip("dask")
+    pipe = compose(
+        "failing",
+        operation(_boom, "boom", needs="a", provides="b", endured=True),
+        operation(_add, "after", needs="b", provides="c"),
+        operation(_add, "other", needs="a", provides="d"),
+    )
+    sol = execute_dask(pipe.compile("a"), {"a": 1})
+    assert sol == {"a": 1, "d": 6}
+    assert [op.name for op in sol.canceled] == ["after"]
+    assert isinstance(sol.executed[pipe.ops[0]], ValueError)
+
+    with pytest.raises(ValueError, match="Boom!") as exinfo:
+        execute_dask(pipe.withset(endured=False).compile("a"), {"a": 1})
+    assert "solution" in exinfo.value.jetsam
+
+    ## Tasks not started are canceled on failures (scheduled after `boom`,
+    #  due to the optional need).
+    calls = []
+    pipe = compose(
+        "failing",
+        operation(_boom, "boom", needs="a", provides="b"),
+        operation(
+            lambda a, b=0: calls.append(a),
+            "later",
+            needs=["a", optional("b")],
+            provides="c",
+        ),
+    )
+    with operations_endured(True):
+        execute_dask(pipe.compile("a"), {"a": 1}, scheduler="sync")
+    assert calls == [1]
+    calls.clear()
+    with pytest.raises(ValueError, match="Boom!"):
+        execute_dask(pipe.compile("a"), {"a": 1}, scheduler="sync")
+    assert not calls
+
+    with pytest.raises(ValueError, match="Expected one of"):
+        execute_dask(pipe.compile("a"), {"a": 1}, scheduler="bad")
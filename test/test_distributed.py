@@ -0,0 +1,130 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`distributed execution`."""
+
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.__main__ import build_parser
+from graphtik.config import execution_pool_plugged
+from graphtik.distributed import (
+    AUTHKEY_ENVVAR,
+    Cluster,
+    Worker,
+    _authkey,
+    parse_address,
+)
+from graphtik.workers import ValueHandle
+
+
+def _repeat(a):
+    return [a] * 1000
+
+
+def _pid(c):
+    return os.getpid()
+
+
+pipe = compose(
+    "distributed",
+    operation(_repeat, "repeat", needs="a", provides="b", parallel=True),
+    operation(_repeat, "nest", needs="b", provides="c", parallel=True),
+    operation(_pid, "getpid", needs="c", provides="pid", parallel=True),
+    operation(len, "count", needs="c", provides="n"),
+)
+
+
+@pytest.fixture
+def cluster():
+    with Cluster() as cluster:
+        yield cluster
+
+
+def _thread_workers(cluster, n):
+    workers = [Worker(cluster.address, cluster.authkey) for _ in range(n)]
+    for w in workers:
+        threading.Thread(target=w.run, daemon=True).start()
+    cluster.wait_workers(n, 10)
+    return workers
+
+
+def test_cluster_in_threads(cluster):
+    w1, w2 = _thread_workers(cluster, 2)
+    assert set(cluster.workers) == {w1.address, w2.address}
+    with execution_pool_plugged(cluster):
+        assert pipe.compute({"a": 1}, "n") == {"n": 1000}
+        sol = pipe.compute({"a": 2})
+    assert sol["c"] == [[2] * 1000] * 1000
+    assert not any(isinstance(v, ValueHandle) for v in sol.values())
+    assert not cluster._owned
+
+    ## Values fetched peer-to-peer, and released.
+    handle = w1._store([1, 2], "s")
+    assert w2.peers.fetch(handle) == [1, 2]
+    cluster._record({"x": handle})
+    cluster.collect(type("Sol", (), {"maps": [], "executed": {}, "solid": "s"}))
+    with pytest.raises(KeyError, match="gone from its worker"):
+        deadline = time.time() + 10
+        while time.time() < deadline:  # released asynchronously
+            w2.peers.fetch(handle)
+
+    with pytest.raises(ZeroDivisionError):
+        cluster.apply_async(divmod, (1, 0)).get(10)
+
+
+def test_cluster_errors(cluster, monkeypatch):
+    with pytest.raises(RuntimeError, match="No workers connected"):
+        cluster.apply_async(len, ([],))
+    with pytest.raises(TimeoutError, match="Only x0 of x1 workers"):
+        cluster.wait_workers(1, 0.1)
+
+    (worker,) = _thread_workers(cluster, 1)
+    ## Late replies of tasks failed already are dropped.
+    worker.conn.send(("done", -1, {}))
+    assert cluster.apply_async(max, (1, 2)).get(10) == 2
+
+    ## Releasing values of a lost worker does not fail the solution.
+    (remote,) = cluster._workers
+    cluster._record({"x": ValueHandle("v", worker.address, 1, "s")})
+
+    def lost(msg):
+        raise BrokenPipeError("lost")
+
+    monkeypatch.setattr(remote.conn, "send", lost)
+    cluster.collect(type("Sol", (), {"maps": [], "executed": {}, "solid": "s"}))
+    monkeypatch.undo()
+
+    res = cluster.apply_async(time.sleep, (0.5,))
+    # Shutdown (not just close) to wake up the blocked `recv()`\s.
+    with socket.socket(fileno=os.dup(worker.conn.fileno())) as sock:
+        sock.shutdown(socket.SHUT_RDWR)
+    with pytest.raises(ConnectionError, match="Lost RemoteWorker"):
+        res.get(10)
+
+    with pytest.raises(ValueError, match="<host>]:<port>"):
+        parse_address("localhost")
+    assert parse_address(":80") == ("127.0.0.1", 80)
+    assert _authkey("hex:ff00") == b"\xff\x00"
+    assert _authkey("ab") == b"ab"
+    monkeypatch.delenv(AUTHKEY_ENVVAR, raising=False)
+    with pytest.raises(ValueError, match=AUTHKEY_ENVVAR):
+        Worker(cluster.address)
+
+    args = build_parser().parse_args(["worker", "host:1", "--host", "0.0.0.0"])
+    assert (args.coordinator, args.host) == ("host:1", "0.0.0.0")
+
+
+@pytest.mark.slow
+def test_cluster_spawn_local():
+    # Arbitrary bytes pass hex-encoded to the workers.
+    with Cluster(authkey=b"\xff" + os.urandom(15)) as cluster:
+        procs = cluster.spawn_local(2)
+        with execution_pool_plugged(cluster):
+            sols = [pipe.compute({"a": i}, ["pid", "n"]) for i in range(4)]
+    assert {s["n"] for s in sols} == {1000}
+    assert {s["pid"] for s in sols} <= {p.pid for p in procs}
@@ -0,0 +1,147 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`fingerprint`\\s of solution values."""
+import pytest
+
+from graphtik import compose, operation
+from graphtik.fingerprint import fingerprint, register_fingerprinter
+
+
+@pytest.mark.parametrize(
+    "v1, v2",
+    [
+        (1, 1.0),
+        (1, True),
+        ("1", 1),
+        ("a", b"a"),
+        ([1, 2], (1, 2)),
+        ([1, 2], [2, 1]),
+        ({"a": 1}, {"a": 2}),
+        ({"a": [1]}, {"a": [1, 2]}),
+        ({1, 2}, [1, 2]),
+    ],
+)
+def test_fingerprint_differ(v1, v2):
+    assert fingerprint(v1) != fingerprint(v2)
+
+
+@pytest.mark.parametrize(
+    "v",
+    [None, 0, "", "abc", b"abc", (), {"a": {"b": [1, None]}}, {3, 1, 2}],
+)
+def test_fingerprint_stable(v):
+    assert fingerprint(v) == fingerprint(v)
+    assert len(fingerprint(v)) == 32
+
+
+def test_fingerprint_dict_order():
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+    assert fingerprint({1: "a", "1": "b"}) == fingerprint({"1": "b", 1: "a"})
+
+
+def test_fingerprint_ndarray():
+    np = pytest.importorskip("numpy")
+
+    arr = np.arange(12)
+    assert fingerprint(arr) == fingerprint(np.arange(12))
+    assert fingerprint(arr) != fingerprint(arr.astype("int32"))
+    assert fingerprint(arr) != fingerprint(arr.reshape(3, 4))
+    assert fingerprint(arr.reshape(3, 4).T) == fingerprint(
+        np.ascontiguousarray(arr.reshape(3, 4).T)
+    )
+    arr2 = arr.copy()
+    arr2[-1] = -1
+    assert fingerprint(arr) != fingerprint(arr2)
+
+    assert fingerprint(np.array([])) != fingerprint(np.array([[]]))
+    assert fingerprint(np.float64(1)) == fingerprint(np.float64(1))
+    assert fingerprint(np.float64(1)) != fingerprint(np.float32(1))
+    assert fingerprint(np.array(["a", None])) == fingerprint(
+        np.array(["a", None], dtype=object)
+    )
+
+
+def test_fingerprint_pandas():
+    pd = pytest.importorskip("pandas")
+
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(df.rename(columns={"b": "c"}))
+    assert fingerprint(df) != fingerprint(df.set_axis([1, 2]))
+    df2 = df.copy()
+    df2.iloc[1, 1] = "z"
+    assert fingerprint(df) != fingerprint(df2)
+    assert fingerprint(df) != fingerprint(df.astype({"a": float}))
+
+    sr = df["a"]
+    assert fingerprint(sr) == fingerprint(sr.copy())
+    assert fingerprint(sr) != fingerprint(sr.rename("b"))
+    assert fingerprint(sr) != fingerprint(df)
+
+
+def test_register_fingerprinter():
+    class C:
+        def __init__(self, v, junk=None):
+            self.v = v
+            self.junk = junk
+
+    class D(C):
+        pass
+
+    register_fingerprinter(C, lambda c: c.v)
+    assert fingerprint(C(1, "a")) == fingerprint(C(1, "b"))
+    assert fingerprint(C(1)) != fingerprint(C(2))
+    assert fingerprint(D(1)) == fingerprint(D(1, 2))
+    assert fingerprint(D(1)) != fingerprint(C(1))
+
+    register_fingerprinter(f"{D.__module__}.{D.__qualname__}", lambda c: c.junk)
+    assert fingerprint(D(1, 2)) == fingerprint(D(3, 2))
+
+    with pytest.raises(TypeError, match="callable fingerprinter"):
+        register_fingerprinter(C, None)
+    with pytest.raises(TypeError, match="a class or"):
+        register_fingerprinter(C(1), str)
+
+
+def test_solution_fingerprint():
+    np = pytest.importorskip("numpy")
+
+    calls = []
+
+    def fp_counting(arr):
+        calls.append(1)
+        return arr.tobytes()
+
+    class Arr(np.ndarray):
+        pass
+
+    register_fingerprinter(Arr, fp_counting)
+
+    pipe = compose(
+        "fp",
+        operation(lambda a: a, "a2b", needs="a", provides="b"),
+        operation(lambda b: b + 1, "b2c", needs="b", provides="c"),
+    )
+    a = np.arange(3).view(Arr)
+    sol = pipe.compute({"a": a})
+
+    fp = sol.fingerprint("a")
+    assert fp == fingerprint(a)
+    assert sol.fingerprint("b") == fp  # same object
+    assert len(calls) == 2  # +1 from the `fingerprint()` above
+    assert sol.fingerprint("c") != fp
+    assert len(calls) == 3
+
+    ## Evicted values forget their digests.
+    #
+    del sol["b"]
+    del sol["a"]
+    with pytest.raises(KeyError):
+        sol.fingerprint("a")
+    assert not any(k == id(a) for k in sol._fingerprints)
+
+    ## Non-weakrefable values.
+    #
+    sol["d"] = [1, 2]
+    assert sol.fingerprint("d") == fingerprint([1, 2])
+    assert sol.fingerprint("d") == fingerprint([1, 2])
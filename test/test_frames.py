@@ -0,0 +1,127 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`columnar execution`."""
+import pytest
+
+from graphtik import compose, operation
+from graphtik.config import operations_endured
+from graphtik.frames import RowWise, bind_columns
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({"a": [1, 2, 3], "b": [10, 20, 30]})
+
+
+def test_apply_columnar(df):
+    calls = []
+
+    def add(a, b):
+        calls.append(type(a))
+        return a + b
+
+    pipe = compose(
+        "columnar",
+        operation(add, "add", needs=["a", "b"], provides="ab"),
+        operation(lambda ab, k: ab * k, "scale", needs=["ab", "k"], provides="abk"),
+    )
+    got = pipe.apply(df, ["abk"], inputs={"k": 2})
+    assert calls == [pd.Series]
+    assert got.columns.tolist() == ["a", "b", "abk"]
+    assert got["abk"].tolist() == [22, 44, 66]
+    assert "abk" not in df
+
+    got = pipe.apply(df, None, inputs={"k": 2})
+    assert got.columns.tolist() == ["a", "b", "ab", "abk"]
+
+
+def test_apply_columns_n_jsonp(df):
+    pipe = compose(
+        "renamed",
+        operation(lambda x, b: x - b, "sub", needs=["x", "df/b"], provides="d"),
+    )
+    got = pipe.apply(df, "d", columns={"x": "a"}, frame_name="df")
+    assert got["d"].tolist() == [-9, -18, -27]
+
+    with pytest.raises(ValueError, match=r"Bound columns\['bad'\] missing"):
+        pipe.apply(df, "d", columns={"x": "bad"}, frame_name="df")
+
+
+def _sign(a):
+    return "+" if a > 1 else "-"
+
+
+def _split(a):
+    return (a, -a) if a % 2 else (-a, a)
+
+
+def test_apply_rowwise_fallback(df):
+    doubled = []
+
+    def double(a):
+        doubled.append(a)
+        return a * 2
+
+    pipe = compose(
+        "fallback",
+        operation(double, "double", needs="a", provides="a2"),
+        operation(_sign, "sign", needs="a2", provides="s"),
+        operation(_split, "split", needs="a", provides=["x", "y"]),
+        operation(
+            lambda s: {"z": s * 2}, "dict", needs="s", provides="z", returns_dict=True
+        ),
+    )
+    got = pipe.apply(df, ["a2", "s", "x", "y", "z"])
+    assert got["a2"].tolist() == [2, 4, 6]
+    assert got["s"].tolist() == ["+", "+", "+"]
+    assert got["x"].tolist() == [1, -2, 3]
+    assert got["y"].tolist() == [-1, 2, -3]
+    assert got["z"].tolist() == ["++", "++", "++"]
+    # Only failed ops & their dependents re-executed.
+    assert len(doubled) == 1
+
+    with pytest.raises(ValueError, match="ambiguous"):
+        pipe.apply(df, "s", rowwise_fallback=False)
+    with operations_endured():
+        assert pipe.apply(df, "s")["s"].tolist() == ["+", "+", "+"]
+
+
+def test_apply_errors(df):
+    def boom(a):
+        raise ValueError("Boom!")
+
+    def typo(a):
+        if not isinstance(a, int):
+            raise TypeError(f"Expected int, got: {type(a)}")
+        return f"a{a}"
+
+    pipe = compose(
+        "failing",
+        operation(boom, "boom", needs="a", provides="b"),
+        operation(typo, "typo", needs="a", provides="c"),
+    )
+    with pytest.raises(ValueError, match="Boom!"):
+        pipe.apply(df, "b")
+    ## Errors raised by the functions themselves are not series-related,
+    #  unless the ops are explicitly listed.
+    with pytest.raises(TypeError, match="Expected int"):
+        pipe.apply(df, "c")
+    with pytest.raises(ValueError, match="Boom!"):
+        pipe.apply(df, "b", rowwise_fallback=["typo"])
+    assert pipe.apply(df, "c", rowwise_fallback=["typo"])["c"].tolist() == [
+        "a1",
+        "a2",
+        "a3",
+    ]
+
+
+def test_rowwise_n_bind(df):
+    assert RowWise(len)("ab") == 2
+    assert RowWise(max)(df["a"], 2).tolist() == [2, 2, 3]
+    assert RowWise(lambda a, k: a * k, chunksize=2)(df["a"], k=2).tolist() == [2, 4, 6]
+    q, r = RowWise(divmod, 2)(df["b"], 7)
+    assert (q.tolist(), r.tolist()) == ([1, 2, 4], [3, 6, 2])
+    assert all(s.empty for s in RowWise(divmod, 2)(df["b"].iloc[:0], 7))
+    assert list(bind_columns(df, ["a", "c"])) == ["a"]
@@ -1208,3 +1208,105 @@ def test_recompute_NEEDS_FIX():
     pytest.xfail(
         reason="recompute must be incorporated into `unsatisfied_operations()`"
     )
+
+
+@pytest.mark.parametrize("layered", [False, True])
+def test_solution_recompute(samplenet, layered):
+    sol = samplenet.compute({"a": 1, "b": 2, "c": 3, "d": 4}, layered_solution=layered)
+    assert sol == {"a": 1, "b": 2, "c": 3, "d": 4, "sum1": 3, "sum2": 7, "sum3": 10}
+
+    assert sol.recompute({"d": 5}) is sol
+    assert sol == {"a": 1, "b": 2, "c": 3, "d": 5, "sum1": 3, "sum2": 8, "sum3": 11}
+    assert exe_ops(sol) == ["sum_op1", "sum_op2", "sum_op3"]
+    assert sol.elapsed_ms.keys() == sol.executed.keys()
+
+    ## Override intermediate value.
+    #
+    sol.recompute({"sum2": 0})
+    assert sol == {"a": 1, "b": 2, "c": 3, "d": 5, "sum1": 3, "sum2": 0, "sum3": 3}
+    assert exe_ops(sol) == ["sum_op1", "sum_op2", "sum_op3"]
+
+    with pytest.raises(ValueError, match="^Unknown dependencies to recompute"):
+        sol.recompute({"BAD": 0})
+
+
+def test_solution_recompute_cone_only():
+    calls = []
+
+    def by2(n):
+        calls.append(n)
+        return 2 * n
+
+    pipe = compose(
+        ...,
+        operation(by2, "f0", "a0", "a1"),
+        operation(by2, "f1", "a1", "a2"),
+        operation(by2, "g0", "b0", "b1"),
+    )
+    sol = pipe(a0=1, b0=10)
+    assert len(calls) == 3
+
+    calls.clear()
+    sol.recompute({"a1": 3})
+    assert sol == {"a0": 1, "b0": 10, "a1": 3, "a2": 6, "b1": 20}
+    assert calls == [3]
+    assert exe_ops(sol) == ["f0", "g0", "f1"]
+    # Overridden values replace computed ones.
+    assert "a1" not in sol.overwrites
+
+
+def test_solution_recompute_evicted():
+    pipe = compose(
+        ...,
+        operation(str, "f1", "a", "aa"),
+        operation(str, "f2", "b", "bb"),
+        operation(lambda a, b: a + b, "ff", ["aa", "bb"], "c"),
+    )
+    sol = pipe.compute({"a": "a", "b": "b"}, outputs="c")
+    assert sol == {"c": "ab"}
+
+    with pytest.raises(ValueError, match="^Cannot recompute, missing") as exinfo:
+        sol.recompute({"a": "A"})
+    assert "evictions_skipped" in str(exinfo.value)
+
+    ## Keep all values, to recompute later.
+    #
+    with evictions_skipped(True):
+        sol = pipe.compute({"a": "a", "b": "b"}, outputs="c")
+    assert sol["c"] == "ab"
+    sol.recompute({"a": "A"})
+    assert sol["c"] == "Ab"
+    assert exe_ops(sol) == ["f2", "f1", "ff"]
+
+    ## Evicted `bb` re-computed & re-evicted.
+    #
+    sol = pipe.compute({"a": "a", "b": "b"}, outputs=["b", "c"])
+    assert sol == {"b": "b", "c": "ab"}
+    sol.recompute({"a": "A"})
+    assert sol == {"b": "b", "c": "Ab"}
+    assert exe_ops(sol) == ["f1", "f2", "ff"]
+
+
+def test_solution_recompute_failures():
+    def fail_on_zero(a):
+        if not a:
+            raise ValueError("zero")
+        return a
+
+    pipe = compose(
+        ...,
+        operation(fail_on_zero, "f1", "a", "aa"),
+        operation(fail_on_zero, "f2", "b", "bb"),
+        operation(lambda a: a, "g1", "aa", "aaa"),
+        operation(lambda b: b, "g2", "bb", "bbb"),
+    )
+    with operations_endured(True):
+        sol = pipe.compute({"a": 0, "b": 0})
+        assert exe_ops(sol) == ["f1", "f2"]
+        assert {op.name for op in sol.canceled} == {"g1", "g2"}
+
+        sol.recompute({"a": 1})
+    assert sol == {"a": 1, "b": 0, "aa": 1, "aaa": 1}
+    assert {op.name for op in sol.canceled} == {"g2"}
+    assert sol.is_failed(sol.plan.net.find_op_by_name("f2"))
+    assert not sol.is_failed(sol.plan.net.find_op_by_name("f1"))
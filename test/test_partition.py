@@ -0,0 +1,75 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`locality-aware placement`."""
+import pytest
+
+from graphtik import compose, operation
+from graphtik.partition import estimate_size, partition_plan, update_estimate
+
+
+def _noop(*args):
+    return 0
+
+
+@pytest.fixture
+def fork_plan():
+    """A `root` op feeding a `big` & a `small` branch, joined at the end."""
+    pipe = compose(
+        "fork",
+        operation(_noop, "root", needs="a", provides=["big", "small"]),
+        operation(_noop, "B", needs="big", provides="b"),
+        operation(_noop, "S", needs="small", provides="s"),
+        operation(_noop, "join", needs=["b", "s"], provides="j"),
+    )
+    return pipe.compile("a")
+
+
+@pytest.fixture
+def bridged_plan():
+    """Two chains of ops, and a `bridge` op needing both of their 1st outputs."""
+    pipe = compose(
+        "bridged",
+        operation(_noop, "A1", needs="a", provides="a1"),
+        operation(_noop, "A2", needs="a1", provides="a2"),
+        operation(_noop, "B1", needs="b", provides="b1"),
+        operation(_noop, "B2", needs="b1", provides="b2"),
+        operation(_noop, "bridge", needs=["a1", "b1"], provides="x"),
+    )
+    return pipe.compile(["a", "b"])
+
+
+@pytest.mark.parametrize("heavy, light", [("A", "B"), ("B", "A")])
+def test_partition_keeps_heavy_edges(bridged_plan, heavy, light):
+    sizes = {f"{heavy.lower()}1": 1000, f"{light.lower()}1": 1}
+    placement = partition_plan(bridged_plan, 2, sizes=sizes, imbalance=0.5)
+    assert placement[f"{heavy}1"] == placement[f"{heavy}2"] == placement["bridge"]
+    assert placement[f"{light}1"] == placement[f"{light}2"] != placement["bridge"]
+
+
+def test_partition_balances_costs(fork_plan):
+    ## Without imbalance, no 3 unit-cost ops fit in one partition.
+    placement = partition_plan(fork_plan, 2, imbalance=0)
+    assert sorted(placement.values()) == [0, 0, 1, 1]
+
+    ## Heavy compute spills over, whatever the sizes.
+    costs = {"root": 1, "B": 10, "S": 10, "join": 1}
+    placement = partition_plan(fork_plan, 2, sizes={"big": 100}, costs=costs)
+    assert placement["B"] != placement["S"]
+
+    assert set(partition_plan(fork_plan, 1).values()) == {0}
+    with pytest.raises(ValueError, match="positive integer"):
+        partition_plan(fork_plan, 0)
+    assert fork_plan.partition(3, imbalance=1) == partition_plan(
+        fork_plan, 3, imbalance=1
+    )
+
+
+def test_estimates():
+    np = pytest.importorskip("numpy")
+    assert estimate_size(np.zeros(10)) == 80
+    assert estimate_size(b"") > 0
+
+    estimates = {}
+    update_estimate(estimates, "a", 10)
+    update_estimate(estimates, "a", 20)
+    assert estimates == {"a": 15}
@@ -0,0 +1,176 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test the shared :term:`execution runtime`."""
+
+import threading
+from multiprocessing import dummy as mp_dummy
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.config import execution_pool_plugged
+from graphtik.runtime import HybridPool, Runtime, Tenant
+
+
+@pytest.fixture
+def pool():
+    pool = mp_dummy.Pool(4)
+    yield pool
+    pool.terminate()
+
+
+def _dispatch_order(runtime, sessions):
+    """Block the single slot, queue tasks of all `sessions`, and record their running order."""
+    gate = threading.Event()
+    order = []
+    blocker = runtime.apply_async(gate.wait, (10,))
+    tasks = []
+    for kw, ntasks in sessions:
+        with runtime.session(**kw) as tenant:
+            tasks.extend(
+                runtime.apply_async(order.append, (tenant.name,)) for _ in range(ntasks)
+            )
+    gate.set()
+    blocker.get(10)
+    for t in tasks:
+        t.get(10)
+    return order
+
+
+@pytest.mark.parametrize(
+    "policy, sessions, exp",
+    [
+        (
+            "round-robin",
+            [({"name": "heavy"}, 4), ({"name": "light"}, 2)],
+            "heavy light heavy light heavy heavy",
+        ),
+        (
+            "weighted",
+            [({"name": "w2", "weight": 2}, 4), ({"name": "w1"}, 4)],
+            "w2 w1 w2 w1 w2 w2 w1 w1",
+        ),
+        (
+            "earliest-deadline",
+            [
+                ({"name": "late", "deadline": 60}, 2),
+                ({"name": "soon", "deadline": 1}, 2),
+            ],
+            "soon soon late late",
+        ),
+        (
+            "round-robin",
+            [({"name": "low"}, 2), ({"name": "high", "priority": 1}, 2)],
+            "high high low low",
+        ),
+    ],
+)
+def test_runtime_fairness(pool, policy, sessions, exp):
+    runtime = Runtime(pool, max_in_flight=1, policy=policy)
+    assert " ".join(_dispatch_order(runtime, sessions)) == exp
+    assert runtime.stats["max_queued"] == sum(n for _, n in sessions)
+
+
+def _slow_inc(a):
+    return a + 1
+
+
+def test_runtime_concurrent_solutions(pool):
+    pipe = compose(
+        "shared",
+        operation(_slow_inc, "inc1", needs="a", provides="b", parallel=True),
+        operation(_slow_inc, "inc2", needs="b", provides="c", parallel=True),
+    )
+    runtime = Runtime(pool, max_in_flight=2, max_queued=3)
+    results = {}
+
+    def compute(i):
+        with runtime.session(name=str(i)):
+            results[i] = pipe.compute({"a": i}, "c")["c"]
+
+    threads = [threading.Thread(target=compute, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert results == {i: i + 2 for i in range(8)}
+    assert runtime.stats["submitted"] == runtime.stats["completed"] == 16
+    assert runtime.stats["max_queued"] <= 3
+
+
+def test_runtime_errors(pool):
+    runtime = Runtime(pool)
+    with pytest.raises(ZeroDivisionError):
+        runtime.apply_async(divmod, (1, 0)).get(10)
+
+    with pytest.raises(ValueError, match="Unknown policy"):
+        Runtime(pool, policy="bad")
+    with pytest.raises(ValueError, match="positive integer"):
+        Runtime(pool, max_in_flight=0)
+    with pytest.raises(ValueError, match="must be positive"):
+        Tenant(weight=0)
+
+    pool.close()
+    with pytest.raises(ValueError, match="Pool not running"):
+        runtime.apply_async(len, ([],)).get(10)
+
+
+def _thread(*args):
+    return threading.current_thread()
+
+
+def test_hybrid_pool_routing():
+    gate = threading.Event()
+    pipe = compose(
+        "hybrid",
+        operation(gate.wait, "fetch", needs="timeout", provides="fetched", kind="io"),
+        operation(lambda a: gate.set(), "crunch", needs="a", provides="c", kind="cpu"),
+        operation(_thread, "io", needs="fetched", provides="t_io", kind="io"),
+        operation(_thread, "cpu", needs="c", provides="t_cpu", kind="cpu"),
+        operation(
+            _thread,
+            "inline",
+            needs="c",
+            provides="t_inline",
+            node_props={"kind": "inline"},
+        ),
+        operation(_thread, "other", needs="c", provides="t_other", kind="gpu"),
+    )
+    io_pool, cpu_pool = mp_dummy.Pool(1), mp_dummy.Pool(1)
+    with HybridPool({"io": io_pool, "cpu": cpu_pool}) as pool, execution_pool_plugged(
+        pool
+    ):
+        # Deadlocks (till timeout) unless I/O overlaps CPU.
+        sol = pipe.compute({"timeout": 10, "a": 1})
+        assert sol["fetched"] is True
+        assert sol["t_io"] in io_pool._pool
+        assert sol["t_cpu"] in cpu_pool._pool
+        assert sol["t_other"] in cpu_pool._pool
+        assert sol["t_inline"] is threading.current_thread()
+        assert pool._processes == 2
+
+        assert pool.apply_async(max, (1, 2)).get(10) == 2
+
+
+def test_hybrid_pool_errors(pool):
+    with pytest.raises(ValueError, match="No pools"):
+        HybridPool({})
+    with pytest.raises(ValueError, match="executor's thread"):
+        HybridPool({"inline": pool})
+    with pytest.raises(RuntimeError, match="No default pool"):
+        HybridPool({"io": pool}).apply_async(len, ([],))
+    with pytest.raises(TypeError, match="`kind` must be a string"):
+        operation(str, "bad", kind=1)
+
+    op = operation(str, "op", needs="a", provides="b", kind="io")
+    assert "kind='io'" in repr(op)
+    assert op.withset(name="op2").kind == "io"
+    ## Without a routing pool, kinds don't imply `parallel`.
+    assert compose("no-pool", op).compute({"a": 1}) == {"a": 1, "b": "1"}
+    with pytest.raises(RuntimeError, match="set_execution_pool"):
+        compose("no-pool", op.withset(parallel=True)).compute({"a": 1})
+
+    gpu_op = op.withset(kind="gpu")
+    with HybridPool({"io": pool}) as hpool, execution_pool_plugged(hpool):
+        with pytest.raises(RuntimeError, match="No pool for execution kind 'gpu'"):
+            compose("unmapped", gpu_op).compute({"a": 1})
@@ -0,0 +1,172 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`service mode`."""
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.__main__ import build_parser
+from graphtik.serve import (
+    JSON_TYPE,
+    PICKLE_TYPE,
+    Client,
+    PipelineService,
+    ServiceError,
+    ServiceOverloaded,
+    load_pipeline,
+    make_server,
+    parse_plan,
+)
+
+_gate = threading.Event()
+
+
+def _wait(a):
+    assert _gate.wait(10)
+    return a
+
+
+def _fail(a):
+    raise ValueError("Boom!")
+
+
+pipe = compose(
+    "served",
+    operation(lambda a, b: a + b, "add", needs=["a", "b"], provides="ab"),
+    operation(_wait, "wait", needs="w", provides="waited"),
+    operation(_fail, "fail", needs="f", provides="failed"),
+    operation(lambda o: object(), "opaque", needs="o", provides="obj"),
+)
+
+
+@pytest.fixture(params=["tcp", "unix"])
+def address(request, tmp_path):
+    if request.param == "unix":
+        if not hasattr(__import__("socket"), "AF_UNIX"):
+            pytest.skip("no unix sockets")
+        return f"unix:{tmp_path / 'pipe.sock'}"
+    return "127.0.0.1:0"
+
+
+@pytest.fixture
+def served(address):
+    service = PipelineService(pipe, workers=1, max_queued=0, plans=[(["a", "b"], "ab")])
+    server = make_server(service, address, authkey=b"\xffs3cret")
+    if not address.startswith("unix:"):
+        address = "%s:%s" % server.server_address
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield service, address
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+@pytest.mark.parametrize("content_type", [None, JSON_TYPE, PICKLE_TYPE])
+def test_serve_compute(served, content_type):
+    service, address = served
+    kw = {"content_type": content_type} if content_type else {}
+    if content_type == PICKLE_TYPE:
+        kw["authkey"] = b"\xffs3cret"
+    client = Client(address, timeout=10, **kw)
+
+    assert client.compute({"a": 1, "b": 2}, "ab") == {"ab": 3}
+    assert client.compute({"a": 1, "b": 2}, None) == {"a": 1, "b": 2, "ab": 3}
+    with pytest.raises(ServiceError, match="ValueError: Boom!") as exinfo:
+        client.compute({"f": 1}, "failed")
+    assert exinfo.value.args[1] == 500
+
+    assert client.health()["status"] == "ok"
+    metrics = client.metrics()
+    assert "graphtik_serve_requests 3\n" in metrics
+    assert "graphtik_serve_failures 1\n" in metrics
+    assert "graphtik_serve_plans_compiled 1\n" in metrics
+
+
+def test_serve_payload_trust(served):
+    service, address = served
+    client = Client(address, content_type=PICKLE_TYPE, timeout=10)
+    if address.startswith("unix:"):
+        assert client.compute({"a": 1, "b": 2}, "ab") == {"ab": 3}
+    else:
+        for authkey in (None, b"bad"):
+            client.authkey = authkey
+            with pytest.raises(ServiceError, match="authkey") as exinfo:
+                client.compute({"a": 1, "b": 2}, "ab")
+            assert exinfo.value.args[1] == 403
+
+    ## Unencodable results reply with an error.
+    with pytest.raises(ServiceError, match="Cannot encode reply") as exinfo:
+        Client(address, timeout=10).compute({"o": 1}, "obj")
+    assert exinfo.value.args[1] == 500
+
+
+def test_serve_overloaded(served):
+    service, address = served
+    _gate.clear()
+    client = Client(address, timeout=10)
+    results = []
+    blocked = threading.Thread(
+        target=lambda: results.append(client.compute({"w": 1}, "waited"))
+    )
+    blocked.start()
+    try:
+        for _ in range(100):
+            if service.health()["in_flight"]:
+                break
+            time.sleep(0.05)
+        with pytest.raises(ServiceOverloaded):
+            client.compute({"a": 1, "b": 2}, "ab")
+    finally:
+        _gate.set()
+        blocked.join(10)
+    assert results == [{"waited": 1}]
+    assert "graphtik_serve_rejected 1\n" in client.metrics()
+
+
+def test_serve_errors():
+    assert load_pipeline("test.test_serve:pipe") is pipe
+    with pytest.raises(ValueError, match="<module>:<pipeline>"):
+        load_pipeline("test.test_serve")
+    with pytest.raises(TypeError, match="Expected a pipeline"):
+        load_pipeline("test.test_serve:_wait")
+    with pytest.raises(ValueError, match="<inputs>-><outputs>"):
+        parse_plan("a,b")
+    with pytest.raises(ValueError, match="positive integer"):
+        PipelineService(pipe, workers=0)
+    with pytest.raises(ValueError, match="Unknown payload"):
+        Client("localhost:1", content_type="text/plain")
+
+    args = build_parser().parse_args(
+        ["serve", "m:p", "--plan", "a,b->ab", "--plan", "w->waited"]
+    )
+    assert args.plans == ["a,b->ab", "w->waited"]
+
+
+@pytest.mark.slow
+def test_serve_cli(tmp_path):
+    sock = tmp_path / "cli.sock"
+    root = Path(__file__).parent.parent
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "graphtik", "serve", "test.test_serve:pipe"]
+        + ["--address", f"unix:{sock}", "--plan", "a,b->ab"],
+        cwd=root,
+        env={**os.environ, "PYTHONPATH": str(root)},
+    )
+    try:
+        for _ in range(100):
+            if sock.exists():
+                break
+            time.sleep(0.1)
+        assert Client(f"unix:{sock}", timeout=10).compute({"a": 1, "b": 1}, "ab") == {
+            "ab": 2
+        }
+    finally:
+        proc.terminate()
+        proc.wait(10)
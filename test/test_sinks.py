@@ -0,0 +1,124 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`sink`\\s of outputs."""
+import pickle
+from operator import add, mul
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.sinks import FileSink, as_sink
+
+
+@pytest.fixture
+def pipe():
+    return compose(
+        "sinked",
+        operation(mul, "mul", needs=["a", "b"], provides="ab"),
+        operation(add, "add", needs=["ab", "c"], provides="abc"),
+        operation(add, "add2", needs=["a", "ab"], provides="a_ab"),
+    )
+
+
+def test_sink_callable(exemethod, pipe):
+    sunk = {}
+
+    def sink(dep, val):
+        sunk[dep] = val
+        return f"ref:{dep}"
+
+    sol = pipe.compute({"a": 2, "b": 3, "c": 1}, sinks={"ab": sink, "abc": sink})
+    assert sunk == {"ab": 6, "abc": 7}
+    assert sol.sunk == {"ab": "ref:ab", "abc": "ref:abc"}
+    assert sol["ab"] == "ref:ab"
+    assert sol["abc"] == "ref:abc"
+    # Consumers received the real value.
+    assert sol["a_ab"] == 8
+
+    ## Sink state is per solution.
+    sol2 = pipe.compute({"a": 2, "b": 3, "c": 1})
+    assert sol2.sinks == sol2.sunk == sol2._sunk_pending == {}
+    assert sol.sunk is not sol2.sunk
+
+
+@pytest.mark.parametrize("layered", [False, True])
+def test_sink_dropped_after_consumers(layered, pipe):
+    seen = []
+
+    def sink(dep, val):
+        return "ref"
+
+    def check(cb):
+        seen.append((cb.op.name, cb.sol.get("ab")))
+
+    sol = pipe.compute(
+        {"a": 2, "b": 3, "c": 1},
+        sinks={"ab": sink},
+        callbacks=(check,),
+        layered_solution=layered,
+    )
+    assert seen == [("mul", None), ("add", 6), ("add2", 6)]
+    assert sol["ab"] == "ref"
+    assert 6 not in sol.values()
+    assert all(6 not in (layer or {}).values() for layer in sol.layers)
+    assert dict(sol) == {"a": 2, "b": 3, "c": 1, "ab": "ref", "abc": 7, "a_ab": 8}
+
+
+def test_sink_canceled_consumers(pipe):
+    def boom(*args):
+        raise ValueError("Boom!")
+
+    pipe = compose(
+        "failing",
+        operation(boom, "boom", needs="c", provides="cc"),
+        operation(add, "add3", needs=["ab", "cc"], provides="abcc"),
+        pipe,
+    )
+    from graphtik.config import operations_endured
+
+    with operations_endured():
+        sol = pipe.compute(
+            {"a": 2, "b": 3, "c": 1}, ["ab", "abcc"], sinks={"ab": lambda d, v: "ref"}
+        )
+    assert sol["ab"] == "ref"
+    assert sol.canceled
+
+
+def test_sink_files(tmp_path, pipe):
+    path = tmp_path / "sub" / "ab.pkl"
+    sol = pipe.compute({"a": 2, "b": 3, "c": 1}, sinks={"ab": str(path)})
+    assert sol["ab"] == path
+    assert pickle.loads(path.read_bytes()) == 6
+
+
+def test_sink_npy(tmp_path):
+    np = pytest.importorskip("numpy")
+
+    pipe = compose("arr", operation(np.arange, "arange", needs="n", provides="arr"))
+    path = tmp_path / "arr.npy"
+    sol = pipe.compute({"n": 5}, sinks={"arr": path})
+    assert sol["arr"] == path
+    assert (np.load(path) == np.arange(5)).all()
+
+
+def test_sink_parquet(tmp_path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+
+    pipe = compose(
+        "frame", operation(pd.DataFrame, "frame", needs="data", provides="df")
+    )
+    path = tmp_path / "df.parquet"
+    sol = pipe.compute({"data": {"a": [1, 2]}}, sinks={"df": path})
+    assert sol["df"] == path
+    assert pd.read_parquet(path).equals(pd.DataFrame({"a": [1, 2]}))
+
+
+def test_sink_errors(pipe):
+    with pytest.raises(ValueError, match="Unknown sink file-type '.foo'"):
+        as_sink("a.foo")
+    with pytest.raises(TypeError, match="callable or a file-path"):
+        as_sink(1)
+    with pytest.raises(ValueError, match=r"Unknown outputs\['bad'\] to sink"):
+        pipe.compute({"a": 2, "b": 3, "c": 1}, sinks={"bad": print})
+    assert repr(FileSink("a.npy")) == "FileSink('a.npy')"
@@ -0,0 +1,97 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`lazy input`\\s."""
+import pickle
+from operator import add, mul
+
+import pytest
+
+from graphtik import compose, lazy, operation
+from graphtik.sources import dir_source
+
+
+@pytest.fixture
+def pipe():
+    return compose(
+        "lazies",
+        operation(mul, "mul", needs=["a", "b"], provides="ab"),
+        operation(add, "add", needs=["ab", "c"], provides="abc"),
+        operation(lambda d: d * 2, "double", needs="d", provides="dd"),
+    )
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def loader(loads):
+    def load(name, val):
+        loads.append(name)
+        return val
+
+    return load
+
+
+def test_lazy_inputs(exemethod, pipe, loads, loader):
+    inputs = {
+        "a": lazy(loader, "a", 2),
+        "b": 3,
+        "c": lazy(loader, "c", val=1),
+        "d": lazy(loader, "d", 5),
+    }
+    sol = pipe.compute(inputs, "abc")
+    assert sol == {"abc": 7}
+    assert sorted(loads) == ["a", "c"]
+    # User's inputs untouched.
+    assert isinstance(inputs["a"], lazy)
+
+
+def test_lazy_inputs_loaded_on_1st_consumer(pipe, loads, loader):
+    seen = []
+
+    def check(cb):
+        seen.append((cb.op.name, list(loads)))
+
+    sol = pipe.compute(
+        {"a": 2, "b": 3, "c": lazy(loader, "c", 1), "d": lazy(loader, "d", 5)},
+        callbacks=(check,),
+    )
+    assert seen == [("mul", []), ("add", ["c"]), ("double", ["c", "d"])]
+    assert sol["c"] == 1
+    assert sol["abc"] == 7
+    assert sol["dd"] == 10
+
+
+def test_lazy_inputs_unconsumed(pipe, loads, loader):
+    sol = pipe.compute({"a": 2, "b": 3, "c": 1, "d": lazy(loader, "d", 5)}, "abc")
+    assert sol == {"abc": 7}
+    assert not loads
+
+
+def test_lazy_repr_n_errors():
+    assert repr(lazy(dict, 1, b=2)) == "lazy(dict, 1, b=2)"
+    with pytest.raises(TypeError, match="callable loader"):
+        lazy(1)
+
+
+def test_dir_source(tmp_path, pipe):
+    np = pytest.importorskip("numpy")
+
+    (tmp_path / "a.pkl").write_bytes(pickle.dumps(2))
+    np.save(tmp_path / "b.npy", np.arange(3))
+    (tmp_path / "README.md").write_text("ignored")
+    (tmp_path / "d.pickle").write_text("not even a pickle")
+
+    inputs = dir_source(tmp_path)
+    assert list(inputs) == ["a", "b", "d"]
+    sol = pipe.compute({**inputs, "c": 1}, "abc")
+    assert (sol["abc"] == [1, 3, 5]).all()
+
+    (tmp_path / "a.npy").write_bytes(b"")
+    with pytest.raises(ValueError, match="Duplicate input 'a'"):
+        dir_source(tmp_path)
+
+    inputs = dir_source(tmp_path, "*.md", readers={".MD": lambda p: p.read_text()})
+    assert inputs["README"]() == "ignored"
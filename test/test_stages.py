@@ -0,0 +1,107 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`pipelined execution`."""
+import threading
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.stages import StageGates
+
+
+def _staged_pipe(events, overlapped: threading.Event = None):
+    lock = threading.Lock()
+
+    def stage(name, fn):
+        def run(x):
+            with lock:
+                events.append((name, x))
+            if overlapped:
+                ## Record 0 must wait in its last stage for record 1 to parse.
+                if name == "parse" and x == 1:
+                    overlapped.set()
+                elif name == "load" and x == 0:
+                    assert overlapped.wait(5), "records not overlapped!"
+            return fn(x)
+
+        return operation(run, name, needs=f"{name}_in", provides=f"{name}_out")
+
+    return compose(
+        "staged",
+        stage("parse", lambda x: x),
+        operation(lambda x: x, "p2t", needs="parse_out", provides="transform_in"),
+        stage("transform", lambda x: x),
+        operation(lambda x: x, "t2l", needs="transform_out", provides="load_in"),
+        stage("load", lambda x: x * 10),
+    )
+
+
+def test_compute_stream_overlapped_n_ordered():
+    events = []
+    pipe = _staged_pipe(events, threading.Event())
+
+    records = ({"parse_in": i} for i in range(6))
+    sols = pipe.compute_stream(records, "load_out", max_in_flight=3)
+    assert [sol["load_out"] for sol in sols] == [0, 10, 20, 30, 40, 50]
+
+    for stage in ("parse", "transform", "load"):
+        assert [x for name, x in events if name == stage] == list(range(6))
+
+
+def test_compute_stream_backpressure():
+    pulled = []
+
+    def records():
+        for i in range(10):
+            pulled.append(i)
+            yield {"parse_in": i}
+
+    pipe = _staged_pipe([])
+    sols = pipe.compute_stream(records(), "load_out", max_in_flight=2)
+    assert next(sols)["load_out"] == 0
+    assert len(pulled) <= 3
+    assert [s["load_out"] for s in sols] == [i * 10 for i in range(1, 10)]
+
+
+def test_compute_stream_errors():
+    def boom(x):
+        if x == 1:
+            raise ValueError("Boom!")
+        return x
+
+    pipe = compose(
+        "failing",
+        operation(boom, "boom", needs="a", provides="b"),
+        operation(lambda b: b + 1, "inc", needs="b", provides="c"),
+    )
+    sols = pipe.compute_stream(({"a": i} for i in range(4)), "c")
+    assert next(sols)["c"] == 1
+    with pytest.raises(ValueError, match="Boom!"):
+        next(sols)
+
+    with pytest.raises(ValueError, match="positive integer"):
+        next(pipe.compute_stream([], max_in_flight=0))
+
+
+def test_stage_gates_callbacks():
+    calls = []
+    gates = StageGates()
+    pre, post = gates.callbacks(1, (calls.append,))
+
+    entered = threading.Event()
+    thread = threading.Thread(target=lambda: (gates.enter("op", 2), entered.set()))
+    thread.start()
+    assert not entered.wait(0.1)
+
+    op = operation(str, "op")
+    gates.leave("op", 0)
+    op_cb = type("OpCb", (), {"op": op})()
+    pre(op_cb)
+    post(op_cb)
+    assert calls == [op_cb]
+    assert entered.wait(5)
+    thread.join()
+
+    gates.finish(1)
+    gates.finish(0)
+    assert repr(gates) == "StageGates(low=2, finished=[])"
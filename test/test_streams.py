@@ -0,0 +1,162 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`streaming operation`\\s."""
+import itertools as itt
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.config import operations_endured
+from graphtik.streams import Stream, concat_chunks, stream_producer
+
+
+def _read(n):
+    for i in range(n):
+        yield list(range(i * 3, i * 3 + 3))
+
+
+def _double(chunks):
+    for c in chunks:
+        yield [x * 2 for x in c]
+
+
+@pytest.fixture
+def pipe():
+    return compose(
+        "streamed",
+        operation(_read, "read", needs="n", provides="raw", streaming=True),
+        operation(_double, "double", needs="raw", provides="dbl", streaming=2),
+        operation(lambda d: sum(d), "summing", needs="dbl", provides="total"),
+    )
+
+
+def test_stream_chained(pipe):
+    sol = pipe.compute({"n": 3}, "total")
+    assert sol == {"total": 72}
+
+    ## Asked streams materialized.
+    sol = pipe.compute({"n": 3}, "dbl")
+    assert sol == {"dbl": [0, 2, 4, 6, 8, 10, 12, 14, 16]}
+
+    ## Unless already iterated.
+    for dep, stream in pipe.compute_iter({"n": 2}, "dbl"):
+        assert isinstance(stream, Stream)
+        assert list(stream) == [[0, 2, 4], [6, 8, 10]]
+    with pytest.raises(RuntimeError, match="already iterated"):
+        list(stream)
+
+
+def test_stream_all_outputs_kept(pipe):
+    sol = pipe.compute({"n": 2})
+    assert sol["total"] == 30
+    assert sol["raw"] == [0, 1, 2, 3, 4, 5]
+    assert sol["dbl"] == [0, 2, 4, 6, 8, 10]
+
+
+def test_stream_many_consumers(pipe):
+    pipe = compose(
+        "many",
+        pipe,
+        operation(_double, "double2", needs="raw", provides="dbl2", streaming=True),
+        operation(lambda r: r, "materialize", needs="raw", provides="raw_mat"),
+    )
+    sol = pipe.compute({"n": 2}, ["total", "dbl2", "raw_mat"])
+    assert sol["total"] == 30
+    assert sol["dbl2"] == [0, 2, 4, 6, 8, 10]
+    assert sol["raw_mat"] == [0, 1, 2, 3, 4, 5]
+
+
+def test_stream_bounded_queue():
+    events = []
+
+    def produce():
+        for i in range(20):
+            events.append(("p", i))
+            yield i
+
+    def consume(chunks):
+        for i in chunks:
+            events.append(("c", i))
+            yield i
+
+    pipe = compose(
+        "bounded",
+        operation(produce, "produce", provides="a", streaming=1),
+        operation(consume, "consume", needs="a", provides="b", streaming=1),
+        operation(lambda b: len(b), "count", needs="b", provides="n"),
+    )
+    assert pipe.compute({}, "n") == {"n": 20}
+
+    consumed = produced = max_lead = 0
+    for kind, _ in events:
+        if kind == "p":
+            produced += 1
+        else:
+            consumed += 1
+        max_lead = max(max_lead, produced - consumed)
+    # queue(1) + 1 pending `put()` + 1 given to the 1st stream's consumer thread.
+    assert max_lead <= 4, events
+
+
+def test_stream_abandoned():
+    pipe = compose(
+        "abandoned",
+        operation(itt.count, "infinite", provides="ints", streaming=1),
+        operation(
+            lambda ints: [next(iter(ints))],
+            "first",
+            needs="ints",
+            provides="i",
+            streaming=True,
+        ),
+    )
+    sol = pipe.compute({}, "i")
+    assert sol["i"] == [0]
+
+
+def test_stream_errors():
+    def boom():
+        yield [1]
+        raise ValueError("Boom!")
+
+    pipe = compose(
+        "failing",
+        operation(boom, "boom", provides="a", streaming=True),
+        operation(lambda a: len(a), "count", needs="a", provides="n"),
+    )
+    ## Blamed on the producer.
+    with pytest.raises(ValueError, match="Boom!") as exinfo:
+        pipe.compute({})
+    assert stream_producer(exinfo.value) is pipe.ops[0]
+    assert exinfo.value.jetsam["operation"] is pipe.ops[0]
+    with operations_endured():
+        sol = pipe.compute({})
+    assert list(sol.executed) == pipe.ops
+    assert all(isinstance(ex, ValueError) for ex in sol.executed.values())
+
+    ## Endured by the producer, though not by its consumer.
+    pipe = compose(
+        "failing",
+        operation(boom, "boom", provides="a", streaming=True, endured=True),
+        operation(lambda a: len(a), "count", needs="a", provides="n"),
+        operation(lambda: 1, "other", provides="b"),
+    )
+    sol = pipe.compute({})
+    assert sol == {"b": 1}
+    assert set(sol.executed) == set(pipe.ops)
+    assert sol.is_failed(pipe.ops[0]) and sol.is_failed(pipe.ops[1])
+
+    op = operation(_read, "read", needs="n", provides=["a", "b"], streaming=True)
+    with pytest.raises(ValueError, match="must provide a single output"):
+        op.compute({"n": 1})
+
+
+def test_concat_chunks():
+    np = pytest.importorskip("numpy")
+    pd = pytest.importorskip("pandas")
+
+    assert concat_chunks([]) == []
+    assert concat_chunks([b"a", b"b"]) == b"ab"
+    assert (concat_chunks([np.arange(2), np.arange(2)]) == [0, 1, 0, 1]).all()
+    df = concat_chunks([pd.DataFrame({"a": [1]}), pd.DataFrame({"a": [2]})])
+    assert df["a"].tolist() == [1, 2]
@@ -0,0 +1,310 @@
+# Copyright 2020-2020, Kostis Anagnostopoulos;
+# Licensed under the terms of the Apache License, Version 2.0. See the LICENSE file associated with the project for terms.
+"""Test :term:`warm worker`\\s."""
+
+import os
+import sys
+import threading
+from multiprocessing import dummy as mp_dummy
+
+import pytest
+
+from graphtik import compose, operation
+from graphtik.config import execution_pool_plugged
+from graphtik.execution import Solution, _do_task, _OpTask
+from graphtik.workers import (
+    ForkPool,
+    InterpreterPool,
+    PlacementPool,
+    StorePool,
+    ValueHandle,
+    WorkerPool,
+    _dumps,
+    _fork_snapshots,
+    _FutureResult,
+    _loads,
+    _owners,
+    _published,
+    _release,
+    _stored,
+    compute_forked,
+    compute_preloaded,
+    compute_stored,
+    fetch_value,
+    init_worker,
+)
+
+needs_shm = pytest.mark.skipif(sys.version_info < (3, 8), reason="no shared_memory")
+
+
+def _pid(a):
+    return os.getpid()
+
+
+def _hog(a):
+    return len(bytearray(a))
+
+
+class _Unpicklable(list):
+    def __reduce__(self):
+        raise TypeError("Pickled a forked input!")
+
+
+def _count(table, k):
+    return len(table) * k
+
+
+forked = compose(
+    "forked",
+    operation(_count, "counting", needs=["table", "k"], provides="n", parallel=True),
+    operation(max, "maxing", needs=["n", "k"], provides="m", parallel=True),
+)
+
+
+pipe = compose(
+    "warm",
+    operation(max, "maxing", needs=["a", "b"], provides="c", parallel=True),
+    operation(_pid, "getpid", needs="c", provides="pid", parallel=True),
+)
+
+
+def test_preloaded_in_process():
+    init_worker("test.test_workers:pipe")
+    assert compute_preloaded("maxing", {"a": 1, "b": 3}, "solid") == {"c": 3}
+
+    init_worker(_dumps(pipe))
+    assert compute_preloaded("maxing", {"a": 4, "b": 3}, "solid") == {"c": 4}
+    assert _loads(_dumps([1])) == [1]
+
+
+@pytest.mark.slow
+def test_slim_tasks():
+    with WorkerPool("test.test_workers:pipe", 1) as pool:
+        op = pipe.net.find_op_by_name("maxing")
+        task = _OpTask(op, {"a": 1, "b": 2, "big": "x" * 100}, "solid")
+        fn, args = pool._slim_task(_do_task, (task,))
+        assert fn is compute_preloaded
+        assert args == ("maxing", {"a": 1, "b": 2}, "solid")
+
+        ## Pass-through tasks with callbacks, foreign ops or marshalled.
+        cb_task = _OpTask(op, {}, "solid", callbacks=print)
+        assert pool._slim_task(_do_task, (cb_task,))[1] == (cb_task,)
+        foreign = _OpTask(op.withset(), {}, "solid")
+        assert pool._slim_task(_do_task, (foreign,))[1] == (foreign,)
+        assert pool._slim_task(_do_task, (b"dill",))[1] == (b"dill",)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("preload", ["path", "pickle"])
+def test_worker_pool(preload):
+    spec = "test.test_workers:pipe" if preload == "path" else pipe
+    with WorkerPool(spec, 2, maxtasksperchild=1) as pool, execution_pool_plugged(pool):
+        pids = {pipe.compute({"a": i, "b": 2})["pid"] for i in range(4)}
+    assert os.getpid() not in pids
+    # Recycled workers after each task.
+    assert len(pids) > 2
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(sys.platform == "win32", reason="no RLIMIT_AS")
+def test_worker_memory_limit():
+    hogger = compose(
+        "hogger", operation(_hog, "hog", needs="a", provides="n", parallel=True)
+    )
+    with WorkerPool(
+        hogger, 1, memory_limit=2 * 1024**3
+    ) as pool, execution_pool_plugged(pool):
+        assert hogger.compute({"a": 10})["n"] == 10
+        with pytest.raises(MemoryError):
+            hogger.compute({"a": 4 * 1024**3})
+
+
+def test_fork_split_tasks():
+    pool = ForkPool(1)
+    forks = []
+
+    def fork(solid, snapshot):
+        forks.append(solid)
+        _fork_snapshots.setdefault((pool._id, solid), snapshot)
+        return pool.pools.setdefault(solid, mp_dummy.Pool(1))
+
+    pool._fork = fork
+    op1, op2 = forked.ops
+    table = _Unpicklable([1, 2])
+    sol = {"table": table, "k": 2, "unused": 0}
+    _, fn, (fork_id, task, keys) = pool._split_task(
+        _do_task, (_OpTask(op1, sol, "s"),)
+    )
+    assert fn is compute_forked
+    assert fork_id == (pool._id, "s")
+    assert keys == ["table", "k"]
+    assert task.sol == {}
+    assert compute_forked(fork_id, task, keys) == {"n": 4}
+
+    _, fn, (_, task, keys) = pool._split_task(
+        _do_task, (_OpTask(op2, {**sol, "n": 4, "k": 3}, "s"),)
+    )
+    assert keys == []
+    assert task.sol == {"n": 4, "k": 3}
+
+    ## Other executions inherit their own values, not the 1st one's.
+    _, _, (fork_id, task, keys) = pool._split_task(
+        _do_task, (_OpTask(op1, {"table": _Unpicklable([3]), "k": 2}, "s2"),)
+    )
+    assert fork_id == (pool._id, "s2")
+    assert keys == ["table", "k"]
+    assert forks == ["s", "s", "s2"]
+
+    ## Other tasks go to workers inheriting nothing.
+    assert pool._split_task(len, ([],))[1:] == (len, ([],))
+    assert _fork_snapshots[(pool._id, None)] == {}
+
+    pool.collect(type("Sol", (), {"solid": "s"}))
+    assert set(pool.pools) == {"s2", None}
+    assert (pool._id, "s") not in _fork_snapshots
+
+    pool.terminate()
+    assert not pool.pools
+    assert not any(k[0] == pool._id for k in _fork_snapshots)
+
+    ## Concurrent executions never share workers (nor values), by their solids.
+    plan = forked.compile(["table", "k"])
+    assert len({Solution(plan, {}).solid for _ in range(1000)}) == 1000
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(sys.platform == "win32", reason="no fork")
+def test_fork_pool():
+    with ForkPool(2) as pool, execution_pool_plugged(pool):
+        ## Fork per execution, inheriting each one's (unpicklable) inputs.
+        for k in (3, 4):
+            sol = forked.compute({"table": _Unpicklable(range(1000)), "k": k})
+            assert sol["n"] == sol["m"] == 1000 * k
+            assert not pool.pools
+
+
+def _segment_exists(name) -> bool:
+    from multiprocessing import shared_memory
+
+    try:
+        shared_memory.SharedMemory(name).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+@needs_shm
+def test_compute_stored_in_process():
+    op = pipe.net.find_op_by_name("maxing")
+    outputs = compute_stored(_OpTask(op, {"a": 1, "b": 2}, "s1"))
+    h = outputs["c"]
+    try:
+        assert isinstance(h, ValueHandle)
+        assert h.solid == "s1"
+        assert _stored[h.name] == 2
+
+        ## Consumed by its producing worker, never published.
+        task = _OpTask(op, {"a": h, "b": 1, "x": h}, "s2")
+        h2 = compute_stored(task)["c"]
+        assert task.sol == {"a": 2, "b": 1, "x": h}
+        assert not _published
+        assert not _segment_exists(h.name)
+
+        ## Published once, when asked by another process (its store-server here).
+        assert _owners.request(h.owner, ("publish", h.name)) == _published[h.name]
+        assert _segment_exists(h.name)
+        assert _owners.request(h.owner, ("publish", "bad")) is None
+
+        ## Released along with its segment.
+        _owners.request(h.owner, ("release", [h.name, h2.name]), reply=False)
+        assert _owners.request(h.owner, ("publish", h.name)) is None
+        assert not _stored and not _published
+        assert not _segment_exists(h.name)
+        with pytest.raises(KeyError, match="gone from its worker"):
+            fetch_value(h)
+    finally:
+        _release(list(_stored))
+
+
+def _repeat(a):
+    return [a] * 1000
+
+
+def _tile(b):
+    return b * 1000
+
+
+stored = compose(
+    "stored",
+    operation(_repeat, "repeat", needs="a", provides="b", parallel=True),
+    operation(_tile, "tile", needs="b", provides="c", parallel=True),
+    operation(len, "count", needs="c", provides="n"),
+)
+
+
+@pytest.mark.slow
+@needs_shm
+def test_store_pool():
+    with StorePool(2) as pool, execution_pool_plugged(pool):
+        assert stored.compute({"a": 1}, "n") == {"n": 10 ** 6}
+        sol = stored.compute({"a": 1})
+        assert sol["b"] == [1] * 1000
+        assert not any(isinstance(v, ValueHandle) for v in sol.values())
+        assert not pool._owned
+
+
+@pytest.mark.slow
+@needs_shm
+def test_placement_pool():
+    with PlacementPool(2, imbalance=1) as pool, execution_pool_plugged(pool):
+        for _ in range(2):
+            assert stored.compute({"a": 1}, "n") == {"n": 10 ** 6}
+        assert pool.placement["repeat"] == pool.placement["tile"]
+        assert pool.sizes["c"] > pool.sizes["b"] > 0
+        assert set(pool.costs) == {"repeat", "tile", "count"}
+        assert pool._in_flight == [0, 0]
+        assert not pool._owned
+
+
+def test_future_result():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(1) as executor:
+        res = _FutureResult(executor.submit(max, 1, 2))
+        res.wait(10)
+        assert res.ready() and res.successful()
+        assert res.get() == 2
+
+        res = _FutureResult(executor.submit(divmod, 1, 0))
+        res.wait(10)
+        assert not res.successful()
+        with pytest.raises(ZeroDivisionError):
+            res.get()
+
+
+@pytest.mark.skipif(sys.version_info >= (3, 14), reason="has sub-interpreters")
+def test_interpreter_pool_no_fallback():
+    with pytest.raises(RuntimeError, match="InterpreterPoolExecutor"):
+        InterpreterPool(fallback=False)
+
+
+@pytest.mark.slow
+def test_interpreter_pool():
+    with InterpreterPool(2) as pool, execution_pool_plugged(pool):
+        assert pool.kind == (
+            "interpreters" if sys.version_info >= (3, 14) else "processes"
+        )
+        assert pipe.compute({"a": 1, "b": 2}, "c") == {"c": 2}
+
+        called = threading.Semaphore(0)
+        results = []
+
+        def collect(value):
+            results.append(value)
+            called.release()
+
+        pool.apply_async(max, (1, 3), callback=collect)
+        pool.apply_async(divmod, (1, 0), error_callback=collect)
+        assert called.acquire(timeout=10) and called.acquire(timeout=10)
+    assert 3 in results
+    assert any(isinstance(r, ZeroDivisionError) for r in results)